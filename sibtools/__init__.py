@@ -4,11 +4,33 @@
 
 Version: 2018.12.20
 """
+import csv
+import gzip
+import bz2
+import functools
+import hashlib
+import io
+import json
+import lzma
+import mmap
 import os
-from datetime import datetime
+import queue
+import re
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 
 
 from xml.etree import ElementTree
+from xml.sax.saxutils import escape
 import xml.dom.minidom
 
 # Python 3 - abstrakte Klassen
@@ -16,10 +38,106 @@ import xml.dom.minidom
 
 # Nicht-Standard-Python
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
 import dbf
 
 
+def _unveraendert(wert):
+    """
+    Gibt den Wert unverändert zurück (Umwandlung für Text-Attribute)
+    """
+    return wert
+
+
+_ZEITSTEMPEL = re.compile(r"^(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6})\d*)?"
+                          r"(Z|[+-]\d{2}:?\d{2})?$")
+
+
+def _parse_datum(wert):
+    """
+    Wandelt ein Datum (2018-12-20) oder einen Zeitstempel (2018-12-20T12:30:00 bzw. 2018-12-20 12:30:00,
+    auch mit Sekundenbruchteilen und Zeitzone) um. Das feste ISO-Format wird ohne strptime gelesen,
+    andere Formate wie bisher
+    :param wert: Datum als Text
+    :type wert: str
+    :rtype: datetime
+    """
+    if (len(wert) == 19 and wert[10] in "T " or len(wert) == 10) and wert[4] == "-" and wert[7] == "-":
+        try:
+            return datetime(int(wert[0:4]), int(wert[5:7]), int(wert[8:10]),
+                            int(wert[11:13] or 0), int(wert[14:16] or 0), int(wert[17:19] or 0))
+        except ValueError:
+            pass
+    elif len(wert) > 19:
+        treffer = _ZEITSTEMPEL.match(wert)
+        if treffer is not None:
+            teile = treffer.groups()
+            zone = None
+            if teile[7] == "Z":
+                zone = timezone.utc
+            elif teile[7] is not None:
+                minuten = int(teile[7][1:3]) * 60 + int(teile[7][-2:])
+                zone = timezone(timedelta(minutes=-minuten if teile[7][0] == "-" else minuten))
+            return datetime(*[int(t) for t in teile[:6]], microsecond=int((teile[6] or "0").ljust(6, "0")),
+                            tzinfo=zone)
+    if len(wert) > 10:
+        return datetime.strptime(wert, "%Y-%m-%dT%H:%M:%S")
+    return datetime.strptime(wert, "%Y-%m-%d")
+
+
+def _zeilen_vorauslesen(datasource, puffer):
+    """
+    Liest eine Datenquelle in einem eigenen Thread, während die Zeilen verarbeitet werden.
+    Es werden höchstens puffer Zeilen im Voraus gelesen
+    :param datasource: Datenquelle
+    :type datasource: DataSource
+    :param puffer: Maximale Anzahl vorausgelesener Zeilen
+    :type puffer: int
+    :return: Generator über die Datenzeilen
+    :rtype: generator
+    """
+    warteschlange = queue.Queue(maxsize=max(1, puffer))
+    ende = object()
+    abbruch = threading.Event()
+
+    def ablegen(eintrag):
+        while not abbruch.is_set():
+            try:
+                warteschlange.put(eintrag, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def lesen():
+        try:
+            while True:
+                zeile = datasource.read_line()
+                if zeile is None:
+                    break
+                if not ablegen(zeile):
+                    return
+            ablegen(ende)
+        except Exception as e:
+            ablegen((ende, e))
+
+    thread = threading.Thread(target=lesen)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            zeile = warteschlange.get()
+            if zeile is ende:
+                break
+            if isinstance(zeile, tuple) and len(zeile) == 2 and zeile[0] is ende:
+                raise zeile[1]
+            yield zeile
+    finally:
+        abbruch.set()
+
+
 class DataSource (object):  # (abc.ABC):
     """
     Abstrakte Datenquelle für den Export
@@ -71,6 +189,36 @@ class DataSource (object):  # (abc.ABC):
         """
         raise Exception("Abstrakte Methode aufgerufen")
 
+    def read_lines(self, anzahl):
+        """
+        Liest mehrere Zeilen auf einmal, z.B. für Ziele, die blockweise schreiben
+        :param anzahl: Maximale Anzahl der Zeilen
+        :type anzahl: int
+        :return: Datenzeilen, leer am Ende der Quelle
+        :rtype: list
+        """
+        zeilen = []
+        for i in range(anzahl):
+            zeile = self.read_line()
+            if zeile is None:
+                break
+            zeilen.append(zeile)
+        return zeilen
+
+    def skip_lines(self, anzahl):
+        """
+        Überspringt Zeilen ab der aktuellen Position. Quellen, die direkt positionieren können,
+        sollten diese Methode überschreiben
+        :param anzahl: Anzahl der zu überspringenden Zeilen
+        :type anzahl: int
+        :return: Anzahl der tatsächlich übersprungenen Zeilen
+        :rtype: int
+        """
+        for i in range(anzahl):
+            if self._read_line() is None:
+                return i
+        return anzahl
+
     def show(self, limit=10):
         """
         Gibt die Werte der Quelle aus
@@ -223,19 +371,291 @@ class Geometry (object):
     pass
 
 
+_ATTRIBUT = {'"': "&quot;"}
+
+
+def _nichts_ausgeben(wert, teile):
+    """
+    Emitter für Attribute, die nicht an den WFS übertragen werden
+    """
+    pass
+
+
+_FEHLT = object()
+_EPOCHE = datetime(1970, 1, 1)
+_MIKROSEKUNDE = timedelta(microseconds=1)
+
+
+class _ObjektSpalte (object):
+    """
+    Spalte des SpaltenSpeichers mit beliebigen Python-Objekten
+    """
+
+    def __init__(self):
+        self.werte = []
+
+    def __len__(self):
+        return len(self.werte)
+
+    def setze(self, i, wert):
+        if len(self.werte) < i:
+            self.werte.extend([_FEHLT] * (i - len(self.werte)))
+        self.werte.append(wert)
+        return True
+
+    def hole(self, i):
+        if i < len(self.werte):
+            return self.werte[i]
+        return _FEHLT
+
+
+class _ArraySpalte (object):
+    """
+    Spalte des SpaltenSpeichers als typisiertes Array (int, float, Zeitstempel in Mikrosekunden)
+    """
+
+    def __init__(self, typecode, hin=None, zurueck=None):
+        self.werte = array(typecode)
+        self.vorhanden = bytearray()
+        self.__hin = hin
+        self.__zurueck = zurueck
+
+    def __len__(self):
+        return len(self.werte)
+
+    def setze(self, i, wert):
+        if wert is None:
+            return True
+        try:
+            if self.__hin is not None:
+                wert = self.__hin(wert)
+            if len(self.werte) < i:
+                fehlend = i - len(self.werte)
+                self.werte.extend([0] * fehlend)
+                self.vorhanden.extend(b"\0" * fehlend)
+            self.werte.append(wert)
+        except (TypeError, OverflowError):
+            return False
+        self.vorhanden.append(1)
+        return True
+
+    def hole(self, i):
+        if i >= len(self.werte) or not self.vorhanden[i]:
+            return _FEHLT
+        if self.__zurueck is not None:
+            return self.__zurueck(self.werte[i])
+        return self.werte[i]
+
+
+class _CodeSpalte (object):
+    """
+    Spalte des SpaltenSpeichers mit Wörterbuch-Codierung (z.B. für Klartexte)
+    """
+
+    def __init__(self):
+        self.codes = array('l')
+        self.woerter = []
+        self.__index = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def setze(self, i, wert):
+        try:
+            code = self.__index.get(wert)
+        except TypeError:
+            return False
+        if code is None:
+            code = len(self.woerter)
+            self.woerter.append(wert)
+            self.__index[wert] = code
+        if len(self.codes) < i:
+            self.codes.extend([-1] * (i - len(self.codes)))
+        self.codes.append(code)
+        return True
+
+    def hole(self, i):
+        if i >= len(self.codes) or self.codes[i] < 0:
+            return _FEHLT
+        return self.woerter[self.codes[i]]
+
+
+class SpaltenSpeicher (object):
+    """
+    Speicher für gepufferte Datenzeilen, der die Werte spaltenweise ablegt: Zahlen und Datumsangaben
+    in typisierten Arrays, Klartexte codiert über ein Wörterbuch, die Spaltennamen nur einmal.
+    Verhält sich beim Anhängen und Lesen wie eine Liste von Dictionarys, None-Werte in Zahlen- und
+    Datumsspalten werden als fehlendes Attribut abgelegt
+    """
+
+    def __init__(self, columns, codiert=None):
+        """
+        :param columns: Spalten mit Typen (get_columns)
+        :type columns: dict
+        :param codiert: Spalten, die über ein Wörterbuch codiert werden
+        :type codiert: list
+        """
+        self.__columns = columns
+        self.__codiert = set(codiert or [])
+        self.__namen = []
+        self.__spalten = {}
+        self.__anzahl = 0
+
+    def __neue_spalte(self, name):
+        typ = self.__columns.get(name)
+        if name in self.__codiert:
+            spalte = _CodeSpalte()
+        elif typ == int:
+            spalte = _ArraySpalte('q')
+        elif typ == float:
+            spalte = _ArraySpalte('d')
+        elif typ == datetime:
+            spalte = _ArraySpalte('q', lambda d: (d - _EPOCHE) // _MIKROSEKUNDE,
+                                  lambda m: _EPOCHE + timedelta(microseconds=m))
+        else:
+            spalte = _ObjektSpalte()
+        self.__namen.append(name)
+        self.__spalten[name] = spalte
+        return spalte
+
+    def append(self, zeile):
+        """
+        Hängt eine Datenzeile an
+        :param zeile: Datenzeile
+        :type zeile: dict
+        """
+        i = self.__anzahl
+        for name in zeile:
+            spalte = self.__spalten.get(name)
+            if spalte is None:
+                spalte = self.__neue_spalte(name)
+            if not spalte.setze(i, zeile[name]):
+                # Wert passt nicht zum Typ der Spalte: als Objektspalte weiterführen
+                neu = _ObjektSpalte()
+                for j in range(len(spalte)):
+                    neu.setze(j, spalte.hole(j))
+                self.__spalten[name] = neu
+                neu.setze(i, zeile[name])
+        self.__anzahl += 1
+
+    def __len__(self):
+        return self.__anzahl
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.__anzahl
+        if i < 0 or i >= self.__anzahl:
+            raise IndexError("Zeile " + str(i) + " nicht vorhanden")
+        zeile = {}
+        for name in self.__namen:
+            wert = self.__spalten[name].hole(i)
+            if wert is not _FEHLT:
+                zeile[name] = wert
+        return zeile
+
+    def __iter__(self):
+        for i in range(self.__anzahl):
+            yield self[i]
+
+
+class _Ausschnitt (io.RawIOBase):
+    """
+    Liest nur die Bytes start bis ende einer Datei, z.B. den Teil einer CSV-Datei für einen Prozess
+    """
+
+    def __init__(self, dateiname, start, ende):
+        io.RawIOBase.__init__(self)
+        self.__datei = open(dateiname, "rb")
+        self.__datei.seek(start)
+        self.__rest = ende - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, puffer):
+        daten = self.__datei.read(min(len(puffer), self.__rest))
+        self.__rest -= len(daten)
+        puffer[:len(daten)] = daten
+        return len(daten)
+
+    def close(self):
+        self.__datei.close()
+        io.RawIOBase.close(self)
+
+
+def _csv_bereich_verarbeiten(funktion, filename, optionen, einstellungen, bereich):
+    """
+    Verarbeitet einen Bereich einer CSV-Datei in einem eigenen Prozess
+    :param funktion: Funktion, die den Teil (CsvData) erhält
+    :type funktion: callable
+    :param filename: Dateiname
+    :type filename: str
+    :param optionen: Parameter für CsvData
+    :type optionen: dict
+    :param einstellungen: Umbenennungen, Netzknoten usw. der ursprünglichen Quelle
+    :type einstellungen: dict
+    :param bereich: erste Zeile, Anfang und Ende in Bytes
+    :type bereich: tuple
+    :return: Ergebnis der Funktion
+    """
+    teil = CsvData(filename, bereich=bereich[1:], **optionen)
+    for att, wert in einstellungen.items():
+        setattr(teil, att, wert)
+    return funktion(teil)
+
+
 class CsvData (DataSource, DataTarget):
     """
     CSV-Datenquelle/-ziel
     """
-    __lines = None
-
-    def __init__(self, filename):
+    __kopf_cache = {}
+    __kopf_lock = threading.Lock()
+    __ganzzahl = re.compile(r"^[+-]?(?:0|[1-9]\d*)$")
+    __kommazahl = re.compile(r"^[+-]?\d*[.,]\d+$")
+    __datum = re.compile(r"^(?:\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?|"
+                         r"\d{2}\.\d{2}\.\d{4})$")
+    # ein Feld der Zeile, in Anführungszeichen oder bis zum nächsten Semikolon
+    __feld = re.compile(r'"(?:[^"]|"")*"|[^;]*')
+    # Dateiendung -> Modul und Parameter für die Kompressionsstufe
+    __komprimierung = {".gz": (gzip, 'compresslevel', 6),
+                       ".bz2": (bz2, 'compresslevel', 9),
+                       ".xz": (lzma, 'preset', 6)}
+
+    def __init__(self, filename, typen_erkennen=False, stichprobe=1000, bereich=None, kompressionsstufe=None):
         """
         Erzeugt eine neue CSV-Datenquelle/-ziel
         :param filename: Dateiname
         :type filename: str
+        :param typen_erkennen: Legt fest, ob die Datentypen der Spalten (int, float auch mit Dezimalkomma,
+                Datum) anhand einer Stichprobe erkannt und die Werte beim Lesen umgewandelt werden (default=False)
+        :type typen_erkennen: bool
+        :param stichprobe: Anzahl der Zeilen für die Typerkennung (default=1000)
+        :type stichprobe: int
+        :param bereich: Nur die Zeilen zwischen diesen Byte-Positionen lesen (Anfang, Ende), siehe bereiche()
+        :type bereich: tuple
+        :param kompressionsstufe: Kompressionsstufe beim Schreiben von .gz, .bz2 und .xz-Dateien
+                (default: 6 bei gzip und xz, 9 bei bzip2)
+        :type kompressionsstufe: int
         """
         self.__filename = filename
+        self.__komprimiert = CsvData.__komprimierung.get(os.path.splitext(filename)[1].lower())
+        self.__kompressionsstufe = kompressionsstufe
+        if bereich is not None and self.__komprimiert is not None:
+            raise Exception("Bereiche sind in komprimierten Dateien nicht möglich")
+        self.__bereich = bereich
+        self.__index = None
+        self.__position = 0
+        self.__typen_erkennen = typen_erkennen
+        self.__stichprobe = stichprobe
+        self.__datei = None
+        self.__reader = None
+        self.__spalten = None
+        self.__konverter = None
+        self.__daten_anfang = 0
+
+    def __del__(self):
+        if self.__datei is not None:
+            self.__datei.close()
 
     def _read_line(self):
         """
@@ -243,74 +663,338 @@ class CsvData (DataSource, DataTarget):
         :return: Datenzeile des Datensatzes
         :rtype: list
         """
-        zeile = {}
-        col = list(self._get_columns().keys())
-        if self.__lines is None:
+        if self.__reader is None:
             self.__get_data_from_csv()
 
-        if len(self.__lines) <= 0:
+        csv_zeile = next(self.__reader, None)
+        if csv_zeile is None:
             return None
+        self.__position += 1
 
-        line = self.__lines.pop(0)
-        csv_zeile = line.split(";")
-
-        for c in range(len(csv_zeile)):
-            if csv_zeile[c] == "":
-                pass
-            elif csv_zeile[c][0] == "\"" and csv_zeile[c][-1] == "\"":
-                zeile[col[c]] = csv_zeile[c][1:-1]
-            else:
-                zeile[col[c]] = csv_zeile[c]
+        zeile = {}
+        for spalte, konverter, wert in zip(self.__spalten, self.__konverter, csv_zeile):
+            if wert == "":
+                continue
+            if konverter is None:
+                zeile[spalte] = wert
+                continue
+            try:
+                zeile[spalte] = konverter(wert)
+            except ValueError:
+                # Stichprobe war nicht eindeutig, Wert bleibt Text
+                zeile[spalte] = wert
         return zeile
 
-    def reset_line(self):
+    def reset_line(self, zeile=0):
         """
-        Setzt den Iterator auf den Startwert zurück
+        Setzt den Iterator auf den Startwert oder auf eine beliebige Zeile zurück
+        :param zeile: Nummer der nächsten zu lesenden Zeile (default=0, benötigt sonst den Index)
+        :type zeile: int
+        """
+        if zeile != 0:
+            index = self.__get_index()
+            zeile = min(zeile, len(index) - 1)
+            self.__positionieren(index[zeile], zeile)
+            return
+        if self.__datei is None or self.__bereich is not None or self.__komprimiert is not None:
+            self.__get_data_from_csv()
+            return
+        self.__positionieren(self.__daten_anfang, 0)
+
+    def __positionieren(self, offset, zeile):
+        """
+        Springt an den Anfang einer Zeile
+        :param offset: Byte-Position des Zeilenanfangs
+        :type offset: int
+        :param zeile: Nummer der Zeile
+        :type zeile: int
+        """
+        if self.__datei is None:
+            self.__get_data_from_csv()
+        self.__datei.seek(offset)
+        self.__reader = csv.reader(self.__datei, delimiter=";", quotechar="\"")
+        self.__position = zeile
+
+    def get_line(self, zeile):
+        """
+        Liest eine beliebige Zeile über den Index, danach wird mit der folgenden Zeile weitergelesen
+        :param zeile: Nummer der Zeile (ab 0)
+        :type zeile: int
+        :return: Datenzeile oder None
+        :rtype: dict
+        """
+        self.reset_line(zeile)
+        return self.read_line()
+
+    def skip_lines(self, anzahl):
+        """
+        Überspringt Zeilen, ohne sie in Dictionarys umzuwandeln
+        :param anzahl: Anzahl der zu überspringenden Zeilen
+        :type anzahl: int
+        :return: Anzahl der tatsächlich übersprungenen Zeilen
+        :rtype: int
+        """
+        if self.__reader is None:
+            self.__get_data_from_csv()
+        if self.__index is not None:
+            ziel = min(self.__position + anzahl, len(self.__index) - 1)
+            uebersprungen = ziel - self.__position
+            self.__positionieren(self.__index[ziel], ziel)
+            return uebersprungen
+        uebersprungen = sum(1 for _ in islice(self.__reader, anzahl))
+        self.__position += uebersprungen
+        return uebersprungen
+
+    def index_erstellen(self, speichern=False):
+        """
+        Erstellt den Index der Byte-Positionen aller Zeilen (über mmap, Zeilenumbrüche in Anführungszeichen
+        werden berücksichtigt) oder liest ihn aus der Datei <filename>.idx, falls diese zur CSV-Datei passt.
+        Mit dem Index springen reset_line(zeile), get_line(zeile) und skip_lines() direkt an die Zeile
+        :param speichern: Legt fest, ob der Index als <filename>.idx gespeichert wird (default=False)
+        :type speichern: bool
+        :return: Anzahl der Zeilen
+        :rtype: int
+        """
+        if self.__bereich is not None:
+            raise Exception("Index nur für die ganze Datei möglich")
+        if self.__komprimiert is not None:
+            raise Exception("Index für komprimierte Dateien nicht möglich")
+        stat = os.stat(self.__filename)
+        stand = [stat.st_mtime_ns, stat.st_size]
+        index = self.__index_laden(stand)
+        if index is None:
+            index = self.__index_scannen(stat.st_size)
+            if speichern:
+                self.__index_speichern(stand, index)
+        self.__index = index
+        return len(index) - 1
+
+    def __get_index(self):
+        if self.__index is None:
+            self.index_erstellen()
+        return self.__index
+
+    def __index_scannen(self, groesse):
+        """
+        Sucht die Anfänge aller Datensätze, am Ende steht die Dateigröße
+        :param groesse: Dateigröße
+        :type groesse: int
+        :rtype: array
+        """
+        index = array('q')
+        if groesse == 0:
+            index.append(0)
+            return index
+        with open(self.__filename, "rb") as datei:
+            with mmap.mmap(datei.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # der erste Datensatz ist die Kopfzeile
+                kopfzeile = True
+                in_anfuehrung = False
+                anfang = 0
+                pos = 0
+                for zeile in iter(mm.readline, b""):
+                    pos += len(zeile)
+                    # nur bei einer ungeraden Anzahl von Anführungszeichen geht ein Text über das Zeilenende
+                    if zeile.count(b"\"") % 2 == 1:
+                        in_anfuehrung = not in_anfuehrung
+                    if in_anfuehrung:
+                        continue
+                    if kopfzeile:
+                        kopfzeile = False
+                    else:
+                        index.append(anfang)
+                    anfang = pos
+                if not kopfzeile and anfang < groesse:
+                    # Text in Anführungszeichen bis zum Dateiende
+                    index.append(anfang)
+        index.append(groesse)
+        return index
+
+    def __index_laden(self, stand):
+        """
+        Liest den gespeicherten Index, falls er zum Stand der CSV-Datei passt
+        :rtype: array
+        """
+        try:
+            with open(self.__filename + ".idx", "rb") as datei:
+                kopf = json.loads(datei.readline().decode("utf-8"))
+                if kopf.get('stand') != stand:
+                    return None
+                index = array('q')
+                index.frombytes(datei.read())
+        except (OSError, ValueError):
+            return None
+        if kopf.get('byteorder') != sys.byteorder:
+            index.byteswap()
+        if len(index) != kopf.get('anzahl'):
+            return None
+        return index
+
+    def __index_speichern(self, stand, index):
+        """
+        Speichert den Index neben der CSV-Datei
+        """
+        kopf = {'stand': stand, 'anzahl': len(index), 'byteorder': sys.byteorder}
+        with open(self.__filename + ".idx", "wb") as datei:
+            datei.write((json.dumps(kopf) + "\n").encode("utf-8"))
+            index.tofile(datei)
+
+    def bereiche(self, anzahl):
+        """
+        Teilt die Datei in etwa gleich große Bereiche, die an Zeilenanfängen beginnen
+        :param anzahl: Anzahl der Bereiche
+        :type anzahl: int
+        :return: Liste von (erste Zeile, Anfang, Ende) in Bytes, z.B. für CsvData(filename, bereich=(Anfang, Ende))
+        :rtype: list
         """
-        self.__get_data_from_csv()
+        index = self.__get_index()
+        zeilen = len(index) - 1
+        start, ende = index[0], index[-1]
+        grenzen = [0]
+        for i in range(1, anzahl):
+            grenze = bisect_left(index, start + (ende - start) * i // anzahl, 0, zeilen)
+            if grenze > grenzen[-1]:
+                grenzen.append(grenze)
+        grenzen.append(zeilen)
+        return [(grenzen[i], index[grenzen[i]], index[grenzen[i + 1]]) for i in range(len(grenzen) - 1)
+                if grenzen[i] < grenzen[i + 1]]
+
+    def verarbeiten_parallel(self, funktion, prozesse=None):
+        """
+        Verarbeitet die Datei in mehreren Prozessen: jeder Prozess erhält einen Bereich als eigene
+        CsvData-Quelle, z.B. für einen Import nach PostGIS oder in den WFS
+        :param funktion: Funktion auf Modulebene, die mit dem Teil (CsvData) aufgerufen wird
+        :type funktion: callable
+        :param prozesse: Anzahl der Prozesse (default: Anzahl der Prozessorkerne)
+        :type prozesse: int
+        :return: Ergebnisse der Funktion je Bereich in Reihenfolge der Datei
+        :rtype: list
+        """
+        prozesse = prozesse or os.cpu_count() or 1
+        optionen = {'typen_erkennen': self.__typen_erkennen, 'stichprobe': self.__stichprobe}
+        einstellungen = {att: getattr(self, att) for att in ['_rename_dict', '_add_columns', '_remove_columns',
+                                                            '_von_netzknoten', '_nach_netzknoten']}
+        with ProcessPoolExecutor(prozesse) as pool:
+            auftraege = [pool.submit(_csv_bereich_verarbeiten, funktion, self.__filename, optionen,
+                                     einstellungen, bereich) for bereich in self.bereiche(prozesse)]
+            return [a.result() for a in auftraege]
 
     def __get_data_from_csv(self):
-        csv = open(self.__filename, "r")
-        self.__lines = csv.readlines()
-        csv.close()
-        self.__lines.pop(0)
+        """
+        Öffnet die Datei zum schrittweisen Lesen, liest die Kopfzeile und merkt sich,
+        wo die Daten beginnen
+        """
+        if self.__datei is not None:
+            self.__datei.close()
+        self.__datei = self.__oeffnen("r")
+        kopf = self.__datei.readline()
+        if self.__komprimiert is None:
+            self.__daten_anfang = self.__datei.tell()
+        if self.__bereich is not None:
+            # nur die Kopfzeile aus dem Anfang der Datei, die Zeilen aus dem Bereich
+            self.__datei.close()
+            self.__datei = io.TextIOWrapper(io.BufferedReader(_Ausschnitt(self.__filename, *self.__bereich)),
+                                            newline="")
+        self.__position = 0
+        self.__spalten = next(csv.reader([kopf], delimiter=";", quotechar="\""), [])
+        typen = self._get_columns()
+        self.__konverter = [CsvData.__konverter_fuer(typen.get(spalte, str)) for spalte in self.__spalten]
+        self.__reader = csv.reader(self.__datei, delimiter=";", quotechar="\"")
+
+    def __oeffnen(self, modus, puffer=-1):
+        """
+        Öffnet die Datei als Text, Dateien mit der Endung .gz, .bz2 oder .xz werden dabei
+        ohne Zwischendatei entpackt bzw. gepackt
+        :param modus: "r" zum Lesen oder "w" zum Schreiben
+        :type modus: str
+        :param puffer: Größe des Schreibpuffers bei unkomprimierten Dateien
+        :type puffer: int
+        :return: Datei
+        """
+        newline = "" if modus == "r" else None
+        if self.__komprimiert is None:
+            return open(self.__filename, modus, buffering=puffer, newline=newline)
+        modul, parameter, stufe = self.__komprimiert
+        optionen = {}
+        if modus == "w":
+            optionen[parameter] = stufe if self.__kompressionsstufe is None else self.__kompressionsstufe
+        return modul.open(self.__filename, modus + "t", newline=newline, **optionen)
 
-    def write(self, datasource):
+    @staticmethod
+    def __konverter_fuer(typ):
         """
-        Schreibt eine Zeile zum Importieren
+        Umwandlungsfunktion für Werte einer Spalte (None = Text unverändert)
+        :param typ: erkannter Typ
+        :type typ: type
+        :rtype: callable
+        """
+        if typ == int:
+            return int
+        if typ == float:
+            return lambda wert: float(wert.replace(",", "."))
+        if typ == datetime:
+            return CsvData.__parse_datum
+        return None
+
+    @staticmethod
+    def __parse_datum(wert):
+        """
+        Liest ein Datum im ISO-Format oder als TT.MM.JJJJ
+        :rtype: datetime
+        """
+        if len(wert) == 10 and wert[2] == ".":
+            return datetime.strptime(wert, "%d.%m.%Y")
+        return _parse_datum(wert)
+
+    def write(self, datasource, blockgroesse=1000, puffer=1 << 20):
+        """
+        Schreibt die Zeilen einer Datenquelle in die CSV-Datei. Je Spalte wird einmal eine
+        Formatierung erstellt, die Zeilen werden blockweise gelesen und gepuffert geschrieben
         :param datasource: Importdatensatz
         :type datasource: DataSource
+        :param blockgroesse: Anzahl der Zeilen, die gemeinsam gelesen und formatiert werden (default=1000)
+        :type blockgroesse: int
+        :param puffer: Größe des Schreibpuffers in Bytes bei unkomprimierten Dateien (default=1 MB)
+        :type puffer: int
         :return: Erfolgreich importiert?
         :rtype: bool
         """
-        csv = open(self.__filename, "w+")
-        txt = ""
         columns = datasource.get_columns()
 
         if columns is None:
             return False
 
-        for col in columns:
-            txt += "\"" + col + "\";"
-        txt = txt[:-1] + "\n"
-        while True:
-            line = datasource.read_line()
-            if line is None:
-                break
-            for col in columns:
-                c_type = columns[col]
-                if col in line:
-                    if line[col] is None:
-                        pass
-                    elif c_type in [int, float]:
-                        txt += str(line[col]).replace(".", ",")
-                    else:
-                        txt += "\"" + str(line[col]) + "\""
-                txt += ";"
-            txt = txt[:-1] + "\n"
-            csv.write(txt)
-            txt = ""
-        csv.close()
+        formate = [(col, CsvData.__formatierer(columns[col])) for col in columns]
+        with self.__oeffnen("w", puffer) as datei:
+            datei.write(";".join(["\"" + col + "\"" for col in columns]) + "\n")
+            while True:
+                zeilen = datasource.read_lines(blockgroesse)
+                if len(zeilen) == 0:
+                    break
+                datei.write("".join([";".join([f(zeile.get(col)) for col, f in formate]) + "\n"
+                                     for zeile in zeilen]))
+        return True
+
+    @staticmethod
+    def __formatierer(typ):
+        """
+        Formatierung der Werte einer Spalte: Zahlen mit Dezimalkomma, sonst in Anführungszeichen
+        :param typ: Typ der Spalte
+        :type typ: type
+        :return: Funktion (wert) -> str, leere Werte ergeben ""
+        :rtype: callable
+        """
+        if typ in [int, float]:
+            def formatierer(wert):
+                if wert is None:
+                    return ""
+                return str(wert).replace(".", ",")
+        else:
+            def formatierer(wert):
+                if wert is None:
+                    return ""
+                return "\"" + str(wert).replace("\"", "\"\"") + "\""
+        return formatierer
 
     def _get_columns(self):
         """
@@ -318,16 +1002,109 @@ class CsvData (DataSource, DataTarget):
         :return: Spalten der Quelle
         :rtype: dict
         """
-        columns = {}
-        csv = open(self.__filename, "r")
-
-        for c in csv.readline()[:-1].split(";"):
-            if c[0] == "\"" and c[-1] == "\"":
-                columns[c[1:-1]] = str
-            else:
+        try:
+            stand = os.stat(self.__filename)
+        except OSError:
+            return None
+        schluessel = (os.path.abspath(self.__filename), self.__typen_erkennen, self.__stichprobe,
+                      self._von_netzknoten, self._nach_netzknoten)
+        stand = (stand.st_mtime_ns, stand.st_size)
+        with CsvData.__kopf_lock:
+            if schluessel in CsvData.__kopf_cache and CsvData.__kopf_cache[schluessel][0] == stand:
+                return dict(CsvData.__kopf_cache[schluessel][1])
+
+        with self.__oeffnen("r") as datei:
+            # für die Typerkennung die Textzeilen mitschneiden, csv.reader verliert die Anführungszeichen
+            rohzeilen = []
+
+            def mitschneiden():
+                for rohzeile in datei:
+                    rohzeilen.append(rohzeile)
+                    yield rohzeile
+
+            reader = csv.reader(mitschneiden(), delimiter=";", quotechar="\"")
+            spalten = next(reader, [])
+            columns = {}
+            for c in spalten:
                 columns[c] = str
-        csv.close()
-        return columns
+            if self.__typen_erkennen:
+                del rohzeilen[:]
+
+                def stichprobe():
+                    for zeile in islice(reader, self.__stichprobe):
+                        gequotet = CsvData.__gequotet("".join(rohzeilen))
+                        del rohzeilen[:]
+                        yield zeile, gequotet
+
+                self.__typen_ermitteln(columns, spalten, stichprobe())
+
+        with CsvData.__kopf_lock:
+            CsvData.__kopf_cache[schluessel] = (stand, columns)
+        return dict(columns)
+
+    def __typen_ermitteln(self, columns, spalten, zeilen):
+        """
+        Ermittelt die Datentypen der Spalten anhand einer Stichprobe: eine Spalte ist int, float oder datetime,
+        wenn alle nicht leeren Werte der Stichprobe passen. Werte in Anführungszeichen sind keine Zahlen
+        (so schreibt write() Textspalten), Netzknoten-Spalten bleiben Text
+        :param columns: Spalten -> Typ, wird ergänzt
+        :type columns: dict
+        :param spalten: Spalten in der Reihenfolge der Datei
+        :type spalten: list
+        :param zeilen: Zeilen der Stichprobe mit der Angabe, welche Felder in Anführungszeichen stehen
+        :type zeilen: iterable
+        """
+        moeglich = [{int, float, datetime} for _ in spalten]
+        gefuellt = [False] * len(spalten)
+        for zeile, gequotet in zeilen:
+            for i, wert in enumerate(zeile[:len(spalten)]):
+                if wert == "" or len(moeglich[i]) == 0:
+                    continue
+                gefuellt[i] = True
+                if i < len(gequotet) and gequotet[i]:
+                    moeglich[i].discard(int)
+                    moeglich[i].discard(float)
+                if int in moeglich[i] and self.__ganzzahl.match(wert) is None:
+                    moeglich[i].discard(int)
+                if float in moeglich[i] and self.__ganzzahl.match(wert) is None and \
+                        self.__kommazahl.match(wert) is None:
+                    moeglich[i].discard(float)
+                if datetime in moeglich[i]:
+                    try:
+                        if self.__datum.match(wert) is None:
+                            raise ValueError(wert)
+                        CsvData.__parse_datum(wert)
+                    except ValueError:
+                        moeglich[i].discard(datetime)
+
+        for i, spalte in enumerate(spalten):
+            if not gefuellt[i] or spalte in [self._von_netzknoten, self._nach_netzknoten]:
+                continue
+            for typ in [int, float, datetime]:
+                if typ in moeglich[i]:
+                    columns[spalte] = typ
+                    break
+
+
+    @staticmethod
+    def __gequotet(roh):
+        """
+        Stellt fest, welche Felder einer Zeile in Anführungszeichen stehen
+        :param roh: Zeile als Text, bei Zeilenumbrüchen in Feldern auch mehrere Textzeilen
+        :type roh: str
+        :return: je Feld True, wenn es in Anführungszeichen steht
+        :rtype: list
+        """
+        roh = roh.rstrip("\r\n")
+        gequotet = []
+        position = 0
+        while True:
+            gequotet.append(roh.startswith("\"", position))
+            position = CsvData.__feld.match(roh, position).end()
+            if position >= len(roh):
+                return gequotet
+            # Semikolon überspringen
+            position += 1
 
 
 class DbfData (DataSource, DataTarget):
@@ -473,158 +1250,1238 @@ class DbfData (DataSource, DataTarget):
         return liste
 
 
-class WfsData(DataSource):
+class MetadatenCache (object):
+    """
+    Dateibasierter Zwischenspeicher für Metadaten des WFS (DescribeFeatureType, Klartexte),
+    der von mehreren Prozessen gleichzeitig genutzt werden kann
+    """
+    # Einträge (sha1.json) und halb geschriebene Zwischendateien, andere Dateien bleiben unberührt
+    __eigene_datei = re.compile(r"^(?:[0-9a-f]{40}\.json|sibtools-.*\.tmp)$")
 
-    def __init__(self, url, feature_type=None, username=None, password=None):
+    def __init__(self, verzeichnis, ttl=86400, max_groesse=100 * 1024 * 1024):
         """
-        Erzeugt eine neue WFS-Datenquelle
-        :param url: WFS-URL
-        :type url: str
-        :param feature_type: Name des FeatureTypes
-        :type feature_type: str
-        :param username: Falls notwendig: Benutzername
-        :type username: str
-        :param password: Falls notwendig: Passwort
-        :type password: str
+        Erzeugt einen neuen Zwischenspeicher
+        :param verzeichnis: Verzeichnis, in dem die Einträge abgelegt werden
+        :type verzeichnis: str
+        :param ttl: Gültigkeit eines Eintrages in Sekunden (default=86400)
+        :type ttl: int
+        :param max_groesse: Maximale Größe aller Einträge in Bytes, darüber werden die ältesten gelöscht
+        :type max_groesse: int
         """
-        self._url = url
-        self._feature_type = feature_type
-        self._username = username
-        self._password = password
-        self._wfs_filter = ""
+        self.__verzeichnis = verzeichnis
+        self.__ttl = ttl
+        self.__max_groesse = max_groesse
+        if not os.path.isdir(verzeichnis):
+            os.makedirs(verzeichnis)
 
-    def set_filter(self, wfs_filter):
+    def __datei(self, url, art, name):
         """
-        Setzt einen Filter
-        :param wfs_filter: Filter im Excelstyle UND(GLEICH(vnk, "123456789"),GROESSERGLEICH(BST, "5")
-                        Werte sind immer anzugeben in "" (auch Zahlen)
-                        Felder ohne
-                        Funktionen:
-                        UND, ODER, KLEINER, KLEINERGLEICH, GROESSER, GROESSERGLEICH, GLEICH, NICHT
-        :type wfs_filter: str
+        Dateiname eines Eintrages
+        :param url: URL des WFS
+        :type url: str
+        :param art: Art der Metadaten
+        :type art: str
+        :param name: Name des FeatureTypes
+        :type name: str
+        :rtype: str
         """
-        # prüfen
-        if wfs_filter.count("(") != wfs_filter.count(")"):
-            raise Exception(
-                "Anzahl der öffnenden und schließenden Klammern unterscheidet sich")
-        self._wfs_filter = "<ogc:Filter>" + \
-            self.__to_filter(wfs_filter) + "</ogc:Filter>"
-        # print(self._wfs_filter)
+        schluessel = hashlib.sha1((url + "\n" + art + "\n" + name).encode("utf-8")).hexdigest()
+        return os.path.join(self.__verzeichnis, schluessel + ".json")
 
-    def __to_filter(self, text):
-        text = text.strip()
-        # print(text)
-
-        if (text[0] == "\"" and text[-1] == "\"") or (text[0] == "'" and text[-1] == "'"):
-            return "<ogc:Literal>" + text[1:-1] + "</ogc:Literal>"
-        anfang = text.find("(")
-        ende = text.rfind(")")
-
-        if anfang == -1 or ende == -1:
-            r = "<ogc:PropertyName>"
-            if type(self) == PublicWfsData:
-                dft = self.describe_feature_type()
-                if text not in dft:
-                    raise Exception("Filter-Feld '" + text +
-                                    "' nicht vorhanden")
-                if 'klartext' in dft[text]:
-                    r += text + "/@luk"
-                else:
-                    r += text
-            else:
-                r += text
-            r += "</ogc:PropertyName>"
-            return r
-
-        befehl = text[0:anfang]
-        mitte = text[anfang+1:ende]
-        # print(mitte)
-
-        befehl_wfs = ""
-        if befehl == "UND":
-            befehl_wfs = "ogc:And"
-        elif befehl == "ODER":
-            befehl_wfs = "ogc:Or"
-        elif befehl == "NICHT":
-            befehl_wfs = "ogc:Not"
-        elif befehl == "GLEICH" or befehl == "IDENTISCH":
-            befehl_wfs = "ogc:PropertyIsEqualTo"
-        elif befehl == "KLEINER":
-            befehl_wfs = "ogc:PropertyIsLessThan"
-        elif befehl == "KLEINERGLEICH":
-            befehl_wfs = "ogc:PropertyIsLessThanOrEqualTo"
-        elif befehl == "GROESSER":
-            befehl_wfs = "ogc:PropertyIsGreaterThan"
-        elif befehl == "GROESSERGLEICH":
-            befehl_wfs = "ogc:PropertyIsGreaterThanOrEqualTo"
-        elif befehl == "ZWISCHEN":
-            befehl_wfs = "ogc:PropertyIsBetween"
+    def get(self, url, art, name):
+        """
+        Liest einen Eintrag aus dem Zwischenspeicher
+        :param url: URL des WFS
+        :type url: str
+        :param art: Art der Metadaten (z.B. DescribeFeatureType)
+        :type art: str
+        :param name: Name des FeatureTypes
+        :type name: str
+        :return: Gespeicherte Daten oder None, falls nicht vorhanden oder abgelaufen
+        """
+        datei = self.__datei(url, art, name)
+        try:
+            if time.time() - os.path.getmtime(datei) > self.__ttl:
+                return None
+            with open(datei, "r", encoding="utf-8") as f:
+                eintrag = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if eintrag.get('schluessel') != [url, art, name]:
+            return None
+        return eintrag['daten']
 
-        r = "<" + befehl_wfs + ">"
-        for einzeln in WfsData.__split_ok(mitte):
-            # print(einzeln)
-            r += self.__to_filter(einzeln)
-        r += "</" + befehl_wfs + ">"
-        return r
+    def set(self, url, art, name, daten):
+        """
+        Schreibt einen Eintrag in den Zwischenspeicher. Die Datei wird erst vollständig geschrieben
+        und dann umbenannt, damit andere Prozesse nie halbe Einträge lesen
+        :param url: URL des WFS
+        :type url: str
+        :param art: Art der Metadaten (z.B. DescribeFeatureType)
+        :type art: str
+        :param name: Name des FeatureTypes
+        :type name: str
+        :param daten: JSON-kompatible Daten
+        """
+        handle, tmp = tempfile.mkstemp(prefix="sibtools-", suffix=".tmp", dir=self.__verzeichnis)
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as f:
+                json.dump({'schluessel': [url, art, name], 'daten': daten}, f)
+            os.replace(tmp, self.__datei(url, art, name))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.__aufraeumen()
+
+    def leeren(self):
+        """
+        Löscht alle Einträge des Zwischenspeichers
+        """
+        for datei in os.listdir(self.__verzeichnis):
+            if self.__eigene_datei.match(datei) is not None:
+                try:
+                    os.remove(os.path.join(self.__verzeichnis, datei))
+                except OSError:
+                    pass
+
+    def __aufraeumen(self):
+        """
+        Löscht abgelaufene Einträge und die ältesten, solange die maximale Größe überschritten ist.
+        Andere Dateien im Verzeichnis werden nicht angefasst
+        """
+        jetzt = time.time()
+        eintraege = []
+        groesse = 0
+        for datei in os.listdir(self.__verzeichnis):
+            if self.__eigene_datei.match(datei) is None:
+                continue
+            pfad = os.path.join(self.__verzeichnis, datei)
+            try:
+                stat = os.stat(pfad)
+                if jetzt - stat.st_mtime > self.__ttl:
+                    os.remove(pfad)
+                    continue
+            except OSError:
+                # bereits von einem anderen Prozess gelöscht
+                continue
+            if datei.endswith(".json"):
+                eintraege.append((stat.st_mtime, stat.st_size, pfad))
+                groesse += stat.st_size
 
-    @staticmethod
-    def __split_ok(text):
-        # print(text)
-        liste = []
-        k = 0
-        te = False
-        td = False
-        letzter = 0
-        for i in range(len(text)):
-            # print(text[i])
-            if te and text[i] == "\'" and not (i > 0 and text[i-1] == "\\"):
-                te = False
-            elif td and text[i] == "\"" and not (i > 0 and text[i-1] == "\\"):
-                td = False
-            elif te or td:
+        eintraege.sort()
+        for mtime, size, pfad in eintraege:
+            if groesse <= self.__max_groesse:
+                break
+            try:
+                os.remove(pfad)
+            except OSError:
                 pass
-            elif text[i] == "\'" and not (i > 0 and text[i-1] == "\\"):
-                te = True
-            elif text[i] == "\"" and not (i > 0 and text[i-1] == "\\"):
-                td = True
-            elif text[i] == "(":
-                k += 1
-            elif k == 0 and (text[i] == "," or text[i] == ";"):
-                liste.append(text[letzter:i].strip())
-                letzter = i+1
-            elif text[i] == ")":
-                k -= 1
-        if letzter != len(text) - 1:
-            liste.append(text[letzter:].strip())
-        return liste
+            groesse -= size
 
-    def set_feature_type(self, feature_type):
+
+class DeltaZustand (object):
+    """
+    Lokale Ablage der Stände (höchster Zeitstempel, bekannte fids) für Delta-Exporte aus dem WFS.
+    Die JSON-Datei enthält je Export nur den Stand, die fids liegen zeilenweise in einer eigenen Datei
+    daneben (<datei>.<Prüfsumme>.fids) und werden nur zum Ermitteln gelöschter Objekte gelesen.
+    Diese Datei wächst mit der Anzahl der Objekte und wird bei jedem Abschluss neu geschrieben
+    """
+
+    def __init__(self, datei):
         """
-        Erlaubt es, den FeatureType einmalig zusetzen, falls nicht bereits im Konstruktur geschehen
-        :param feature_type: Name des FeatureTypes
-        :type feature_type: str
+        :param datei: JSON-Datei, in der die Stände abgelegt werden
+        :type datei: str
         """
-        if self._feature_type is not None:
-            raise Exception("FeatureType bereits gesetzt")
-        self._feature_type = feature_type
+        self.__datei = datei
 
-    def _read_line(self):
+    def __laden(self):
         """
-        Liest eine Zeile des Importes
-        :return: Datenzeile des Datensatzes
-        :rtype: list
+        Liest alle Stände aus der Datei
+        :rtype: dict
         """
-        if self._feature_type is None:
-            raise Exception("Kein FeatureType ausgewählt")
+        try:
+            with open(self.__datei, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
 
-        # TODO Funktion erstellen
-        pass
+    @staticmethod
+    def __schluessel(url, feature_type, wfs_filter):
+        return url + "|" + feature_type + "|" + wfs_filter
 
-    def _get_columns(self):
+    def __fid_datei(self, schluessel):
         """
-        Gibt die Spalten des Importes zurück
-        :return: Spalten der Quelle
-        :rtype: dict
+        Datei mit den fids eines Exportes
+        :rtype: str
+        """
+        return self.__datei + "." + hashlib.sha1(schluessel.encode("utf-8")).hexdigest()[:16] + ".fids"
+
+    def get(self, url, feature_type, wfs_filter=""):
+        """
+        Liefert den Stand des letzten Exportes
+        :param url: URL des WFS
+        :type url: str
+        :param feature_type: Name des FeatureTypes
+        :type feature_type: str
+        :param wfs_filter: Filter des Exportes
+        :type wfs_filter: str
+        :return: {'stand': Zeitstempel als Text, 'anzahl': Anzahl der gespeicherten fids oder None} oder None
+        :rtype: dict
+        """
+        return self.__laden().get(self.__schluessel(url, feature_type, wfs_filter))
+
+    def get_fids(self, url, feature_type, wfs_filter=""):
+        """
+        Liest die beim letzten Export vorhandenen fids schrittweise aus ihrer Datei
+        :param url: URL des WFS
+        :type url: str
+        :param feature_type: Name des FeatureTypes
+        :type feature_type: str
+        :param wfs_filter: Filter des Exportes
+        :type wfs_filter: str
+        :return: Generator über die fids oder None, falls keine gespeichert wurden
+        :rtype: generator
+        """
+        schluessel = self.__schluessel(url, feature_type, wfs_filter)
+        eintrag = self.__laden().get(schluessel)
+        if eintrag is None:
+            return None
+        if eintrag.get('fids') is not None:
+            # Ablage älterer Versionen
+            return iter(eintrag['fids'])
+        if eintrag.get('anzahl') is None:
+            return None
+        return self.__fids_lesen(self.__fid_datei(schluessel))
+
+    @staticmethod
+    def __fids_lesen(datei):
+        try:
+            with open(datei, "r", encoding="utf-8") as f:
+                for zeile in f:
+                    yield zeile.rstrip("\n")
+        except OSError:
+            return
+
+    def set(self, url, feature_type, wfs_filter, eintrag):
+        """
+        Speichert den Stand eines Exportes
+        :param url: URL des WFS
+        :type url: str
+        :param feature_type: Name des FeatureTypes
+        :type feature_type: str
+        :param wfs_filter: Filter des Exportes
+        :type wfs_filter: str
+        :param eintrag: {'stand': Zeitstempel als Text, 'fids': fids oder None}
+        :type eintrag: dict
+        """
+        schluessel = self.__schluessel(url, feature_type, wfs_filter)
+        fids = eintrag.get('fids')
+        anzahl = None
+        if fids is not None:
+            fids = list(fids)
+            self.__schreiben(self.__fid_datei(schluessel), lambda f: f.writelines(fid + "\n" for fid in fids))
+            anzahl = len(fids)
+        zustand = self.__laden()
+        zustand[schluessel] = {'stand': eintrag.get('stand'), 'anzahl': anzahl}
+        self.__schreiben(self.__datei, lambda f: json.dump(zustand, f))
+
+    def __schreiben(self, datei, inhalt):
+        """
+        Schreibt eine Datei erst vollständig und benennt sie dann um
+        :param datei: Dateiname
+        :type datei: str
+        :param inhalt: Funktion, die in die geöffnete Datei schreibt
+        :type inhalt: callable
+        """
+        verzeichnis = os.path.dirname(os.path.abspath(datei))
+        handle, tmp = tempfile.mkstemp(suffix=".tmp", dir=verzeichnis)
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as f:
+                inhalt(f)
+            os.replace(tmp, datei)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+class FilterFeld (object):
+    """
+    Attribut innerhalb eines WfsFilters
+    """
+
+    def __init__(self, name):
+        """
+        :param name: Name des Attributes
+        :type name: str
+        """
+        self.name = name
+
+    def to_xml(self, schema=None):
+        """
+        Erzeugt den ogc:PropertyName
+        :param schema: Attributbeschreibung des FeatureTypes zur Prüfung (describe_feature_type)
+        :type schema: dict
+        :rtype: str
+        """
+        name = self.name
+        if schema is not None:
+            if name not in schema:
+                raise Exception("Filter-Feld '" + name + "' nicht vorhanden")
+            if 'klartext' in schema[name]:
+                name += "/@luk"
+        return "<ogc:PropertyName>" + name + "</ogc:PropertyName>"
+
+
+class FilterWert (object):
+    """
+    Wert innerhalb eines WfsFilters
+    """
+
+    def __init__(self, wert):
+        """
+        :param wert: Wert (Datumsangaben werden im ISO-Format übergeben)
+        """
+        self.wert = wert
+
+    def text(self):
+        """
+        Wert als Text
+        :rtype: str
+        """
+        if isinstance(self.wert, datetime):
+            return self.wert.isoformat()
+        return str(self.wert)
+
+    def to_xml(self, schema=None):
+        """
+        Erzeugt das ogc:Literal
+        :rtype: str
+        """
+        return "<ogc:Literal>" + escape(self.text()) + "</ogc:Literal>"
+
+
+class WfsFilter (object):
+    """
+    Filterausdruck für den WFS. Ein Text im Excelstyle wird einmalig geparst, der Ausdruck kann
+    wiederverwendet und per &, | und ~ mit weiteren Ausdrücken kombiniert werden:
+        WfsFilter.parse('GLEICH(gattung, "EIB")') & WfsFilter("BBOX", FilterWert("563000,5933000,566000,5936000"))
+    """
+    _verknuepfungen = {'UND': 'ogc:And',
+                       'ODER': 'ogc:Or',
+                       'NICHT': 'ogc:Not'}
+    _vergleiche = {'GLEICH': 'ogc:PropertyIsEqualTo',
+                   'IDENTISCH': 'ogc:PropertyIsEqualTo',
+                   'UNGLEICH': 'ogc:PropertyIsNotEqualTo',
+                   'KLEINER': 'ogc:PropertyIsLessThan',
+                   'KLEINERGLEICH': 'ogc:PropertyIsLessThanOrEqualTo',
+                   'GROESSER': 'ogc:PropertyIsGreaterThan',
+                   'GROESSERGLEICH': 'ogc:PropertyIsGreaterThanOrEqualTo'}
+    _raeumlich = {'BBOX': 'ogc:BBOX',
+                  'SCHNEIDET': 'ogc:Intersects',
+                  'INTERSECTS': 'ogc:Intersects'}
+    __token = re.compile(r"""\s*(?:"((?:[^"\\]|\\.)*)"|'((?:[^'\\]|\\.)*)'|([(),;])|([^(),;"'\s]+))""")
+
+    def __init__(self, befehl, *argumente):
+        """
+        Erzeugt einen Filterausdruck
+        :param befehl: Funktion (UND, ODER, NICHT, GLEICH, ..., ZWISCHEN, BBOX, SCHNEIDET)
+        :type befehl: str
+        :param argumente: Unterausdrücke (WfsFilter), Attribute (FilterFeld) und Werte (FilterWert)
+        """
+        befehl = befehl.upper()
+        anzahl = len(argumente)
+        if befehl in ['UND', 'ODER']:
+            gueltig = anzahl >= 1
+        elif befehl == 'NICHT':
+            gueltig = anzahl == 1
+        elif befehl in self._vergleiche:
+            gueltig = anzahl == 2
+        elif befehl == 'ZWISCHEN':
+            gueltig = anzahl == 3
+        elif befehl == 'BBOX':
+            gueltig = 1 <= anzahl <= 3
+        elif befehl in self._raeumlich:
+            gueltig = 1 <= anzahl <= 2
+        else:
+            raise Exception("Unbekannte Filter-Funktion '" + befehl + "'")
+        if not gueltig:
+            raise Exception("Falsche Anzahl an Argumenten für " + befehl)
+
+        for arg in argumente:
+            if befehl in self._verknuepfungen and not isinstance(arg, WfsFilter):
+                raise Exception(befehl + " erwartet Filterausdrücke als Argumente")
+            if not isinstance(arg, (WfsFilter, FilterFeld, FilterWert)):
+                raise Exception("Ungültiges Argument für " + befehl + ": " + repr(arg))
+
+        self.befehl = befehl
+        self.argumente = tuple(argumente)
+
+    def __and__(self, other):
+        return WfsFilter('UND', self, other)
+
+    def __or__(self, other):
+        return WfsFilter('ODER', self, other)
+
+    def __invert__(self):
+        return WfsFilter('NICHT', self)
+
+    def felder(self):
+        """
+        Liefert alle im Ausdruck verwendeten Attribute
+        :rtype: list
+        """
+        liste = []
+        for arg in self.argumente:
+            if isinstance(arg, FilterFeld):
+                liste.append(arg.name)
+            elif isinstance(arg, WfsFilter):
+                liste += arg.felder()
+        return liste
+
+    def to_xml(self, schema=None):
+        """
+        Erzeugt den Inhalt des ogc:Filter
+        :param schema: Attributbeschreibung des FeatureTypes zur Prüfung (describe_feature_type)
+        :type schema: dict
+        :rtype: str
+        """
+        if self.befehl in ['UND', 'ODER'] and len(self.argumente) == 1:
+            return self.argumente[0].to_xml(schema)
+
+        if self.befehl in self._raeumlich:
+            return self.__raeumlich_to_xml(schema)
+
+        if self.befehl == 'ZWISCHEN':
+            feld, unten, oben = self.argumente
+            return "<ogc:PropertyIsBetween>" + feld.to_xml(schema) + \
+                   "<ogc:LowerBoundary>" + unten.to_xml(schema) + "</ogc:LowerBoundary>" + \
+                   "<ogc:UpperBoundary>" + oben.to_xml(schema) + "</ogc:UpperBoundary>" + \
+                   "</ogc:PropertyIsBetween>"
+
+        if self.befehl in self._verknuepfungen:
+            befehl_wfs = self._verknuepfungen[self.befehl]
+        else:
+            befehl_wfs = self._vergleiche[self.befehl]
+        r = "<" + befehl_wfs + ">"
+        for arg in self.argumente:
+            r += arg.to_xml(schema)
+        r += "</" + befehl_wfs + ">"
+        return r
+
+    def __raeumlich_to_xml(self, schema):
+        """
+        Erzeugt räumliche Filter (BBOX, Intersects), ohne angegebenes Feld wird die Geometrie
+        des FeatureTypes verwendet
+        :rtype: str
+        """
+        argumente = list(self.argumente)
+        if isinstance(argumente[0], FilterFeld):
+            feld = argumente.pop(0)
+        else:
+            feld = FilterFeld(WfsFilter.__geometrie_feld(schema))
+        if len(argumente) == 0 or not isinstance(argumente[0], FilterWert):
+            raise Exception(self.befehl + " erwartet eine Geometrie als Wert")
+
+        befehl_wfs = self._raeumlich[self.befehl]
+        r = "<" + befehl_wfs + ">" + feld.to_xml(schema)
+        if self.befehl == 'BBOX':
+            koordinaten = argumente[0].text().replace(";", ",").split(",")
+            try:
+                if len(koordinaten) != 4:
+                    raise ValueError(koordinaten)
+                for k in koordinaten:
+                    float(k)
+            except ValueError:
+                raise Exception("BBOX erwartet Zahlen als \"x1,y1,x2,y2\": " + argumente[0].text())
+            srs = ""
+            if len(argumente) > 1:
+                srs = " srsName=\"" + escape(argumente[1].text()) + "\""
+            r += "<gml:Box" + srs + "><gml:coordinates>" + koordinaten[0].strip() + "," + \
+                 koordinaten[1].strip() + " " + koordinaten[2].strip() + "," + koordinaten[3].strip() + \
+                 "</gml:coordinates></gml:Box>"
+        else:
+            gml = argumente[0].text().strip()
+            if not gml.startswith("<"):
+                raise Exception(self.befehl + " erwartet eine GML-Geometrie")
+            r += gml
+        r += "</" + befehl_wfs + ">"
+        return r
+
+    @staticmethod
+    def __geometrie_feld(schema):
+        """
+        Ermittelt das Geometrie-Attribut des FeatureTypes
+        :param schema: Attributbeschreibung des FeatureTypes
+        :type schema: dict
+        :rtype: str
+        """
+        if schema is not None:
+            for att in schema:
+                if schema[att].get('type', '').find('Geometry') > 0:
+                    return att
+        raise Exception("Kein Geometrie-Feld für räumlichen Filter gefunden")
+
+    @staticmethod
+    def parse(text):
+        """
+        Parst einen Filter im Excelstyle, bereits geparste Texte werden wiederverwendet
+        :param text: Filter, z.B. UND(GLEICH(vnk, "123456789"),GROESSERGLEICH(BST, "5"))
+        :type text: str
+        :rtype: WfsFilter
+        """
+        return WfsFilter.__parse_text(text)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def __parse_text(text):
+        """
+        Parst einen Filter, die zuletzt genutzten Texte werden vorgehalten
+        :type text: str
+        :rtype: WfsFilter
+        """
+        tokens = []
+        pos = 0
+        while pos < len(text):
+            m = WfsFilter.__token.match(text, pos)
+            if m is None:
+                if text[pos:].strip() == "":
+                    break
+                raise Exception("Filter ungültig ab Zeichen " + str(pos) + ": " + text[pos:])
+            pos = m.end()
+            if m.group(1) is not None or m.group(2) is not None:
+                wert = m.group(1) if m.group(1) is not None else m.group(2)
+                tokens.append(('wert', re.sub(r"\\(.)", r"\1", wert)))
+            elif m.group(3) is not None:
+                tokens.append((m.group(3), None))
+            elif m.group(4) is not None:
+                tokens.append(('name', m.group(4)))
+
+        ausdruck, pos = WfsFilter.__parse_ausdruck(tokens, 0)
+        if pos != len(tokens):
+            raise Exception("Filter ungültig, unerwartetes Ende")
+        if not isinstance(ausdruck, WfsFilter):
+            raise Exception("Filter muss mit einer Funktion beginnen")
+        return ausdruck
+
+    @staticmethod
+    def __parse_ausdruck(tokens, pos):
+        """
+        Parst einen Ausdruck ab der Position
+        :return: Ausdruck und Position nach dem Ausdruck
+        :rtype: tuple
+        """
+        if pos >= len(tokens):
+            raise Exception("Filter ungültig, Ausdruck fehlt")
+        art, wert = tokens[pos]
+        if art == 'wert':
+            return FilterWert(wert), pos + 1
+        if art != 'name':
+            raise Exception("Filter ungültig, unerwartetes '" + art + "'")
+        if pos + 1 >= len(tokens) or tokens[pos + 1][0] != '(':
+            return FilterFeld(wert), pos + 1
+
+        pos += 2
+        argumente = []
+        if pos < len(tokens) and tokens[pos][0] == ')':
+            return WfsFilter(wert, *argumente), pos + 1
+        while True:
+            arg, pos = WfsFilter.__parse_ausdruck(tokens, pos)
+            argumente.append(arg)
+            if pos >= len(tokens):
+                raise Exception("Anzahl der öffnenden und schließenden Klammern unterscheidet sich")
+            if tokens[pos][0] == ')':
+                return WfsFilter(wert, *argumente), pos + 1
+            if tokens[pos][0] not in [',', ';']:
+                raise Exception("Filter ungültig, ',' erwartet")
+            pos += 1
+
+
+class AdaptiveBlockgroesse (object):
+    """
+    Passt die Anzahl der Zeilen je Transaktion an die Antwortzeiten des Servers an: erfolgreiche,
+    schnelle Transaktionen vergrößern den Block, langsame verkleinern ihn
+    """
+
+    def __init__(self, start=100, minimum=10, maximum=1000, ziel_sekunden=5.0):
+        """
+        :param start: Anfängliche Blockgröße (default=100)
+        :type start: int
+        :param minimum: Kleinste Blockgröße (default=10)
+        :type minimum: int
+        :param maximum: Größte Blockgröße (default=1000)
+        :type maximum: int
+        :param ziel_sekunden: Angestrebte Dauer einer Transaktion (default=5.0)
+        :type ziel_sekunden: float
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.__groesse = max(minimum, min(maximum, start))
+        self.__ziel = ziel_sekunden
+        self.__lock = threading.Lock()
+
+    def groesse(self):
+        """
+        Aktuelle Blockgröße
+        :rtype: int
+        """
+        return self.__groesse
+
+    def melden(self, anzahl, sekunden, erfolgreich):
+        """
+        Meldet das Ergebnis einer Transaktion
+        :param anzahl: Anzahl der Zeilen der Transaktion
+        :type anzahl: int
+        :param sekunden: Dauer der Transaktion
+        :type sekunden: float
+        :param erfolgreich: Wurde die Transaktion angenommen?
+        :type erfolgreich: bool
+        """
+        with self.__lock:
+            if sekunden > self.__ziel:
+                self.__groesse = max(self.minimum, self.__groesse // 2)
+            elif erfolgreich and anzahl >= self.__groesse and sekunden < self.__ziel / 2:
+                self.__groesse = min(self.maximum, self.__groesse + max(1, self.__groesse // 2))
+
+
+class TransaktionsAntwort (object):
+    """
+    Ausgewertete Antwort (WFS_TransactionResponse) einer WFS-Transaktion
+    """
+
+    def __init__(self, status, fids=None, meldung=None, locator=None):
+        """
+        :param status: SUCCESS, FAILED oder PARTIAL
+        :type status: str
+        :param fids: Feature-IDs der eingefügten Objekte in der Reihenfolge des Inserts
+        :type fids: list
+        :param meldung: Meldung des Servers
+        :type meldung: str
+        :param locator: Verweis des Servers auf die fehlerhafte Aktion
+        :type locator: str
+        """
+        self.status = status
+        self.fids = fids if fids is not None else []
+        self.meldung = meldung
+        self.locator = locator
+        # bei PARTIAL: Anzahl der Zeilen vom Anfang, die sicher gespeichert wurden, None falls unbekannt
+        self.ausgefuehrt = None
+
+    @property
+    def erfolgreich(self):
+        """
+        Wurde die Transaktion vollständig ausgeführt?
+        :rtype: bool
+        """
+        return self.status == "SUCCESS"
+
+    @staticmethod
+    def parse(antwort):
+        """
+        Liest Status, Feature-IDs und Meldungen aus der Antwort des WFS
+        :param antwort: Antwort des WFS (XML)
+        :type antwort: bytes
+        :rtype: TransaktionsAntwort
+        """
+        try:
+            tree = ElementTree.fromstring(antwort)
+        except ElementTree.ParseError:
+            text = antwort.decode("ISO-8859-1", "replace")
+            # keine gültige Antwort, nur noch Textsuche wie bisher
+            return TransaktionsAntwort("SUCCESS" if text.find("SUCCESS") > 0 else "FAILED", meldung=text[:1000])
+
+        status = None
+        fids = []
+        meldungen = []
+        locator = None
+        for element in tree.iter():
+            tag = element.tag.split('}', 1).pop()
+            if tag == "Status":
+                for kind in element:
+                    status = kind.tag.split('}', 1).pop()
+            elif tag == "FeatureId":
+                fids.append(element.get("fid"))
+            elif tag == "Locator" and element.text:
+                locator = element.text.strip()
+            elif tag in ["Message", "ServiceException"] and element.text:
+                meldungen.append(element.text.strip())
+
+        if status is None:
+            status = "FAILED"
+        meldung = "\n".join(meldungen) if len(meldungen) > 0 else None
+        if status != "SUCCESS" and meldung is None:
+            meldung = antwort.decode("ISO-8859-1", "replace")[:1000]
+        return TransaktionsAntwort(status, fids, meldung, locator)
+
+
+class ImportErgebnis (object):
+    """
+    Ergebnis eines Importes: ordnet jeder Zeile der Quelle (gezählt ab 0) die vergebene
+    Feature-ID oder die Fehlermeldung zu
+    """
+
+    def __init__(self, journal=None):
+        """
+        :param journal: Journal, in dem jede bestätigte Transaktion festgehalten wird
+        :type journal: ImportJournal
+        """
+        self.fids = {}
+        self.fehler = {}
+        self.unklar = {}
+        self.__journal = journal
+        self.__lock = threading.Lock()
+
+    def eintragen(self, nummern, fids, zeilen=None):
+        """
+        Vermerkt importierte Zeilen
+        :param nummern: Zeilennummern in der Quelle
+        :type nummern: list
+        :param fids: vergebene Feature-IDs, None falls unbekannt
+        :type fids: list
+        :param zeilen: Datenzeilen, für die Prüfsumme im Journal
+        :type zeilen: list
+        """
+        with self.__lock:
+            for nr, fid in zip(nummern, fids):
+                self.fids[nr] = fid
+            if self.__journal is not None:
+                self.__journal.schreiben({'nummern': list(nummern), 'fids': list(fids),
+                                          'hash': ImportJournal.pruefsumme(zeilen)})
+
+    def ablehnen(self, nr, meldung):
+        """
+        Vermerkt eine abgelehnte Zeile
+        :param nr: Zeilennummer in der Quelle
+        :type nr: int
+        :param meldung: Fehlermeldung
+        :type meldung: str
+        """
+        with self.__lock:
+            self.fehler[nr] = meldung
+            if self.__journal is not None:
+                self.__journal.schreiben({'nr': nr, 'meldung': meldung})
+
+    def unklar_eintragen(self, nummern, meldung, zeilen=None):
+        """
+        Vermerkt Zeilen einer teilweise ausgeführten Transaktion, bei denen nicht feststeht, ob sie
+        gespeichert wurden. Sie werden nicht erneut angeboten, um doppelte Objekte zu vermeiden
+        :param nummern: Zeilennummern in der Quelle
+        :type nummern: list
+        :param meldung: Fehlermeldung
+        :type meldung: str
+        :param zeilen: Datenzeilen
+        :type zeilen: list
+        """
+        with self.__lock:
+            for nr in nummern:
+                self.unklar[nr] = meldung
+            if self.__journal is not None:
+                self.__journal.schreiben({'unklar': list(nummern), 'meldung': meldung})
+
+    def _ordnen(self):
+        """
+        Sortiert die Einträge nach der Zeilennummer in der Quelle. Parallele Transaktionen und ein
+        fortgesetzter Import tragen in der Reihenfolge der Antworten ein
+        """
+        with self.__lock:
+            self.fids = dict(sorted(self.fids.items()))
+            self.fehler = dict(sorted(self.fehler.items()))
+            self.unklar = dict(sorted(self.unklar.items()))
+
+    def get_fid(self, nr):
+        """
+        Feature-ID einer importierten Zeile
+        :param nr: Zeilennummer in der Quelle
+        :type nr: int
+        :return: Feature-ID oder None
+        :rtype: str
+        """
+        return self.fids.get(nr)
+
+    def fehlgeschlagen(self):
+        """
+        Zeilennummern der abgelehnten Zeilen, z.B. für einen gezielten neuen Versuch
+        :rtype: list
+        """
+        return sorted(self.fehler)
+
+    @property
+    def erfolgreich(self):
+        """
+        Wurden alle Zeilen importiert?
+        :rtype: bool
+        """
+        return len(self.fehler) == 0 and len(self.unklar) == 0
+
+    def __bool__(self):
+        return self.erfolgreich
+
+    def __str__(self):
+        text = str(len(self.fids)) + " Zeilen importiert, " + str(len(self.fehler)) + " Zeilen abgelehnt"
+        if len(self.unklar) > 0:
+            text += ", " + str(len(self.unklar)) + " Zeilen mit unbekanntem Stand"
+        return text
+
+
+class ImportJournal (object):
+    """
+    Journal eines Importes: hält jede bestätigte Transaktion (Zeilennummern, Feature-IDs, Prüfsumme)
+    und jede abgelehnte Zeile fest, damit ein abgebrochener Import an der letzten bestätigten
+    Position fortgesetzt werden kann, ohne Zeilen doppelt einzufügen. Abgelehnte Zeilen werden beim
+    Fortsetzen erneut gesendet, z.B. nach vorübergehenden Fehlern des Servers
+    """
+
+    def __init__(self, datei):
+        """
+        :param datei: Journal-Datei (eine JSON-Zeile je Eintrag)
+        :type datei: str
+        """
+        self.__datei = datei
+        self.__eintraege = []
+        self.__datei_handle = None
+
+    @staticmethod
+    def pruefsumme(zeilen):
+        """
+        Prüfsumme über den Inhalt von Datenzeilen
+        :param zeilen: Datenzeilen
+        :type zeilen: list
+        :rtype: str
+        """
+        h = hashlib.sha1()
+        for zeile in zeilen or []:
+            h.update(json.dumps(zeile, sort_keys=True, default=str).encode("utf-8"))
+        return h.hexdigest()
+
+    def oeffnen(self, url, feature_type, abgelehnte_ueberspringen=False):
+        """
+        Liest ein vorhandenes Journal und öffnet es zum Anhängen
+        :param url: URL des WFS
+        :type url: str
+        :param feature_type: Name des FeatureTypes
+        :type feature_type: str
+        :param abgelehnte_ueberspringen: Legt fest, ob abgelehnte Zeilen als erledigt gelten. Sonst werden
+                sie wie nicht gesendete Zeilen erneut angeboten (default=False)
+        :type abgelehnte_ueberspringen: bool
+        :return: Ergebnis mit den bereits bestätigten (und ggf. abgelehnten) Zeilen
+        :rtype: ImportErgebnis
+        """
+        kopf = {'url': url, 'feature_type': feature_type}
+        self.__eintraege = []
+        if os.path.exists(self.__datei):
+            with open(self.__datei, "r", encoding="utf-8") as f:
+                for zeile in f:
+                    try:
+                        eintrag = json.loads(zeile)
+                    except ValueError:
+                        # beim Abbruch unvollständig geschriebene Zeile
+                        continue
+                    if 'feature_type' in eintrag:
+                        if eintrag != kopf:
+                            raise Exception("Journal " + self.__datei + " gehört zu einem anderen Import: " +
+                                            eintrag['feature_type'] + " (" + eintrag['url'] + ")")
+                    else:
+                        self.__eintraege.append(eintrag)
+            print(str(len(self.__eintraege)) + " Einträge aus dem Journal gelesen")
+
+        self.__datei_handle = open(self.__datei, "a", encoding="utf-8")
+        if self.__datei_handle.tell() == 0:
+            self.schreiben(kopf)
+
+        ergebnis = ImportErgebnis(self)
+        for eintrag in self.__eintraege:
+            if 'nr' in eintrag:
+                if abgelehnte_ueberspringen:
+                    ergebnis.fehler[eintrag['nr']] = eintrag['meldung']
+            elif 'unklar' in eintrag:
+                for nr in eintrag['unklar']:
+                    ergebnis.unklar[nr] = eintrag['meldung']
+            else:
+                for nr, fid in zip(eintrag['nummern'], eintrag['fids']):
+                    ergebnis.fids[nr] = fid
+        return ergebnis
+
+    def schreiben(self, eintrag):
+        """
+        Hängt einen Eintrag an das Journal an und schreibt ihn sofort auf die Platte
+        :param eintrag: Eintrag
+        :type eintrag: dict
+        """
+        self.__datei_handle.write(json.dumps(eintrag) + "\n")
+        self.__datei_handle.flush()
+        os.fsync(self.__datei_handle.fileno())
+
+    def schliessen(self):
+        """
+        Schließt die Journal-Datei
+        """
+        if self.__datei_handle is not None:
+            self.__datei_handle.close()
+            self.__datei_handle = None
+
+    def position(self, ergebnis):
+        """
+        Erste Zeile, ab der nicht alle Zeilen erledigt sind, und Beginn der letzten bestätigten
+        Transaktion davor, ab der die Quelle gelesen und geprüft wird
+        :param ergebnis: Ergebnis aus oeffnen()
+        :type ergebnis: ImportErgebnis
+        :return: Position, Beginn der Prüfung, erwartete Prüfsumme
+        :rtype: tuple
+        """
+        position = 0
+        while position in ergebnis.fids or position in ergebnis.fehler or position in ergebnis.unklar:
+            position += 1
+        pruefung = None
+        for eintrag in self.__eintraege:
+            if 'hash' in eintrag and len(eintrag['nummern']) > 0 and max(eintrag['nummern']) < position:
+                if pruefung is None or max(eintrag['nummern']) > max(pruefung['nummern']):
+                    pruefung = eintrag
+        if pruefung is None:
+            return position, position, None
+        return position, min(pruefung['nummern']), pruefung
+
+    def nur_offene(self, zeilen, ergebnis, pruefung):
+        """
+        Gibt nur die Zeilen weiter, die noch nicht erledigt sind, und vergleicht die Prüfsumme der
+        zuletzt bestätigten Transaktion mit der Quelle
+        :param zeilen: Datenzeilen mit ihrer Nummer in der Quelle
+        :type zeilen: iterable of (int, dict)
+        :param ergebnis: Ergebnis aus oeffnen()
+        :type ergebnis: ImportErgebnis
+        :param pruefung: Eintrag der zu prüfenden Transaktion oder None
+        :type pruefung: dict
+        :return: Generator über die offenen Zeilen mit ihrer Nummer
+        :rtype: generator
+        """
+        nummern = set(pruefung['nummern']) if pruefung is not None else set()
+        geprueft = []
+        for nr, zeile in zeilen:
+            if nr in nummern:
+                geprueft.append(zeile)
+                if len(geprueft) == len(nummern) and self.pruefsumme(geprueft) != pruefung['hash']:
+                    raise Exception("Die Quelle hat sich seit dem letzten Lauf geändert (Zeilen " +
+                                    str(min(nummern)) + " bis " + str(max(nummern)) + ")")
+            if nr in ergebnis.fids or nr in ergebnis.fehler or nr in ergebnis.unklar:
+                continue
+            yield nr, zeile
+
+
+class SyncErgebnis (ImportErgebnis):
+    """
+    Ergebnis eines Abgleiches (PublicWfsData.sync): wie ImportErgebnis für die Zeilen der Quelle,
+    gelöschte Objekte werden getrennt unter ihrer fid geführt (geloeschte_fids, fehler_loeschen, unklar_loeschen)
+    """
+
+    def __init__(self):
+        ImportErgebnis.__init__(self)
+        self.eingefuegt = 0
+        self.geaendert = 0
+        self.geloescht = 0
+        self.unveraendert = 0
+        self.geloeschte_fids = []
+        self.fehler_loeschen = {}
+        self.unklar_loeschen = {}
+        self.__lock = threading.Lock()
+
+    def eintragen(self, nummern, fids, zeilen=None):
+        """
+        Vermerkt ausgeführte Posten
+        :param nummern: Zeilennummern in der Quelle (bei Deletes die fid)
+        :type nummern: list
+        :param fids: Feature-IDs
+        :type fids: list
+        :param zeilen: Posten (art, zeile, fid)
+        :type zeilen: list
+        """
+        quelle = [(nr, fid) for nr, fid, posten in zip(nummern, fids, zeilen) if posten[0] != "Delete"]
+        with self.__lock:
+            self.geloeschte_fids.extend(posten[2] for posten in zeilen if posten[0] == "Delete")
+        ImportErgebnis.eintragen(self, [nr for nr, _ in quelle], [fid for _, fid in quelle])
+
+    def unklar_eintragen(self, nummern, meldung, zeilen=None):
+        """
+        Vermerkt Posten einer teilweise ausgeführten Transaktion mit unbekanntem Stand
+        :param nummern: Zeilennummern in der Quelle (bei Deletes die fid)
+        :type nummern: list
+        :param meldung: Fehlermeldung
+        :type meldung: str
+        :param zeilen: Posten (art, zeile, fid)
+        :type zeilen: list
+        """
+        with self.__lock:
+            for posten in zeilen:
+                if posten[0] == "Delete":
+                    self.unklar_loeschen[posten[2]] = meldung
+        ImportErgebnis.unklar_eintragen(self, [nr for nr, posten in zip(nummern, zeilen) if posten[0] != "Delete"],
+                                        meldung)
+
+    def loeschen_ablehnen(self, fid, meldung):
+        """
+        Vermerkt ein Objekt, das nicht gelöscht werden konnte
+        :param fid: Feature-ID
+        :type fid: str
+        :param meldung: Fehlermeldung
+        :type meldung: str
+        """
+        with self.__lock:
+            self.fehler_loeschen[fid] = meldung
+
+    @property
+    def erfolgreich(self):
+        """
+        Wurden alle Posten ausgeführt?
+        :rtype: bool
+        """
+        return ImportErgebnis.erfolgreich.fget(self) and len(self.fehler_loeschen) == 0 and \
+            len(self.unklar_loeschen) == 0
+
+    def __str__(self):
+        return str(self.eingefuegt) + " eingefügt, " + str(self.geaendert) + " geändert, " + \
+               str(self.geloescht) + " gelöscht, " + str(self.unveraendert) + " unverändert, " + \
+               str(len(self.fehler) + len(self.fehler_loeschen)) + " abgelehnt"
+
+
+class Uebertragungsstatistik (object):
+    """
+    Zählt je Anfrageart (GetFeature, Transaction, ...) die übertragenen Bytes auf der Leitung
+    und unkomprimiert, um die Ersparnis durch Komprimierung zu messen
+    """
+
+    def __init__(self):
+        self.__werte = {}
+        self.__lock = threading.Lock()
+
+    def erfassen(self, art, gesendet, gesendet_roh, empfangen, empfangen_roh):
+        """
+        Erfasst eine Anfrage
+        :param art: Anfrageart
+        :type art: str
+        :param gesendet: gesendete Bytes (ggf. komprimiert)
+        :type gesendet: int
+        :param gesendet_roh: gesendete Bytes unkomprimiert
+        :type gesendet_roh: int
+        :param empfangen: empfangene Bytes (ggf. komprimiert)
+        :type empfangen: int
+        :param empfangen_roh: empfangene Bytes unkomprimiert
+        :type empfangen_roh: int
+        """
+        with self.__lock:
+            if art not in self.__werte:
+                self.__werte[art] = {'anfragen': 0, 'gesendet': 0, 'gesendet_roh': 0,
+                                     'empfangen': 0, 'empfangen_roh': 0}
+            w = self.__werte[art]
+            w['anfragen'] += 1
+            w['gesendet'] += gesendet
+            w['gesendet_roh'] += gesendet_roh
+            w['empfangen'] += empfangen
+            w['empfangen_roh'] += empfangen_roh
+
+    def get(self):
+        """
+        Liefert die Zählerstände je Anfrageart
+        :return: Anfrageart -> {'anfragen', 'gesendet', 'gesendet_roh', 'empfangen', 'empfangen_roh'}
+        :rtype: dict
+        """
+        with self.__lock:
+            return {art: dict(w) for art, w in self.__werte.items()}
+
+    def zuruecksetzen(self):
+        """
+        Setzt alle Zähler zurück
+        """
+        with self.__lock:
+            self.__werte = {}
+
+    def ausgeben(self):
+        """
+        Gibt die Zählerstände und die Ersparnis als Tabelle aus
+        """
+        print("%-22s %8s %14s %14s %8s" % ("Anfrage", "Anzahl", "Leitung", "unkomprimiert", "Ersparnis"))
+        for art, w in sorted(self.get().items()):
+            leitung = w['gesendet'] + w['empfangen']
+            roh = w['gesendet_roh'] + w['empfangen_roh']
+            ersparnis = 100.0 * (1 - leitung / float(roh)) if roh > 0 else 0.0
+            print("%-22s %8d %14d %14d %7.1f%%" % (art, w['anfragen'], leitung, roh, ersparnis))
+
+
+class _ZaehlenderStrom (object):
+    """
+    Liest eine HTTP-Antwort ohne die Dekomprimierung von urllib3, entpackt gzip/deflate selbst
+    und zählt dabei die Bytes auf der Leitung und die entpackten Bytes. Kann wie response.raw
+    direkt an den XML-Parser übergeben werden
+    """
+
+    def __init__(self, raw, kodierung, fertig):
+        """
+        :param raw: urllib3-Antwort
+        :type raw: urllib3.response.HTTPResponse
+        :param kodierung: Content-Encoding der Antwort
+        :type kodierung: str
+        :param fertig: wird am Ende einmal mit (empfangen, empfangen_roh) aufgerufen
+        :type fertig: callable
+        """
+        self.__raw = raw
+        self.__fertig = fertig
+        self.__kodierung = kodierung
+        if kodierung == "gzip":
+            self.__entpacker = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif kodierung == "deflate":
+            self.__entpacker = zlib.decompressobj()
+        else:
+            self.__entpacker = None
+        self.__puffer = bytearray()
+        self.__erster_block = True
+        self.__ende = False
+        self.empfangen = 0
+        self.empfangen_roh = 0
+
+    def __entpacken(self, daten):
+        if self.__entpacker is None:
+            return daten
+        if self.__erster_block and self.__kodierung == "deflate":
+            self.__erster_block = False
+            try:
+                return self.__entpacker.decompress(daten)
+            except zlib.error:
+                # manche Server senden deflate ohne zlib-Kopf
+                self.__entpacker = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self.__entpacker.decompress(daten)
+
+    def read(self, anzahl=-1):
+        """
+        Liest entpackte Daten
+        :param anzahl: Anzahl der Bytes (default: alles)
+        :type anzahl: int
+        :rtype: bytes
+        """
+        while not self.__ende and (anzahl is None or anzahl < 0 or len(self.__puffer) < anzahl):
+            daten = self.__raw.read(65536 if anzahl is None or anzahl < 0 else max(anzahl, 8192),
+                                    decode_content=False)
+            if not daten:
+                if self.__entpacker is not None:
+                    self.__puffer += self.__entpacker.flush()
+                self.__beenden()
+                break
+            self.empfangen += len(daten)
+            entpackt = self.__entpacken(daten)
+            self.empfangen_roh += len(entpackt)
+            self.__puffer += entpackt
+        if anzahl is None or anzahl < 0 or anzahl >= len(self.__puffer):
+            ergebnis = bytes(self.__puffer)
+            self.__puffer = bytearray()
+        else:
+            ergebnis = bytes(self.__puffer[:anzahl])
+            del self.__puffer[:anzahl]
+        return ergebnis
+
+    def __beenden(self):
+        if not self.__ende:
+            self.__ende = True
+            self.__fertig(self.empfangen, self.empfangen_roh)
+
+    def close(self):
+        self.__beenden()
+        self.__raw.close()
+
+    def release_conn(self):
+        self.__raw.release_conn()
+
+
+class WfsData(DataSource):
+    __sessions = {}
+    __sessions_lock = threading.Lock()
+    __metadaten_locks = {}
+    _http_pool_groesse = 10
+    _http_timeout = (10, 600)
+    _http_versuche = 3
+    _http_backoff = 0.5
+    _http_komprimieren = False
+    _metadaten_cache = None
+    _statistik = None
+    __anfrage_art = re.compile(rb"<(?:wfs:)?(\w+)")
+
+    def __init__(self, url, feature_type=None, username=None, password=None):
+        """
+        Erzeugt eine neue WFS-Datenquelle
+        :param url: WFS-URL
+        :type url: str
+        :param feature_type: Name des FeatureTypes
+        :type feature_type: str
+        :param username: Falls notwendig: Benutzername
+        :type username: str
+        :param password: Falls notwendig: Passwort
+        :type password: str
+        """
+        self._url = url
+        self._feature_type = feature_type
+        self._username = username
+        self._password = password
+        self._login = HTTPBasicAuth(username, password)
+        self._wfs_filter = ""
+        self._filter_ausdruck = None
+
+    def set_filter(self, wfs_filter):
+        """
+        Setzt einen Filter
+        :param wfs_filter: Filter im Excelstyle UND(GLEICH(vnk, "123456789"),GROESSERGLEICH(BST, "5")
+                        Werte sind immer anzugeben in "" (auch Zahlen)
+                        Felder ohne
+                        Funktionen:
+                        UND, ODER, KLEINER, KLEINERGLEICH, GROESSER, GROESSERGLEICH, GLEICH, NICHT, ZWISCHEN,
+                        BBOX(geometrie, "x1,y1,x2,y2"), SCHNEIDET(geometrie, "<gml:Polygon>...</gml:Polygon>")
+                        oder ein bereits erstellter WfsFilter
+        :type wfs_filter: str | WfsFilter
+        """
+        if not isinstance(wfs_filter, WfsFilter):
+            wfs_filter = WfsFilter.parse(wfs_filter)
+        self._wfs_filter = "<ogc:Filter>" + \
+            wfs_filter.to_xml(self._filter_schema()) + "</ogc:Filter>"
+        self._filter_ausdruck = wfs_filter
+        # print(self._wfs_filter)
+
+    def get_filter(self):
+        """
+        Gibt den gesetzten Filter zurück, z.B. um ihn mit weiteren Bedingungen zu kombinieren
+        :return: Filterausdruck oder None
+        :rtype: WfsFilter
+        """
+        return self._filter_ausdruck
+
+    def _filter_schema(self):
+        """
+        Liefert die Attributbeschreibung, gegen die Filter geprüft werden (None = keine Prüfung)
+        :rtype: dict
+        """
+        return None
+
+    def set_feature_type(self, feature_type):
+        """
+        Erlaubt es, den FeatureType einmalig zusetzen, falls nicht bereits im Konstruktur geschehen
+        :param feature_type: Name des FeatureTypes
+        :type feature_type: str
+        """
+        if self._feature_type is not None:
+            raise Exception("FeatureType bereits gesetzt")
+        self._feature_type = feature_type
+
+    def _read_line(self):
+        """
+        Liest eine Zeile des Importes
+        :return: Datenzeile des Datensatzes
+        :rtype: list
+        """
+        if self._feature_type is None:
+            raise Exception("Kein FeatureType ausgewählt")
+
+        # TODO Funktion erstellen
+        pass
+
+    def _get_columns(self):
+        """
+        Gibt die Spalten des Importes zurück
+        :return: Spalten der Quelle
+        :rtype: dict
         """
         columns = {}
         dft = self.describe_feature_type()
@@ -674,8 +2531,28 @@ class WfsData(DataSource):
         if feature_type is None:
             feature_type = self._feature_type
 
-        if feature_type in self.__featureDescr:
-            return self.__featureDescr[feature_type]
+        if (self._url, feature_type) in self.__featureDescr:
+            return self.__featureDescr[(self._url, feature_type)]
+
+        # parallele Exporte laden jeden FeatureType nur einmal
+        with self._metadaten_lock("DescribeFeatureType", feature_type):
+            if (self._url, feature_type) in self.__featureDescr:
+                return self.__featureDescr[(self._url, feature_type)]
+            return self.__describe_feature_type_laden(feature_type)
+
+    def __describe_feature_type_laden(self, feature_type):
+        """
+        Lädt die Beschreibung des Feature Types aus dem Zwischenspeicher oder vom WFS
+        :param feature_type: FeatureType
+        :type feature_type: str
+        :return: Dictionary mit den Metadaten
+        :rtype: dict
+        """
+        if self._metadaten_cache is not None:
+            attributes = self._metadaten_cache.get(self._url, "DescribeFeatureType", feature_type)
+            if attributes is not None:
+                self.__featureDescr[(self._url, feature_type)] = attributes
+                return attributes
 
         soap = """<?xml version="1.0" encoding="ISO-8859-1"?>
             <wfs:DescribeFeatureType service="WFS" version="1.1.0" xmlns="http://www.opengis.net/wfs" 
@@ -730,29 +2607,181 @@ class WfsData(DataSource):
             length = typ.find('{http://www.w3.org/2001/XMLSchema}maxLength')
             if length is not None:
 
-                zeile['type'] += "(" + length.attrib['value'] + ")"
-            digits = typ.find('{http://www.w3.org/2001/XMLSchema}totalDigits')
-            if digits is not None:
-                zeile['type'] += "(" + digits.attrib['value'] + ")"
+                zeile['type'] += "(" + length.attrib['value'] + ")"
+            digits = typ.find('{http://www.w3.org/2001/XMLSchema}totalDigits')
+            if digits is not None:
+                zeile['type'] += "(" + digits.attrib['value'] + ")"
+
+        self.__featureDescr[(self._url, feature_type)] = attributes
+        if self._metadaten_cache is not None:
+            self._metadaten_cache.set(self._url, "DescribeFeatureType", feature_type, attributes)
+        # print(attributes)
+        return attributes
+
+    @staticmethod
+    def set_http_config(pool_groesse=10, timeout=(10, 600), versuche=3, backoff=0.5, komprimieren=False):
+        """
+        Legt die Einstellungen der HTTP-Verbindungen fest, die sich alle Instanzen mit derselben URL teilen.
+        Bestehende Verbindungen werden geschlossen und beim nächsten Request neu aufgebaut
+        :param pool_groesse: Maximale Anzahl offener Verbindungen je URL (default=10)
+        :type pool_groesse: int
+        :param timeout: Timeout in Sekunden für Verbindungsaufbau und Antwort (default=(10, 600))
+        :type timeout: tuple
+        :param versuche: Anzahl der Wiederholungen bei Verbindungsabbrüchen und den
+                HTTP-Status 502, 503 und 504 (default=3). Transaktionen werden nur wiederholt, wenn die
+                Verbindung nicht aufgebaut werden konnte, da der Server sie sonst bereits ausgeführt haben kann
+        :type versuche: int
+        :param backoff: Faktor für die exponentiell wachsende Wartezeit zwischen den Versuchen (default=0.5)
+        :type backoff: float
+        :param komprimieren: Legt fest, ob Anfragen (z.B. große Transaktionen) gzip-komprimiert gesendet werden.
+                Der Server muss Content-Encoding: gzip unterstützen (default=False). Antworten werden immer
+                komprimiert angefragt
+        :type komprimieren: bool
+        """
+        with WfsData.__sessions_lock:
+            WfsData._http_pool_groesse = pool_groesse
+            WfsData._http_timeout = timeout
+            WfsData._http_versuche = versuche
+            WfsData._http_backoff = backoff
+            WfsData._http_komprimieren = komprimieren
+            for session in WfsData.__sessions.values():
+                session.close()
+            WfsData.__sessions.clear()
+
+    @staticmethod
+    def set_metadaten_cache(cache):
+        """
+        Legt einen dauerhaften Zwischenspeicher für DescribeFeatureType und Klartexte fest,
+        der von allen Instanzen genutzt wird
+        :param cache: Zwischenspeicher (None zum Deaktivieren)
+        :type cache: MetadatenCache
+        """
+        WfsData._metadaten_cache = cache
+
+    @staticmethod
+    def set_statistik(statistik):
+        """
+        Legt fest, wo alle Instanzen die übertragenen Bytes je Anfrageart zählen
+        :param statistik: Statistik (None zum Deaktivieren)
+        :type statistik: Uebertragungsstatistik
+        """
+        WfsData._statistik = statistik
 
-        self.__featureDescr[feature_type] = attributes
-        # print(attributes)
-        return self.__featureDescr[feature_type]
+    def _metadaten_lock(self, art, name):
+        """
+        Liefert eine Sperre je Metadatum, damit gleichzeitige Exporte es nur einmal laden
+        :param art: Art der Metadaten
+        :type art: str
+        :param name: Name des FeatureTypes
+        :type name: str
+        :rtype: threading.Lock
+        """
+        with WfsData.__sessions_lock:
+            schluessel = (self._url, art, name)
+            if schluessel not in WfsData.__metadaten_locks:
+                WfsData.__metadaten_locks[schluessel] = threading.Lock()
+            return WfsData.__metadaten_locks[schluessel]
 
-    def _soap_request(self, soap):
+    def _session(self, schreibend=False):
+        """
+        Liefert die gemeinsam genutzte HTTP-Session (Keep-Alive, Verbindungspool) zur URL des WFS
+        :param schreibend: Session für Transaktionen: wiederholt nur, wenn keine Verbindung zustande kam
+        :type schreibend: bool
+        :return: HTTP-Session
+        :rtype: requests.Session
+        """
+        with WfsData.__sessions_lock:
+            schluessel = (self._url, schreibend)
+            if schluessel in WfsData.__sessions:
+                return WfsData.__sessions[schluessel]
+
+            if schreibend:
+                # nach dem Senden ist unklar, ob die Transaktion ausgeführt wurde
+                optionen = {'connect': self._http_versuche, 'read': 0, 'status': 0}
+            else:
+                optionen = {'status_forcelist': (502, 503, 504)}
+            try:
+                retry = Retry(total=self._http_versuche, backoff_factor=self._http_backoff,
+                              allowed_methods=None, raise_on_status=False, **optionen)
+            except TypeError:
+                # urllib3 < 1.26
+                retry = Retry(total=self._http_versuche, backoff_factor=self._http_backoff,
+                              method_whitelist=False, raise_on_status=False, **optionen)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._http_pool_groesse, max_retries=retry)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            WfsData.__sessions[schluessel] = session
+            return session
+
+    def _soap_request(self, soap, schreibend=False):
         """
         Führt einen SOAP-Request an dem WFS durch
         :param soap: SOAP-XML-Anfrage
+        :param schreibend: Anfrage verändert Daten (Transaktion) und wird nicht wiederholt
+        :type schreibend: bool
         :return: Antwort des WFS (XML)
         :rtype: str
         """
+        response = self._post(soap, schreibend)
+        try:
+            return response.raw.read()
+        finally:
+            response.close()
+
+    def _soap_request_stream(self, soap):
+        """
+        Führt einen SOAP-Request an dem WFS durch, ohne die Antwort komplett zu laden
+        :param soap: SOAP-XML-Anfrage
+        :return: Antwort des WFS, der XML-Datenstrom liegt in response.raw
+        :rtype: requests.Response
+        """
+        response = self._post(soap)
+        if not response.ok:
+            response.close()
+        response.raise_for_status()
+        return response
+
+    def _post(self, soap, schreibend=False):
+        """
+        Sendet eine Anfrage an den WFS (auf Wunsch gzip-komprimiert) und fragt eine komprimierte Antwort an.
+        response.raw wird durch einen Datenstrom ersetzt, der die Antwort beim Lesen entpackt und zählt
+        :param soap: SOAP-XML-Anfrage
+        :type soap: str | bytes
+        :param schreibend: Anfrage verändert Daten (Transaktion) und wird nicht wiederholt
+        :type schreibend: bool
+        :return: Antwort des WFS, der entpackte XML-Datenstrom liegt in response.raw
+        :rtype: requests.Response
+        """
+        if not isinstance(soap, bytes):
+            soap = soap.encode("ISO-8859-1", "xmlcharrefreplace")
         # headers = {'content-type': 'application/soap+xml'}
-        headers = {'content-type': 'text/xml'}
-        login = HTTPBasicAuth(self._username, self._password)
-        response = requests.post(self._url, data=soap,
-                                 headers=headers, auth=login)
-        # print(soap)
-        return response.content
+        headers = {'content-type': 'text/xml', 'Accept-Encoding': 'gzip, deflate'}
+        daten = soap
+        if self._http_komprimieren:
+            daten = gzip.compress(soap, 6)
+            headers['Content-Encoding'] = 'gzip'
+        response = self._session(schreibend).post(self._url, data=daten, headers=headers,
+                                        auth=self._login, timeout=self._http_timeout, stream=True)
+
+        statistik = self._statistik
+        if statistik is not None:
+            art = self.__anfrage_art.search(soap, soap.find(b"?>") + 2)
+            art = art.group(1).decode("ascii") if art is not None else "?"
+
+            def fertig(empfangen, empfangen_roh):
+                statistik.erfassen(art, len(daten), len(soap), empfangen, empfangen_roh)
+        else:
+            def fertig(empfangen, empfangen_roh):
+                pass
+
+        kodierung = response.headers.get('Content-Encoding', '').strip().lower()
+        if kodierung in ["", "identity", "gzip", "deflate"]:
+            response.raw = _ZaehlenderStrom(response.raw, kodierung, fertig)
+        else:
+            # unbekannte Kodierung: urllib3 entpackt, gezählt wird nur unkomprimiert
+            response.raw.decode_content = True
+        return response
 
     def do_soap_request(self, soap):
         """
@@ -766,7 +2795,7 @@ class WfsData(DataSource):
                      "Wollen Sie dieses wirklich? (JA): ")
         if test == "JA":
             print("Befehl wird ausgeführt...")
-            return self._pretty_xml(self._soap_request(soap))
+            return self._pretty_xml(self._soap_request(soap, True))
         else:
             print("Befehl wurde abgebrochen!")
             return None
@@ -785,8 +2814,22 @@ class WfsData(DataSource):
 
 class PublicWfsData (WfsData, DataTarget):
     __klartexte = {}
+    _klartexte_parallel = 8
+    _transaktion_kopf = """<?xml version="1.0" encoding="ISO-8859-1"?>
+                <wfs:Transaction service="WFS" version="1.0.0"
+                xmlns="http://xml.novasib.de"
+                xmlns:wfs="http://www.opengis.net/wfs"
+                xmlns:gml="http://www.opengis.net/gml"
+                xmlns:ogc="http://www.opengis.net/ogc"
+                xmlns:xlink="http://www.w3.org/1999/xlink"
+                xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" 
+                xsi:schemaLocation="http://xml.novasib.de 
+                http://localhost:20031/public_wfs/WFS?Request&#61;DescribeFeatureType&#38;TYPENAME&#61;Otrastanlage 
+                http://www.opengis.net/wfs http://schemas.opengis.net/wfs/1.0.0/WFS-transaction.xsd">"""
 
-    def __init__(self, url, username, password, feature_type=None, kurzfassen=True, klartexte_anhaengen=False):
+    def __init__(self, url, username, password, feature_type=None, kurzfassen=True, klartexte_anhaengen=False,
+                 streamen=False, seitengroesse=None, seiten_parallel=4, seiten_versuche=3, fid_ausgeben=False,
+                 kompakt=False, sortierung="objektId"):
         """
         Daten über den PublicWFS der SIB exportieren oder importieren
         :param url: URL zum publicWFS
@@ -802,6 +2845,27 @@ class PublicWfsData (WfsData, DataTarget):
         :param klartexte_anhaengen: Legt fest, ob Klartextfeldern jeweils der
                 komplette Klartextdatensatz angehängt werden soll
         :type klartexte_anhaengen: bool
+        :param streamen: Legt fest, ob die Objekte direkt beim Einlesen der Antwort ausgegeben werden,
+                statt sie vorher komplett in self.daten zu puffern (konstanter Speicherbedarf,
+                reset_line() lädt die Daten dafür erneut vom WFS). Bricht die Antwort ohne seitengroesse ab,
+                liefert read_line() bis zum nächsten reset_line() nur noch Fehler
+        :type streamen: bool
+        :param seitengroesse: Falls angegeben, wird der FeatureType seitenweise (maxFeatures/startIndex)
+                mit dieser Anzahl an Objekten je Anfrage geladen
+        :type seitengroesse: int
+        :param sortierung: Attribut, nach dem die Seiten sortiert werden (ogc:SortBy), damit sich die Reihenfolge
+                zwischen den Anfragen nicht ändert. Fehlt es im FeatureType, wird in einer Anfrage geladen
+                (default=objektId)
+        :type sortierung: str
+        :param seiten_parallel: Anzahl der gleichzeitig geladenen Seiten (default=4)
+        :type seiten_parallel: int
+        :param seiten_versuche: Anzahl der Versuche je Seite, bevor der Export abbricht (default=3)
+        :type seiten_versuche: int
+        :param fid_ausgeben: Legt fest, ob die fid der Objekte als Spalte 'fid' ausgegeben wird
+        :type fid_ausgeben: bool
+        :param kompakt: Legt fest, ob die gepufferten Objekte spaltenweise in einem SpaltenSpeicher
+                statt als Liste von Dictionarys abgelegt werden
+        :type kompakt: bool
         """
         super(PublicWfsData, self).__init__(
             url, feature_type, username, password)
@@ -809,8 +2873,31 @@ class PublicWfsData (WfsData, DataTarget):
         self.row_number = -1
         self.__kurzfassen = kurzfassen
         self.__klartexte_anhaengen = klartexte_anhaengen
+        self.__streamen = streamen
+        self.__geladen = False
+        self.__zeilen = None
+        self.__abgebrochen = None
+        self.__seitengroesse = seitengroesse
+        self.__seiten_parallel = seiten_parallel
+        self.__seiten_versuche = seiten_versuche
+        self.__seite = 0
+        self.__sortierung = sortierung
+        self.__fid_ausgeben = fid_ausgeben
+        self.__kompakt = kompakt
+        self.__emitter = {}
+        self.__pruefer = {}
+        self.__wert_emitter = {}
+        self.__normierer = {}
+        self.__abfrage_filter = ""
+        self.__delta_zustand = None
+        self.__delta_feld = None
+        self.__delta_geloeschte_ermitteln = True
+        self.__delta_stand = None
+        self.__delta_stand_neu = None
+        self.__delta_fids = None
         self._wfs_filter = ""
         self.__columns = {}
+        self.__konverter = None
 
     def _get_columns(self):
         """
@@ -822,7 +2909,11 @@ class PublicWfsData (WfsData, DataTarget):
             return self.__columns
 
         dft = self.describe_feature_type()
+        if self.__klartexte_anhaengen:
+            self.__klartexte_vorladen()
 
+        if self.__fid_ausgeben:
+            self.__columns['fid'] = str
         for att in dft:
             typ = str
             if 'type' in dft[att]:
@@ -842,6 +2933,122 @@ class PublicWfsData (WfsData, DataTarget):
                         self.__columns[att + "." + att2] = typ2
         return self.__columns
 
+    def _filter_schema(self):
+        """
+        Liefert die Attributbeschreibung, gegen die Filter geprüft werden
+        :rtype: dict
+        """
+        return self.describe_feature_type()
+
+    def set_delta_export(self, zustand, zeitstempel_feld='stand', geloeschte_ermitteln=True):
+        """
+        Exportiert nur Objekte, die seit dem letzten abgeschlossenen Export geändert wurden.
+        Dazu wird der Filter um GROESSERGLEICH(zeitstempel_feld, letzter Stand) ergänzt, die Zeilen
+        erhalten die Spalte 'fid'. Nach der Verarbeitung liefert get_geloeschte() die fids der
+        gelöschten Objekte, delta_abschliessen() speichert den neuen Stand
+        :param zustand: Ablage der Stände
+        :type zustand: DeltaZustand
+        :param zeitstempel_feld: Attribut mit dem Zeitpunkt der letzten Änderung (default='stand')
+        :type zeitstempel_feld: str
+        :param geloeschte_ermitteln: Legt fest, ob gelöschte Objekte über einen Abgleich der fids ermittelt werden
+        :type geloeschte_ermitteln: bool
+        """
+        dft = self.describe_feature_type()
+        if zeitstempel_feld not in dft:
+            raise Exception("Zeitstempel-Feld '" + zeitstempel_feld + "' nicht vorhanden")
+        self.__delta_zustand = zustand
+        self.__delta_feld = zeitstempel_feld
+        self.__delta_geloeschte_ermitteln = geloeschte_ermitteln
+        self.__delta_stand_neu = None
+        self.__delta_fids = None
+        if not self.__fid_ausgeben:
+            self.__fid_ausgeben = True
+            self.__columns = {}
+            self.__konverter = None
+
+    def get_geloeschte(self):
+        """
+        Ermittelt die fids der Objekte, die seit dem letzten abgeschlossenen Delta-Export gelöscht wurden
+        :return: Liste der fids
+        :rtype: list
+        """
+        if self.__delta_zustand is None:
+            raise Exception("Kein Delta-Export eingerichtet")
+        if not self.__delta_geloeschte_ermitteln:
+            return []
+        alt = self.__delta_zustand.get_fids(self._url, self._feature_type, self._wfs_filter)
+        if alt is None:
+            return []
+        aktuell = set(self.__get_delta_fids())
+        return [fid for fid in alt if fid not in aktuell]
+
+    def delta_abschliessen(self):
+        """
+        Speichert den höchsten Zeitstempel der ausgegebenen Objekte (und die aktuellen fids) als neuen Stand.
+        Erst nach erfolgreicher Übernahme der Daten aufrufen, sonst gehen Änderungen verloren
+        """
+        if self.__delta_zustand is None:
+            raise Exception("Kein Delta-Export eingerichtet")
+        alt = self.__delta_zustand.get(self._url, self._feature_type, self._wfs_filter)
+        stand = self.__delta_stand_neu
+        if stand is None and alt is not None:
+            stand = alt.get('stand')
+        fids = None
+        if self.__delta_geloeschte_ermitteln:
+            fids = self.__get_delta_fids()
+        self.__delta_zustand.set(self._url, self._feature_type, self._wfs_filter,
+                                 {'stand': stand, 'fids': fids})
+
+    def __get_delta_fids(self):
+        """
+        Lädt die fids aller aktuell vorhandenen Objekte (nur mit dem Zeitstempel-Attribut)
+        :rtype: list
+        """
+        if self.__delta_fids is None:
+            fids = []
+            for obj in self.__load_features(wfs_filter=self._wfs_filter, eigenschaften=[self.__delta_feld]):
+                fids.append(obj.attrib.get('fid'))
+            self.__delta_fids = fids
+        return self.__delta_fids
+
+    def __get_abfrage_filter(self):
+        """
+        Liefert den ogc:Filter der GetFeature-Anfrage, beim Delta-Export ergänzt um den letzten Stand
+        :rtype: str
+        """
+        if self.__delta_zustand is None:
+            return self._wfs_filter
+        alt = self.__delta_zustand.get(self._url, self._feature_type, self._wfs_filter)
+        self.__delta_stand = None
+        if alt is None or alt.get('stand') is None:
+            return self._wfs_filter
+        self.__delta_stand = alt['stand']
+
+        ausdruck = WfsFilter('GROESSERGLEICH', FilterFeld(self.__delta_feld), FilterWert(alt['stand']))
+        if self._filter_ausdruck is not None:
+            ausdruck = self._filter_ausdruck & ausdruck
+        return "<ogc:Filter>" + ausdruck.to_xml(self._filter_schema()) + "</ogc:Filter>"
+
+    def __delta_merken(self, zeile):
+        """
+        Merkt sich den höchsten Zeitstempel der ausgegebenen Objekte
+        :param zeile: Datenzeile
+        :type zeile: dict
+        """
+        wert = zeile.get(self.__delta_feld)
+        if wert is None:
+            return
+        if isinstance(wert, datetime):
+            if self.describe_feature_type()[self.__delta_feld].get('type', '').find('dateTime') >= 0:
+                wert = wert.isoformat()
+            else:
+                wert = wert.strftime("%Y-%m-%d")
+        else:
+            wert = str(wert)
+        # ISO-Zeitstempel lassen sich als Text vergleichen
+        if self.__delta_stand_neu is None or wert > self.__delta_stand_neu:
+            self.__delta_stand_neu = wert
+
     @staticmethod
     def __describe_ft2type(dft_type):
         """
@@ -870,8 +3077,33 @@ class PublicWfsData (WfsData, DataTarget):
         :return: Datenzeile des Datensatzes als Dictionary
         :rtype: dict
         """
-        if self.row_number < 0:
-            self.__parse_features()
+        if self.__streamen:
+            if self.__abgebrochen is not None:
+                raise Exception("Einlesen von " + self._feature_type + " abgebrochen (" + str(self.__abgebrochen) +
+                                "), reset_line() beginnt von vorn")
+            if self.__zeilen is None:
+                self.__zeilen = self.__parse_features()
+            try:
+                return next(self.__zeilen, None)
+            except Exception as e:
+                # beim seitenweisen Laden setzt der nächste Aufruf bei der fehlerhaften Seite wieder an,
+                # ohne Seiten würde er von vorn beginnen und bereits ausgegebene Zeilen wiederholen
+                self.__zeilen = None
+                if self.__seitengroesse is None:
+                    self.__abgebrochen = e
+                raise
+
+        if not self.__geladen:
+            if self.__kompakt and not isinstance(self.daten, SpaltenSpeicher):
+                self.daten = self.__leere_daten()
+            try:
+                for d in self.__parse_features():
+                    self.daten.append(d)
+            except Exception:
+                if self.__seitengroesse is None:
+                    self.daten = self.__leere_daten()
+                raise
+            self.__geladen = True
 
         self.row_number += 1
 
@@ -879,39 +3111,566 @@ class PublicWfsData (WfsData, DataTarget):
             return self.daten[self.row_number]
         return None
 
+    def __leere_daten(self):
+        """
+        Erzeugt den Speicher für die gepufferten Objekte
+        :rtype: list | SpaltenSpeicher
+        """
+        if not self.__kompakt:
+            return []
+        columns = self._get_columns()
+        dft = self.describe_feature_type()
+        codiert = []
+        for att in columns:
+            if att.split(".", 1)[0] in dft and 'klartext' in dft[att.split(".", 1)[0]]:
+                codiert.append(att)
+        return SpaltenSpeicher(columns, codiert)
+
     def reset_line(self):
         """
         Setzt den Iterator zurück
         """
         self.row_number = -1
+        if self.__zeilen is not None:
+            self.__zeilen.close()
+            self.__zeilen = None
+        self.__abgebrochen = None
+        if self.__streamen:
+            self.__seite = 0
+
+    def write(self, datasource, blockgroesse=100, abgelehnt=None, parallel=1, vorpruefung=False,
+              journal=None, abgelehnte_ueberspringen=False):
+        """
+        Schreibt eine Zeile zum Importieren. Die Quelle wird parallel zum Senden gelesen, jede
+        Transaktion wird abgeschickt, sobald ein Block voll ist. Schlägt eine Transaktion fehl,
+        wird der Block halbiert, bis die fehlerhaften Zeilen gefunden sind
+        :param datasource: Datenquelle des Importes
+        :type datasource: DataSource
+        :param blockgroesse: Anzahl der Zeilen je Transaktion (default=100) oder eine
+                AdaptiveBlockgroesse, die sich den Antwortzeiten des Servers anpasst
+        :type blockgroesse: int | AdaptiveBlockgroesse
+        :param abgelehnt: Ziel für abgelehnte Zeilen, wird mit (zeile, meldung) aufgerufen
+                (default: Ausgabe auf der Konsole); eine Liste erhält Tupel (zeile, meldung)
+        :type abgelehnt: callable | list
+        :param parallel: Anzahl der gleichzeitig laufenden Transaktionen (default=1). Nur nutzen, wenn
+                die Reihenfolge der Zeilen beim Import keine Rolle spielt; das Ergebnis ist nach den Zeilen sortiert
+        :type parallel: int
+        :param vorpruefung: Legt fest, ob jede Zeile vor dem Senden gegen die Beschreibung des FeatureTypes
+                und die Klartexte geprüft wird; ungültige Zeilen gehen direkt an abgelehnt
+        :type vorpruefung: bool
+        :param journal: Journal, in dem bestätigte Transaktionen festgehalten werden. Mit einem vorhandenen
+                Journal wird die Quelle zurückgesetzt und der Import nach der letzten bestätigten Zeile fortgesetzt,
+                bereits abgelehnte Zeilen werden dabei erneut gesendet
+        :type journal: ImportJournal | str
+        :param abgelehnte_ueberspringen: Legt fest, ob beim Fortsetzen die im Journal abgelehnten Zeilen
+                übersprungen statt erneut gesendet werden (default=False)
+        :type abgelehnte_ueberspringen: bool
+        :return: Ergebnis mit Feature-ID bzw. Fehlermeldung je Zeile der Quelle, als bool: Erfolgreich importiert?
+                Zeilen einer teilweise ausgeführten Transaktion, deren Stand nicht feststeht, stehen in unklar
+        :rtype: ImportErgebnis
+        """
+        if not isinstance(blockgroesse, AdaptiveBlockgroesse):
+            blockgroesse = AdaptiveBlockgroesse(blockgroesse, blockgroesse, blockgroesse)
+        abgelehnt = PublicWfsData.__abgelehnt_ziel(abgelehnt)
 
-    def write(self, datasource):
+        if journal is None:
+            ergebnis = ImportErgebnis()
+            zeilen = enumerate(_zeilen_vorauslesen(datasource, 2 * blockgroesse.maximum))
+        else:
+            if not isinstance(journal, ImportJournal):
+                journal = ImportJournal(journal)
+            ergebnis = journal.oeffnen(self._url, self._feature_type, abgelehnte_ueberspringen)
+            position, start, pruefung = journal.position(ergebnis)
+            datasource.reset_line()
+            if datasource.skip_lines(start) < start:
+                journal.schliessen()
+                raise Exception("Die Quelle ist kürzer als die bereits importierten Zeilen")
+            if position > 0:
+                print("Import wird ab Zeile " + str(position) + " fortgesetzt")
+            zeilen = journal.nur_offene(enumerate(_zeilen_vorauslesen(datasource, 2 * blockgroesse.maximum),
+                                                  start), ergebnis, pruefung)
+        lock = threading.Lock()
+
+        # die Vorprüfung meldet aus dem Haupt-Thread, die Transaktionen aus dem Pool
+        def ablehnen(nr, zeile, meldung, ziel=abgelehnt):
+            ergebnis.ablehnen(nr, meldung)
+            with lock:
+                ziel(zeile, meldung)
+
+        if vorpruefung:
+            zeilen = self.__nur_gueltige(zeilen, ablehnen)
+        try:
+            self.__write_bloecke(zeilen, blockgroesse, ablehnen, ergebnis, parallel)
+        finally:
+            ergebnis._ordnen()
+            if journal is not None:
+                journal.schliessen()
+        return ergebnis
+
+    def __write_bloecke(self, zeilen, blockgroesse, ablehnen, ergebnis, parallel):
         """
-        Schreibt eine Zeile zum Importieren
+        Teilt die Zeilen in Blöcke und schreibt sie nacheinander oder parallel
+        :param zeilen: Datenzeilen mit ihrer Nummer in der Quelle
+        :type zeilen: iterable of (int, dict)
+        :param blockgroesse: Steuerung der Blockgröße
+        :type blockgroesse: AdaptiveBlockgroesse
+        :param ablehnen: Ziel für abgelehnte Zeilen, wird mit (nr, zeile, meldung) aufgerufen
+        :type ablehnen: callable
+        :param ergebnis: Ergebnis des Importes
+        :type ergebnis: ImportErgebnis
+        :param parallel: Anzahl der gleichzeitig laufenden Transaktionen
+        :type parallel: int
+        """
+        if parallel <= 1:
+            while True:
+                i = list(islice(zeilen, blockgroesse.groesse()))
+                if len(i) == 0:
+                    break
+                self.__write_bisektion(i, blockgroesse, ablehnen, ergebnis)
+            return
+
+        with ThreadPoolExecutor(parallel) as pool:
+            laufend = set()
+            try:
+                while True:
+                    # erst weiterlesen, wenn eine Transaktion frei ist
+                    if len(laufend) >= parallel:
+                        fertig, laufend = wait(laufend, return_when=FIRST_COMPLETED)
+                        for f in fertig:
+                            f.result()
+                    i = list(islice(zeilen, blockgroesse.groesse()))
+                    if len(i) == 0:
+                        break
+                    laufend.add(pool.submit(self.__write_bisektion, i, blockgroesse, ablehnen, ergebnis))
+                for f in laufend:
+                    f.result()
+            finally:
+                for f in laufend:
+                    f.cancel()
+
+    def pruefe(self, datasource):
+        """
+        Prüft alle Zeilen einer Datenquelle gegen die Beschreibung des FeatureTypes und die Klartexte,
+        ohne etwas an den WFS zu senden
         :param datasource: Datenquelle des Importes
         :type datasource: DataSource
-        :return: Erfolgreich importiert?
-        :rtype: bool
+        :return: Liste der ungültigen Zeilen als Tupel (zeile, meldung)
+        :rtype: list
         """
-        liste = []
+        ungueltig = []
+        anzahl = 0
+        for zeile in self.__nur_gueltige(enumerate(_zeilen_vorauslesen(datasource, 1000)),
+                                         lambda n, z, m: ungueltig.append((z, m))):
+            anzahl += 1
+        print(str(anzahl) + " Zeilen gültig, " + str(len(ungueltig)) + " Zeilen ungültig")
+        return ungueltig
+
+    def sync(self, datasource, schluessel, loeschen=True, blockgroesse=100, abgelehnt=None, vorpruefung=False):
+        """
+        Gleicht den FeatureType mit einer Datenquelle ab: der aktuelle Stand wird (im Rahmen des gesetzten
+        Filters) vom WFS geladen und je Schlüssel mit einem Fingerabdruck der Zeile verglichen. Gesendet
+        werden nur Inserts für neue, Updates für geänderte und Deletes für nicht mehr vorhandene Objekte
+        :param datasource: Datenquelle mit dem Soll-Stand
+        :type datasource: DataSource
+        :param schluessel: Attribute, die ein Objekt eindeutig bestimmen, z.B. ['vnk', 'nnk', 'vst', 'bst', 'nr']
+        :type schluessel: list
+        :param loeschen: Legt fest, ob Objekte, die in der Quelle fehlen, im WFS gelöscht werden (default=True)
+        :type loeschen: bool
+        :param blockgroesse: Anzahl der Änderungen je Transaktion (default=100) oder eine AdaptiveBlockgroesse
+        :type blockgroesse: int | AdaptiveBlockgroesse
+        :param abgelehnt: Ziel für abgelehnte Zeilen wie bei write(), gelöschte Objekte als {'fid': fid}
+        :type abgelehnt: callable | list
+        :param vorpruefung: Legt fest, ob die Zeilen der Quelle vorab geprüft werden (siehe write())
+        :type vorpruefung: bool
+        :return: Ergebnis mit der Anzahl der eingefügten, geänderten und gelöschten Objekte
+        :rtype: SyncErgebnis
+        """
+        if not isinstance(blockgroesse, AdaptiveBlockgroesse):
+            blockgroesse = AdaptiveBlockgroesse(blockgroesse, blockgroesse, blockgroesse)
+        abgelehnt = PublicWfsData.__abgelehnt_ziel(abgelehnt)
+
+        dft = self.describe_feature_type()
+        for att in schluessel:
+            if att not in dft:
+                raise Exception("Schlüssel-Feld '" + att + "' nicht vorhanden")
+        # verglichen und geschrieben werden nur Attribute, die in der Quelle vorkommen und schreibbar sind
+        felder = [att for att in datasource.get_columns() if att in dft and 'read_only' not in dft[att]]
+
+        bestand = self.__sync_bestand(schluessel, felder)
+        ergebnis = SyncErgebnis()
+        eingefuegt, geaendert = [], []
+
+        def ablehnen(nr, posten, meldung):
+            art, zeile, fid = posten
+            if art == "Delete":
+                ergebnis.loeschen_ablehnen(fid, meldung)
+                abgelehnt({'fid': fid}, meldung)
+            else:
+                ergebnis.ablehnen(nr, meldung)
+                abgelehnt(zeile, meldung)
+
+        def senden(posten):
+            self.__write_bisektion(posten, blockgroesse, ablehnen, ergebnis,
+                                   functools.partial(self.__sync_transaktion, felder=felder))
+
+        zeilen = enumerate(_zeilen_vorauslesen(datasource, 2 * blockgroesse.maximum))
+        if vorpruefung:
+            zeilen = self.__nur_gueltige(zeilen, lambda nr, zeile, meldung: ablehnen(nr, ('', zeile, None), meldung))
+        posten = []
+        for nr, zeile in zeilen:
+            key = tuple(self.__normiert(att, zeile.get(att)) for att in schluessel)
+            eintrag = bestand.get(key)
+            if eintrag is None:
+                posten.append((nr, ("Insert", zeile, None)))
+                eingefuegt.append(nr)
+            elif eintrag is _FEHLT:
+                ablehnen(nr, ("", zeile, None), "Schlüssel " + str(key) + " im WFS oder in der Quelle mehrfach")
+                continue
+            else:
+                fid, fingerabdruck = eintrag
+                if self.__fingerabdruck(zeile, felder) == fingerabdruck:
+                    ergebnis.unveraendert += 1
+                else:
+                    posten.append((nr, ("Update", zeile, fid)))
+                    geaendert.append(nr)
+            # jeder Schlüssel darf in der Quelle nur einmal vorkommen
+            bestand[key] = _FEHLT
+            if len(posten) >= blockgroesse.groesse():
+                senden(posten)
+                posten = []
+
+        if loeschen:
+            for key, eintrag in bestand.items():
+                if eintrag is not _FEHLT:
+                    posten.append((eintrag[0], ("Delete", None, eintrag[0])))
+                    if len(posten) >= blockgroesse.groesse():
+                        senden(posten)
+                        posten = []
+        if len(posten) > 0:
+            senden(posten)
+
+        ergebnis.eingefuegt = sum(1 for nr in eingefuegt if nr in ergebnis.fids)
+        ergebnis.geaendert = sum(1 for nr in geaendert if nr in ergebnis.fids)
+        ergebnis.geloescht = len(ergebnis.geloeschte_fids)
+        print(ergebnis)
+        return ergebnis
+
+    def __sync_bestand(self, schluessel, felder):
+        """
+        Lädt den aktuellen Stand des FeatureTypes als Schlüssel -> (fid, Fingerabdruck).
+        Mehrfach vorkommende Schlüssel werden mit _FEHLT markiert und nicht verändert
+        :param schluessel: Schlüssel-Attribute
+        :type schluessel: list
+        :param felder: verglichene Attribute
+        :type felder: list
+        :rtype: dict
+        """
+        wfs = PublicWfsData(self._url, self._username, self._password, self._feature_type,
+                            streamen=True, fid_ausgeben=True)
+        if self._filter_ausdruck is not None:
+            wfs.set_filter(self._filter_ausdruck)
+        bestand = {}
+        doppelt = 0
         while True:
-            d = datasource.read_line()
-            if d is None:
+            zeile = wfs.read_line()
+            if zeile is None:
                 break
-            liste.append(d)
-
-        for i in self._part_list(liste, 100):
-            if self._write_step(i):
+            key = tuple(self.__normiert(att, zeile.get(att)) for att in schluessel)
+            if key in bestand:
+                bestand[key] = _FEHLT
+                doppelt += 1
                 continue
+            bestand[key] = (zeile['fid'], self.__fingerabdruck(zeile, felder))
+        print(str(len(bestand)) + " Objekte im WFS gefunden")
+        if doppelt > 0:
+            print(str(doppelt) + " Objekte mit mehrfach vorkommendem Schlüssel werden nicht abgeglichen")
+        return bestand
+
+    def __fingerabdruck(self, zeile, felder):
+        """
+        Prüfsumme über die normierten Werte einer Zeile
+        :param zeile: Datenzeile
+        :type zeile: dict
+        :param felder: verglichene Attribute
+        :type felder: list
+        :rtype: bytes
+        """
+        werte = [self.__normiert(att, zeile.get(att)) for att in felder]
+        return hashlib.sha1(json.dumps(werte).encode("utf-8")).digest()
+
+    def __normiert(self, att, wert):
+        """
+        Bringt einen Wert aus der Quelle oder dem WFS in eine vergleichbare Textform
+        :param att: Attribut
+        :type att: str
+        :param wert: Wert
+        :rtype: str
+        """
+        if wert is None or wert == "":
+            return None
+        normierer = self.__normierer.get(att)
+        if normierer is None:
+            normierer = self.__compile_normierer(att)
+        try:
+            return normierer(wert)
+        except (TypeError, ValueError, ElementTree.ParseError):
+            return str(wert)
+
+    def __compile_normierer(self, att):
+        """
+        Erstellt einmalig je Attribut die Funktion für __normiert
+        :param att: Attribut
+        :type att: str
+        :rtype: callable
+        """
+        felder = self.describe_feature_type()
+        typ = str
+        if att in felder and 'klartext' not in felder[att]:
+            typ = self.__describe_ft2type(felder[att].get('type', ''))
+
+        if typ == int:
+            def normierer(wert):
+                try:
+                    return str(int(wert))
+                except ValueError:
+                    zahl = float(str(wert).replace(",", "."))
+                    return str(int(zahl)) if zahl.is_integer() else repr(zahl)
+        elif typ == float:
+            def normierer(wert):
+                return repr(float(str(wert).replace(",", ".")))
+        elif typ == datetime:
+            nur_datum = felder[att].get('type', '').find('dateTime') < 0
+
+            def normierer(wert):
+                if not isinstance(wert, datetime):
+                    wert = _parse_datum(str(wert))
+                return wert.strftime("%Y-%m-%d") if nur_datum else wert.isoformat()
+        elif typ == Geometry:
+            def normierer(wert):
+                # nur Art und Koordinaten vergleichen, nicht Präfixe oder Formatierung;
+                # GML aus der Quelle deklariert den gml-Namensraum meist nicht selbst
+                teile = []
+                huelle = ElementTree.fromstring("<huelle xmlns:gml=\"http://www.opengis.net/gml\">" +
+                                                str(wert) + "</huelle>")
+                for element in huelle.iter():
+                    if element is huelle:
+                        continue
+                    teile.append(element.tag.split('}', 1).pop())
+                    for zahl in re.findall(r"-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?", element.text or ""):
+                        teile.append("%.3f" % float(zahl))
+                return " ".join(teile)
+        else:
+            normierer = str
+
+        self.__normierer[att] = normierer
+        return normierer
 
-            for j in self._part_list(i, 10):
-                if self._write_step(j):
+    def __sync_transaktion(self, posten, felder):
+        """
+        Sendet Inserts, Updates und Deletes in einer Transaktion
+        :param posten: Liste von (nr, (art, zeile, fid))
+        :type posten: list
+        :param felder: Attribute, die bei Updates geschrieben werden
+        :type felder: list
+        :return: ausgewertete Antwort mit einer fid je Posten
+        :rtype: TransaktionsAntwort
+        """
+        teile = [self._transaktion_kopf]
+        try:
+            for nr, (art, zeile, fid) in posten:
+                handle = " handle=\"" + PublicWfsData.__handle(nr) + "\""
+                if art == "Insert":
+                    teile.append("<wfs:Insert" + handle + ">")
+                    self.__make_xml(zeile, teile)
+                    teile.append("</wfs:Insert>")
                     continue
+                teile.append("<wfs:" + art + handle + " typeName=\"" +
+                             escape(self._feature_type, _ATTRIBUT) + "\">")
+                if art == "Update":
+                    self.__update_properties(zeile, felder, teile)
+                teile.append("<ogc:Filter><ogc:FeatureId fid=\"" + escape(fid, _ATTRIBUT) + "\"/></ogc:Filter>")
+                teile.append("</wfs:" + art + ">")
+        except Exception as e:
+            return TransaktionsAntwort("FAILED", meldung=str(e))
+        teile.append("</wfs:Transaction>")
+
+        # neue fids der Inserts in Reihenfolge, bekannte fids der Updates und Deletes
+        return PublicWfsData.__zuordnen(self.__senden(teile), [nr for nr, _ in posten],
+                                        [None if art == "Insert" else fid for _, (art, _, fid) in posten])
+
+    def __update_properties(self, zeile, felder, teile):
+        """
+        Erzeugt die wfs:Property-Elemente eines Updates für alle schreibbaren Attribute der Quelle.
+        Leere oder in der Zeile fehlende Werte werden als fehlender wfs:Value gelöscht
+        :param zeile: Datenzeile
+        :type zeile: dict
+        :param felder: schreibbare Attribute der Quelle
+        :type felder: list
+        :param teile: Liste der XML-Teile
+        :type teile: list
+        """
+        for att in felder:
+            wert = zeile.get(att)
+            teile.append("<wfs:Property><wfs:Name>" + att + "</wfs:Name>")
+            if wert is not None and wert != "":
+                emitter = self.__wert_emitter.get((att, "wfs:Value"))
+                if emitter is None:
+                    emitter = self.__compile_emitter(att, "wfs:Value")
+                emitter(wert, teile)
+            teile.append("</wfs:Property>")
+
+    def __nur_gueltige(self, zeilen, abgelehnt):
+        """
+        Gibt nur die Zeilen weiter, die die Vorprüfung bestehen
+        :param zeilen: Datenzeilen mit ihrer Nummer in der Quelle
+        :type zeilen: iterable of (int, dict)
+        :param abgelehnt: Ziel für ungültige Zeilen, wird mit (nr, zeile, meldung) aufgerufen
+        :type abgelehnt: callable
+        :return: Generator über die gültigen Zeilen mit ihrer Nummer
+        :rtype: generator
+        """
+        for nr, zeile in zeilen:
+            fehler = []
+            for att in zeile:
+                pruefer = self.__pruefer.get(att)
+                if pruefer is None:
+                    pruefer = self.__compile_pruefer(att)
+                if zeile[att] is not None:
+                    meldung = pruefer(zeile[att])
+                    if meldung is not None:
+                        fehler.append(meldung)
+            if len(fehler) > 0:
+                abgelehnt(nr, zeile, "; ".join(fehler))
+            else:
+                yield nr, zeile
+
+    def __compile_pruefer(self, att):
+        """
+        Erstellt einmalig je Attribut die Prüffunktion für die Vorprüfung
+        :param att: Attribut
+        :type att: str
+        :return: Funktion (wert), die None oder eine Fehlermeldung liefert
+        :rtype: callable
+        """
+        felder = self.describe_feature_type()
+
+        if att not in felder or 'read_only' in felder[att]:
+            # wird beim Schreiben übersprungen (siehe __compile_emitter)
+            print(("Feld nicht vorhanden: " if att not in felder else "nur lesbar: ") + att)
 
-                for k in j:
-                    if not self._write_step([k]):
-                        print(k)
-        return
+            def pruefer(wert):
+                return None
+        elif 'klartext' in felder[att]:
+            typ = felder[att]['klartext']
+            nach_abk = self.__load_klartext(typ)['nach_abk']
+
+            def pruefer(wert):
+                if str(wert) not in nach_abk:
+                    return "Klartext " + str(wert) + " nicht in " + typ + " gefunden"
+        else:
+            typ = self.__describe_ft2type(felder[att].get('type', ''))
+
+            if typ == int:
+                def umwandeln(wert):
+                    if isinstance(wert, float) and not wert.is_integer():
+                        raise ValueError(wert)
+                    int(wert)
+            elif typ == float:
+                umwandeln = float
+            elif typ == datetime:
+                def umwandeln(wert):
+                    if not isinstance(wert, datetime):
+                        _parse_datum(str(wert))
+            else:
+                umwandeln = None
+
+            def pruefer(wert):
+                if umwandeln is None or isinstance(wert, bool):
+                    return None
+                try:
+                    umwandeln(wert)
+                except (TypeError, ValueError):
+                    return att + ": '" + str(wert) + "' ist kein gültiger Wert (" + typ.__name__ + ")"
+
+        self.__pruefer[att] = pruefer
+        return pruefer
+
+    def __write_bisektion(self, zeilen, blockgroesse, abgelehnt, ergebnis, transaktion=None):
+        """
+        Schreibt Zeilen, bei einem Fehler werden beide Hälften getrennt erneut geschrieben,
+        bis die abgelehnten Zeilen einzeln feststehen
+        :param zeilen: Datenzeilen mit ihrer Nummer in der Quelle
+        :type zeilen: list of (int, dict)
+        :param blockgroesse: Steuerung der Blockgröße, erhält die Antwortzeiten
+        :type blockgroesse: AdaptiveBlockgroesse
+        :param abgelehnt: Ziel für abgelehnte Zeilen, wird mit (nr, zeile, meldung) aufgerufen
+        :type abgelehnt: callable
+        :param ergebnis: Ergebnis des Importes, erhält die vergebenen Feature-IDs
+        :type ergebnis: ImportErgebnis
+        :param transaktion: Funktion, die die Zeilen sendet und eine TransaktionsAntwort mit einer fid je
+                Zeile liefert (default: Insert)
+        :type transaktion: callable
+        """
+        start = time.time()
+        if transaktion is None:
+            antwort = self.__transaktion(zeilen)
+        else:
+            antwort = transaktion(zeilen)
+        blockgroesse.melden(len(zeilen), time.time() - start, antwort.erfolgreich)
+        if antwort.erfolgreich:
+            fids = antwort.fids
+            if len(fids) != len(zeilen):
+                # Zuordnung nicht eindeutig
+                fids = [None] * len(zeilen)
+            ergebnis.eintragen([nr for nr, _ in zeilen], fids, [zeile for _, zeile in zeilen])
+            return
+        if antwort.status == "PARTIAL":
+            anzahl = antwort.ausgefuehrt
+            if anzahl is None:
+                # unklar, was gespeichert ist, ein erneuter Versuch könnte doppelt einfügen
+                print("Transaktion nur teilweise ausgeführt, Stand von " + str(len(zeilen)) +
+                      " Zeilen unbekannt: " + str(antwort.meldung))
+                ergebnis.unklar_eintragen([nr for nr, _ in zeilen], str(antwort.meldung),
+                                          [zeile for _, zeile in zeilen])
+                return
+            # alles vor der vom Server genannten Aktion ist gespeichert, alles danach nicht
+            if anzahl > 0:
+                ergebnis.eintragen([nr for nr, _ in zeilen[:anzahl]], antwort.fids,
+                                   [zeile for _, zeile in zeilen[:anzahl]])
+            abgelehnt(zeilen[anzahl][0], zeilen[anzahl][1], antwort.meldung)
+            if anzahl + 1 < len(zeilen):
+                self.__write_bisektion(zeilen[anzahl + 1:], blockgroesse, abgelehnt, ergebnis, transaktion)
+            return
+        if len(zeilen) == 1:
+            abgelehnt(zeilen[0][0], zeilen[0][1], antwort.meldung)
+            return
+        mitte = len(zeilen) // 2
+        self.__write_bisektion(zeilen[:mitte], blockgroesse, abgelehnt, ergebnis, transaktion)
+        self.__write_bisektion(zeilen[mitte:], blockgroesse, abgelehnt, ergebnis, transaktion)
+
+    @staticmethod
+    def __abgelehnt_ziel(abgelehnt):
+        """
+        Ziel für abgelehnte Zeilen, wie es write() und sync() übergeben wird
+        :param abgelehnt: None (Ausgabe), Liste für (zeile, meldung) oder Funktion
+        :type abgelehnt: callable | list
+        :return: Funktion, die mit (zeile, meldung) aufgerufen wird
+        :rtype: callable
+        """
+        if abgelehnt is None:
+            return PublicWfsData.__abgelehnt_ausgeben
+        if isinstance(abgelehnt, list):
+            return functools.partial(PublicWfsData.__abgelehnt_anhaengen, abgelehnt)
+        return abgelehnt
+
+    @staticmethod
+    def __abgelehnt_ausgeben(zeile, meldung):
+        print(zeile)
+        print(meldung)
+
+    @staticmethod
+    def __abgelehnt_anhaengen(liste, zeile, meldung):
+        liste.append((zeile, meldung))
 
     def _write_step(self, zeilen):
         """
@@ -921,131 +3680,329 @@ class PublicWfsData (WfsData, DataTarget):
         :return: Erfolgreich importiert?
         :rtype: bool
         """
+        return self.__transaktion(list(enumerate(zeilen))).erfolgreich
 
-        req = """<?xml version="1.0" encoding="ISO-8859-1"?>
-                <wfs:Transaction service="WFS" version="1.0.0"
-                xmlns="http://xml.novasib.de"
-                xmlns:wfs="http://www.opengis.net/wfs"
-                xmlns:gml="http://www.opengis.net/gml"
-                xmlns:ogc="http://www.opengis.net/ogc"
-                xmlns:xlink="http://www.w3.org/1999/xlink"
-                xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" 
-                xsi:schemaLocation="http://xml.novasib.de 
-                http://localhost:20031/public_wfs/WFS?Request&#61;DescribeFeatureType&#38;TYPENAME&#61;Otrastanlage 
-                http://www.opengis.net/wfs http://schemas.opengis.net/wfs/1.0.0/WFS-transaction.xsd">
-                <wfs:Insert>"""
+    def __transaktion(self, zeilen):
+        """
+        Schreibt Zeilen in einer Transaktion in die Datenbank, jede Zeile als eigenes wfs:Insert
+        mit ihrer Nummer als handle, damit der Server die fehlerhafte Zeile benennen kann
+        :param zeilen: Datenzeilen mit ihrer Nummer in der Quelle
+        :type zeilen: list of (int, dict)
+        :return: ausgewertete Antwort des Servers mit einer fid je Zeile
+        :rtype: TransaktionsAntwort
+        """
+        teile = [self._transaktion_kopf]
 
-        for zeile in zeilen:
-            req += self.__make_xml(zeile)
+        try:
+            for nr, zeile in zeilen:
+                teile.append("<wfs:Insert handle=\"" + PublicWfsData.__handle(nr) + "\">")
+                self.__make_xml(zeile, teile)
+                teile.append("</wfs:Insert>")
+        except Exception as e:
+            # z.B. unbekannter Klartext, wird wie eine Ablehnung durch den Server behandelt
+            return TransaktionsAntwort("FAILED", meldung=str(e))
 
-        req += "</wfs:Insert></wfs:Transaction>"
+        teile.append("</wfs:Transaction>")
+        return PublicWfsData.__zuordnen(self.__senden(teile), [nr for nr, _ in zeilen], [None] * len(zeilen))
 
-        # print(self._pretty_xml(req))
-        antwort = self._soap_request(req)
-        # print(antwort)
-        return str(antwort).find("SUCCESS") > 0
-
-    def _part_list(self, liste, groesse):
-        """ 
-        Zerteilt Listen 
-        :param liste: Liste
-        :type liste: list
-        :param groesse: maximale Anzahl der Elemente
-        :type groesse: int
-        :rtype: list
+    @staticmethod
+    def __handle(nr):
+        """
+        handle der Aktion einer Zeile
+        :rtype: str
+        """
+        return escape("zeile-" + str(nr), _ATTRIBUT)
+
+    @staticmethod
+    def __zuordnen(antwort, nummern, bekannte_fids):
+        """
+        Ordnet den Zeilen einer Transaktion ihre fids zu. Bei PARTIAL gelten die Zeilen vor der Aktion,
+        die der Server als Locator nennt, als gespeichert, wenn die Anzahl der neuen fids dazu passt
+        :param antwort: Antwort des Servers
+        :type antwort: TransaktionsAntwort
+        :param nummern: Nummern der Zeilen in der Reihenfolge der Aktionen
+        :type nummern: list
+        :param bekannte_fids: fid je Zeile, None bei Inserts (erhalten die neuen fids in Reihenfolge)
+        :type bekannte_fids: list
+        :return: Antwort mit einer fid je gespeicherter Zeile
+        :rtype: TransaktionsAntwort
+        """
+        anzahl = len(nummern)
+        if antwort.status == "PARTIAL":
+            handles = ["zeile-" + str(nr) for nr in nummern]
+            if antwort.locator not in handles:
+                return antwort
+            anzahl = handles.index(antwort.locator)
+        elif not antwort.erfolgreich:
+            return antwort
+        einfuegen = sum(1 for fid in bekannte_fids[:anzahl] if fid is None)
+        if antwort.status == "PARTIAL":
+            if len(antwort.fids) != einfuegen:
+                return antwort
+            antwort.ausgefuehrt = anzahl
+        neu = iter(antwort.fids if len(antwort.fids) == einfuegen else [None] * einfuegen)
+        antwort.fids = [next(neu) if fid is None else fid for fid in bekannte_fids[:anzahl]]
+        return antwort
+
+    def __senden(self, teile):
         """
-        ret = []
-        
-        small = []
-        for zeile in liste:
-            small.append(zeile)
-            if len(small) >= groesse:
-                ret.append(small)
-                small = []
-        if len(small) > 0:
-            ret.append(small)
-            small = []
-        
-        return ret
+        Sendet eine Transaktion an den WFS
+        :param teile: Liste der XML-Teile
+        :type teile: list
+        :return: ausgewertete Antwort des Servers
+        :rtype: TransaktionsAntwort
+        """
+        # Zeichen außerhalb von ISO-8859-1 als Zeichenreferenz
+        req = "".join(teile).encode("ISO-8859-1", "xmlcharrefreplace")
 
+        # print(self._pretty_xml(req))
+        antwort = self._soap_request(req, True)
+        # print(antwort)
+        return TransaktionsAntwort.parse(antwort)
 
-    def __make_xml(self, zeile):
+    def __make_xml(self, zeile, teile):
         """
-        Erzeugt XML aus einer Datenzeile
+        Erzeugt XML aus einer Datenzeile und hängt es an die Liste an
         :param zeile: Datenzeile
         :type zeile: dict
-        :return: XML-String
-        :rtype: str
+        :param teile: Liste der XML-Teile
+        :type teile: list
         """
+        teile.append("<" + self._feature_type + ">")
+        for att in zeile:
+            emitter = self.__emitter.get(att)
+            if emitter is None:
+                emitter = self.__compile_emitter(att)
+            # leere Werte werden wie fehlende nicht übertragen
+            if zeile[att] is not None and zeile[att] != "":
+                emitter(zeile[att], teile)
+        teile.append("</" + self._feature_type + ">")
+
+    def __compile_emitter(self, att, element=None):
+        """
+        Erstellt einmalig je Attribut die Funktion, die einen Wert als XML ausgibt
+        (Klartexte als xlink:href, nur lesbare und unbekannte Attribute werden übersprungen)
+        :param att: Attribut
+        :type att: str
+        :param element: Name des XML-Elementes (default: Attribut, für Updates wfs:Value)
+        :type element: str
+        :return: Funktion (wert, teile)
+        :rtype: callable
+        """
+        tag = att if element is None else element
         felder = self.describe_feature_type()
 
-        xmlt = "<" + self._feature_type + ">"
-        for att in zeile:
-            if att not in felder:
-                print("Feld nicht vorhanden: " + att)
-            elif 'read_only' in felder[att]:
-                print("nur lesbar: " + att)
-            elif 'klartext' in felder[att]:
-                kt = self.__get_klartext_href(
-                    felder[att]['klartext'], zeile[att])
-                xmlt += "<" + att + " xlink:href=\"" + kt + "\" typeName=\"" + felder[att]['klartext'] +\
-                        "\" luk=\"" + str(zeile[att]) + "\" />"
+        if att not in felder:
+            print("Feld nicht vorhanden: " + att)
+            emitter = _nichts_ausgeben
+        elif 'read_only' in felder[att]:
+            print("nur lesbar: " + att)
+            emitter = _nichts_ausgeben
+        elif 'klartext' in felder[att]:
+            typ = felder[att]['klartext']
+            nach_abk = self.__load_klartext(typ)['nach_abk']
+            anfang = "<" + tag + " xlink:href=\""
+            mitte = "\" typeName=\"" + escape(typ, _ATTRIBUT) + "\" luk=\""
+
+            def emitter(wert, teile):
+                luk = str(wert)
+                if luk not in nach_abk:
+                    raise Exception("Klartext " + luk + " nicht in " + typ + " gefunden!")
+                teile.append(anfang + escape(nach_abk[luk]['href'], _ATTRIBUT) + mitte +
+                             escape(luk, _ATTRIBUT) + "\" />")
+        else:
+            typ = self.__describe_ft2type(felder[att].get('type', ''))
+            anfang = "<" + tag + ">"
+            ende = "</" + tag + ">"
+            if typ == Geometry:
+                # GML wird unverändert übernommen
+                def emitter(wert, teile):
+                    teile.append(anfang + str(wert) + ende)
+            elif typ == datetime:
+                datum = felder[att].get('type', '').find('dateTime') < 0
+
+                def emitter(wert, teile):
+                    if isinstance(wert, datetime):
+                        wert = wert.strftime("%Y-%m-%d") if datum else wert.isoformat()
+                    teile.append(anfang + escape(str(wert)) + ende)
             else:
-                xmlt += "<" + att + ">" + str(zeile[att]) + "</" + att + ">"
+                def emitter(wert, teile):
+                    teile.append(anfang + escape(str(wert)) + ende)
 
-        xmlt += "</" + self._feature_type + ">"
-        return xmlt
+        if element is None:
+            self.__emitter[att] = emitter
+        else:
+            self.__wert_emitter[(att, element)] = emitter
+        return emitter
 
     def __parse_features(self):
         """
-        Formt WFS-Antworten in eine Liste von Dictionarys um
-        :return: Liste von Dictionarys mit den Attributen
-        :rtype: list
+        Formt WFS-Antworten in Dictionarys um, sobald das jeweilige Objekt eingelesen wurde
+        :return: Generator über Dictionarys mit den Attributen
+        :rtype: generator
         """
-        # col = self._get_columns()
-        for obj in self.__load_features(wfs_filter=self._wfs_filter):
-            d = {}
-            for i in obj.getchildren():
-                att = i.tag.split('}', 1)[1]
-                if i.text is not None:
-                    d[att] = self.__transform_type(att, i.text)
-                    continue
-                if len(i.getchildren()) > 0:
-                    d[att] = xml.etree.ElementTree.tostring(
-                        i.getchildren()[0]).decode("utf-8")
-                if 'luk' in i.attrib:
-                    d[att] = self.__transform_type(att, i.attrib['luk'])
-                if self.__kurzfassen:
-                    continue
-                for a in i.attrib:
-                    att2 = att + "." + a.split('}', 1).pop()
-                    d[att2] = self.__transform_type(att2, i.attrib[a])
-                if not self.__klartexte_anhaengen:
-                    continue
-                if 'typeName' in i.attrib and \
-                        '{http://www.w3.org/1999/xlink}href' in i.attrib and \
-                        i.attrib['typeName'] not in ['AsbAbschn', 'Projekt']:
-                    kt = self.__get_klartext(
-                        i.attrib['typeName'], i.attrib['{http://www.w3.org/1999/xlink}href'])
-                    for kt_att in kt:
-                        d[att + "." + kt_att] = self.__transform_type(
-                            att + "." + kt_att, kt[kt_att])
-            # print(d)
-            self.daten.append(d)
-
-    def __transform_type(self, attribut, wert):
-        col = self._get_columns()
-
-        if attribut in col:
-            if col[attribut] == datetime and len(wert) > 10:
-                return datetime.strptime(wert, "%Y-%m-%dT%H:%M:%S")
-            elif col[attribut] == datetime:
-                return datetime.strptime(wert, "%Y-%m-%d")
+        # Spalten und ggf. alle Klartexte vor dem ersten Objekt laden
+        self._get_columns()
+        self.__abfrage_filter = self.__get_abfrage_filter()
+
+        if self.__seitengroesse is not None and self.__sortierung not in self.describe_feature_type():
+            print("Seitenweises Laden ohne Sortierung nach " + str(self.__sortierung) +
+                  " nicht sicher, " + self._feature_type + " wird in einer Anfrage geladen")
+            self.__seitengroesse = None
+
+        if self.__seitengroesse is not None:
+            zeilen = self.__parse_seiten()
+        else:
+            zeilen = (self.__parse_feature(obj) for obj in self.__load_features(wfs_filter=self.__abfrage_filter))
+
+        for d in zeilen:
+            if self.__delta_zustand is not None:
+                self.__delta_merken(d)
+            yield d
+
+    def __klartexte_vorladen(self):
+        """
+        Ermittelt alle im FeatureType referenzierten Klartexte und lädt deren Beschreibung
+        und Inhalt parallel, bevor die Objekte eingelesen werden
+        """
+        dft = self.describe_feature_type()
+        typen = []
+        for att in dft:
+            if 'klartext' in dft[att] and dft[att]['klartext'] not in typen:
+                typen.append(dft[att]['klartext'])
+        if len(typen) == 0:
+            return
+
+        def laden(klartext):
+            self.describe_feature_type(klartext)
+            # mit kurzfassen werden nur die Spalten der Klartexte gebraucht, nicht ihr Inhalt
+            if not self.__kurzfassen and klartext not in ['AsbAbschn', 'Projekt']:
+                self.__load_klartext(klartext)
+
+        with ThreadPoolExecutor(min(len(typen), self._klartexte_parallel)) as pool:
+            # list() gibt Fehler der einzelnen Anfragen weiter
+            list(pool.map(laden, typen))
+
+    def __parse_seiten(self):
+        """
+        Lädt die Seiten des FeatureTypes parallel und gibt deren Objekte in Seitenreihenfolge zurück.
+        Bricht eine Seite ab, beginnt ein erneuter Aufruf bei dieser Seite
+        :return: Generator über Dictionarys mit den Attributen
+        :rtype: generator
+        """
+        with ThreadPoolExecutor(self.__seiten_parallel) as pool:
+            laufend = deque()
+            naechste = self.__seite
+            erste_fid = None
             try:
-                return col[attribut](wert)
-            except TypeError:
-                pass
-        return wert
+                while True:
+                    while len(laufend) < self.__seiten_parallel:
+                        laufend.append(pool.submit(self.__lade_seite, naechste))
+                        naechste += 1
+                    zeilen, fid = laufend.popleft().result()
+
+                    if erste_fid is not None and fid == erste_fid:
+                        raise Exception("WFS ignoriert startIndex, seitenweises Laden nicht möglich")
+                    if erste_fid is None:
+                        erste_fid = fid
+
+                    self.__seite += 1
+                    for d in zeilen:
+                        yield d
+                    if len(zeilen) < self.__seitengroesse:
+                        return
+            finally:
+                for f in laufend:
+                    f.cancel()
+
+    def __lade_seite(self, seite):
+        """
+        Lädt eine Seite des FeatureTypes, bei Fehlern wird nur diese Seite erneut angefragt
+        :param seite: Nummer der Seite (ab 0)
+        :type seite: int
+        :return: Dictionarys der Seite und fid des ersten Objektes
+        :rtype: tuple
+        """
+        fehler = None
+        for versuch in range(self.__seiten_versuche):
+            try:
+                zeilen = []
+                fid = None
+                for obj in self.__load_features(wfs_filter=self.__abfrage_filter, max_features=self.__seitengroesse,
+                                                start_index=seite * self.__seitengroesse,
+                                                sortierung=self.__sortierung):
+                    if fid is None:
+                        fid = obj.attrib.get('fid')
+                    zeilen.append(self.__parse_feature(obj))
+                if len(zeilen) > self.__seitengroesse:
+                    raise Exception("WFS ignoriert maxFeatures, seitenweises Laden nicht möglich")
+                return zeilen, fid
+            except (requests.RequestException, ElementTree.ParseError) as e:
+                fehler = e
+                print("Seite " + str(seite) + " fehlgeschlagen (Versuch " + str(versuch + 1) + "): " + str(e))
+        raise Exception("Seite " + str(seite) + " konnte nicht geladen werden: " + str(fehler))
+
+    def __parse_feature(self, obj):
+        """
+        Formt ein XML-Objekt der WFS-Antwort in ein Dictionary um
+        :param obj: XML-Objekt
+        :type obj: xml.etree.ElementTree.Element
+        :return: Dictionary mit den Attributen
+        :rtype: dict
+        """
+        konverter = self.__get_konverter()
+        d = {}
+        if self.__fid_ausgeben:
+            d['fid'] = obj.attrib.get('fid')
+        for i in obj:
+            att = i.tag.split('}', 1)[1]
+            if i.text is not None:
+                d[att] = konverter.get(att, _unveraendert)(i.text)
+                continue
+            if len(i) > 0:
+                d[att] = xml.etree.ElementTree.tostring(
+                    i[0]).decode("utf-8")
+            if 'luk' in i.attrib:
+                d[att] = konverter.get(att, _unveraendert)(i.attrib['luk'])
+            if self.__kurzfassen:
+                continue
+            for a in i.attrib:
+                att2 = att + "." + a.split('}', 1).pop()
+                d[att2] = konverter.get(att2, _unveraendert)(i.attrib[a])
+            if not self.__klartexte_anhaengen:
+                continue
+            if 'typeName' in i.attrib and \
+                    '{http://www.w3.org/1999/xlink}href' in i.attrib and \
+                    i.attrib['typeName'] not in ['AsbAbschn', 'Projekt']:
+                kt = self.__get_klartext(
+                    i.attrib['typeName'], i.attrib['{http://www.w3.org/1999/xlink}href'])
+                for kt_att in kt:
+                    att2 = att + "." + kt_att
+                    if kt[kt_att] is None:
+                        d[att2] = None
+                    else:
+                        d[att2] = konverter.get(att2, _unveraendert)(kt[kt_att])
+        # print(d)
+        return d
+
+    def __get_konverter(self):
+        """
+        Erstellt einmalig je FeatureType die Umwandlungsfunktionen der Attribute.
+        Attribute ohne Eintrag (Texte, Geometrien) werden unverändert übernommen
+        :return: Dictionary Attribut -> Umwandlungsfunktion
+        :rtype: dict
+        """
+        if self.__konverter is not None:
+            return self.__konverter
+
+        konverter = {}
+        for att, typ in self._get_columns().items():
+            if typ == datetime:
+                konverter[att] = _parse_datum
+            elif typ in [int, float]:
+                konverter[att] = typ
+        self.__konverter = konverter
+        return konverter
 
     def __get_klartext(self, feature_type, href):
         """
@@ -1082,30 +4039,64 @@ class PublicWfsData (WfsData, DataTarget):
             raise Exception("Klartext " + klartext +
                             " nicht in " + feature_type + " gefunden!")
 
-    def __load_features(self, feature_type=None, wfs_filter=""):
+    def __load_features(self, feature_type=None, wfs_filter="", max_features=None, start_index=None,
+                        eigenschaften=None, sortierung=None):
         """
-        Stellt eine GetFeature-Anfrage an den publicWFS und fibt alle XML-Einträge zurück
+        Stellt eine GetFeature-Anfrage an den publicWFS und gibt die XML-Einträge zurück.
+        Die Antwort wird schrittweise eingelesen, jeder Eintrag wird nach der Rückgabe verworfen
         :param feature_type: FeatureType, das geladen werden soll (default: FeatureType der Klasse)
         :type feature_type: str
-        :return: Liste der XML-Einträge
-        :rtype: list
+        :param wfs_filter: ogc:Filter der Abfrage
+        :type wfs_filter: str
+        :param max_features: Maximale Anzahl der Objekte (maxFeatures)
+        :type max_features: int
+        :param start_index: Index des ersten Objektes (startIndex)
+        :type start_index: int
+        :param eigenschaften: Falls angegeben, werden nur diese Attribute angefragt
+        :type eigenschaften: list
+        :param sortierung: Falls angegeben, wird aufsteigend nach diesem Attribut sortiert (ogc:SortBy)
+        :type sortierung: str
+        :return: Generator über die XML-Einträge
+        :rtype: generator
         """
         if feature_type is None:
             feature_type = self._feature_type
+        seite = ""
+        if max_features is not None:
+            seite += ' maxFeatures="' + str(max_features) + '"'
+        if start_index is not None:
+            seite += ' startIndex="' + str(start_index) + '"'
+        attribute = ""
+        for e in eigenschaften or []:
+            attribute += "<ogc:PropertyName>" + e + "</ogc:PropertyName>"
+        if sortierung is not None:
+            wfs_filter += "<ogc:SortBy><ogc:SortProperty><ogc:PropertyName>" + sortierung + \
+                          "</ogc:PropertyName><ogc:SortOrder>ASC</ogc:SortOrder></ogc:SortProperty></ogc:SortBy>"
         body = """<?xml version="1.0" encoding="ISO-8859-1"?>
-            <wfs:GetFeature service="WFS" version="1.0.0" 
+            <wfs:GetFeature service="WFS" version="1.0.0\"""" + seite + """
                 xmlns="http://www.opengis.net/wfs" xmlns:wfs="http://www.opengis.net/wfs" 
                 xmlns:gml="http://www.opengis.net/gml" 
                 xmlns:ogc="http://www.opengis.net/ogc" 
                 xmlns:xlink="http://www.w3.org/1999/xlink" 
                 xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" 
                 xsi:schemaLocation="http://www.opengis.net/wfs http://schemas.opengis.net/wfs/1.0.0/WFS-basic.xsd">
-                <wfs:Query typeName='""" + feature_type + """'>""" + wfs_filter + """</wfs:Query>
+                <wfs:Query typeName='""" + feature_type + """'>""" + attribute + wfs_filter + """</wfs:Query>
             </wfs:GetFeature>"""
         # print(body)
-        response = self._soap_request(body)
-        tree = ElementTree.fromstring(response)
-        return tree.findall('{http://xml.novasib.de}Objekt/{http://xml.novasib.de}' + feature_type)
+        response = self._soap_request_stream(body)
+        try:
+            tag = '{http://xml.novasib.de}' + feature_type
+            root = None
+            for event, elem in ElementTree.iterparse(response.raw, events=('start', 'end')):
+                if root is None:
+                    root = elem
+                elif event == 'end' and elem.tag == '{http://xml.novasib.de}Objekt':
+                    for obj in elem.findall(tag):
+                        yield obj
+                    # bereits verarbeitete Objekte freigeben
+                    root.clear()
+        finally:
+            response.close()
 
     def __load_klartext(self, klartext):
         """
@@ -1114,17 +4105,40 @@ class PublicWfsData (WfsData, DataTarget):
         :type klartext: str
         :return: dict
         """
-        if klartext in self.__klartexte:
-            return self.__klartexte[klartext]
+        if (self._url, klartext) in self.__klartexte:
+            return self.__klartexte[(self._url, klartext)]
+
+        with self._metadaten_lock("Klartext", klartext):
+            if (self._url, klartext) in self.__klartexte:
+                return self.__klartexte[(self._url, klartext)]
+            return self.__load_klartext_laden(klartext)
+
+    def __load_klartext_laden(self, klartext):
+        """
+        Lädt einen Klartext aus dem Zwischenspeicher oder vom WFS und erstellt die Verzeichnisse
+        :param klartext: Klartext der SIB (It...)
+        :type klartext: str
+        :return: dict
+        """
+        eintraege = None
+        if self._metadaten_cache is not None:
+            eintraege = self._metadaten_cache.get(self._url, "Klartext", klartext)
+
+        if eintraege is None:
+            eintraege = []
+            for obj in self.__load_features(klartext):
+                k = {'luk': str(obj.attrib['luk']),
+                     'href': '#' + obj.attrib['fid']}
+                for a in obj:
+                    att = a.tag.split('}', 1).pop()
+                    k[att] = a.text
+                eintraege.append(k)
+            if self._metadaten_cache is not None:
+                self._metadaten_cache.set(self._url, "Klartext", klartext, eintraege)
 
         kt = {'nach_abk': {},
               'nach_href': {}}
-        for obj in self.__load_features(klartext):
-            k = {'luk': str(obj.attrib['luk']),
-                 'href': '#' + obj.attrib['fid']}
-            for a in obj.getchildren():
-                att = a.tag.split('}', 1).pop()
-                k[att] = a.text
+        for k in eintraege:
             kt['nach_abk'][k['luk']] = k
             kt['nach_href'][k['href']] = k
 
@@ -1134,5 +4148,123 @@ class PublicWfsData (WfsData, DataTarget):
             print(str(len(kt['nach_abk'])) +
                   " Klartexte zu " + klartext + " geladen")
 
-        self.__klartexte[klartext] = kt
+        self.__klartexte[(self._url, klartext)] = kt
         return kt
+
+
+class _ZaehlendeQuelle (DataSource):
+    """
+    Reicht eine Datenquelle durch und zählt die gelesenen Zeilen
+    """
+
+    def __init__(self, quelle):
+        """
+        :param quelle: Datenquelle
+        :type quelle: DataSource
+        """
+        self.__quelle = quelle
+        self.anzahl = 0
+
+    def _read_line(self):
+        zeile = self.__quelle.read_line()
+        if zeile is not None:
+            self.anzahl += 1
+        return zeile
+
+    def reset_line(self):
+        self.__quelle.reset_line()
+        self.anzahl = 0
+
+    def _get_columns(self):
+        return self.__quelle.get_columns()
+
+
+class MehrfachExport (object):
+    """
+    Exportiert mehrere FeatureTypes eines publicWFS gleichzeitig in jeweils eigene Datenziele.
+    Beschreibungen und Klartexte werden zwischen den Exporten geteilt
+    """
+
+    def __init__(self, url, username, password, max_parallel=4, **wfs_optionen):
+        """
+        :param url: URL zum publicWFS
+        :type url: str
+        :param username: Benutzername des WFS
+        :type username: str
+        :param password: Passwort des WFS
+        :type password: str
+        :param max_parallel: Maximale Anzahl gleichzeitiger Exporte gegen den Server (default=4)
+        :type max_parallel: int
+        :param wfs_optionen: Weitere Parameter für PublicWfsData (default: streamen=True)
+        """
+        self.__url = url
+        self.__username = username
+        self.__password = password
+        self.__max_parallel = max_parallel
+        wfs_optionen.setdefault('streamen', True)
+        self.__wfs_optionen = wfs_optionen
+        self.__auftraege = []
+
+    def add(self, feature_type, ziel_factory, wfs_filter=None):
+        """
+        Fügt einen zu exportierenden FeatureType hinzu
+        :param feature_type: Name des FeatureTypes
+        :type feature_type: str
+        :param ziel_factory: Funktion, die zum FeatureType das Datenziel erzeugt, z.B.
+                lambda ft: CsvData(ft + ".csv")
+        :type ziel_factory: callable
+        :param wfs_filter: Filter für diesen FeatureType
+        :type wfs_filter: str | WfsFilter
+        """
+        self.__auftraege.append((feature_type, ziel_factory, wfs_filter))
+
+    def run(self):
+        """
+        Führt alle Exporte aus. Fehler einzelner Exporte brechen die übrigen nicht ab
+        :return: Bericht je FeatureType: {'feature_type', 'zeilen', 'sekunden', 'fehler'}
+        :rtype: list
+        """
+        anzahl = len(self.__auftraege)
+        bericht = [None] * anzahl
+        fertig = [0]
+        lock = threading.Lock()
+
+        def export(nr):
+            feature_type, ziel_factory, wfs_filter = self.__auftraege[nr]
+            start = time.time()
+            quelle = None
+            fehler = None
+            try:
+                wfs = PublicWfsData(self.__url, self.__username, self.__password, feature_type,
+                                    **self.__wfs_optionen)
+                # ein unbekannter FeatureType wird ohne Attribute beschrieben und ergäbe ein leeres Datenziel
+                if len(wfs.describe_feature_type()) == 0:
+                    raise Exception("FeatureType " + feature_type + " nicht gefunden")
+                if wfs_filter is not None:
+                    wfs.set_filter(wfs_filter)
+                quelle = _ZaehlendeQuelle(wfs)
+                if ziel_factory(feature_type).write(quelle) is False:
+                    raise Exception("Datenziel hat den Export nicht übernommen")
+            except Exception as e:
+                fehler = e.__class__.__name__ + ": " + str(e)
+            eintrag = {'feature_type': feature_type,
+                       'zeilen': quelle.anzahl if quelle is not None else 0,
+                       'sekunden': time.time() - start,
+                       'fehler': fehler}
+            bericht[nr] = eintrag
+            with lock:
+                fertig[0] += 1
+                print("[" + str(fertig[0]) + "/" + str(anzahl) + "] " + feature_type + ": " +
+                      str(eintrag['zeilen']) + " Zeilen in " + str(round(eintrag['sekunden'], 1)) + " s" +
+                      ("" if fehler is None else " FEHLER " + fehler))
+
+        start = time.time()
+        with ThreadPoolExecutor(max(1, self.__max_parallel)) as pool:
+            list(pool.map(export, range(anzahl)))
+
+        fehlerhaft = [b for b in bericht if b['fehler'] is not None]
+        print(str(anzahl - len(fehlerhaft)) + " von " + str(anzahl) + " FeatureTypes exportiert, " +
+              str(sum(b['zeilen'] for b in bericht)) + " Zeilen in " + str(round(time.time() - start, 1)) + " s")
+        for b in fehlerhaft:
+            print("  " + b['feature_type'] + ": " + b['fehler'])
+        return bericht
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""Durchsatz- und Speichermessung von PublicWfsData gegen den MockWfs (python -m sibtools.benchmark)"""
+import argparse
+import multiprocessing
+import statistics
+import time
+import tracemalloc
+
+from sibtools import DataSource, PublicWfsData, AdaptiveBlockgroesse, Uebertragungsstatistik, WfsData
+from sibtools.mockwfs import MockWfs, _prozess_starten
+
+
+class _SynthetischeQuelle (DataSource):
+    """
+    Datenquelle mit gleichartigen Zeilen für den Import, die erst beim Lesen erzeugt werden
+    """
+
+    def __init__(self, anzahl):
+        self.__anzahl = anzahl
+        self.__zeile = 0
+
+    def _read_line(self):
+        if self.__zeile >= self.__anzahl:
+            return None
+        i = self.__zeile
+        self.__zeile += 1
+        return {'nr': i + 1,
+                'name': "Neuer Baum " + str(i + 1),
+                'stammdu': 0.2 + (i % 50) / 100.0,
+                'gattung': MockWfs.gattungen[i % len(MockWfs.gattungen)][0]}
+
+    def reset_line(self):
+        self.__zeile = 0
+
+    def _get_columns(self):
+        return {'nr': int, 'name': str, 'stammdu': float, 'gattung': str}
+
+
+class Benchmark (object):
+    """
+    Misst Zeilen je Sekunde und den höchsten Speicherbedarf (tracemalloc) von Export und Import.
+    Der MockWfs läuft in einem eigenen Prozess, damit nur der Speicher des Clients gemessen wird
+    """
+
+    # Name -> Optionen für PublicWfsData
+    exporte = [("export", {}),
+               ("export kompakt", {'kompakt': True}),
+               ("export streamen", {'streamen': True}),
+               ("export seiten", {'seitengroesse': 2000, 'seiten_parallel': 4})]
+    # Name -> Optionen für PublicWfsData.write
+    importe = [("import", {'blockgroesse': 100}),
+               ("import adaptiv", {'blockgroesse': None}),
+               ("import parallel", {'blockgroesse': 100, 'parallel': 4})]
+
+    def __init__(self, anzahl=10000, wiederholungen=3, **mock_optionen):
+        """
+        :param anzahl: Anzahl der Objekte je Lauf (default=10000)
+        :type anzahl: int
+        :param wiederholungen: Anzahl der Läufe je Szenario, ausgegeben wird der Median (default=3)
+        :type wiederholungen: int
+        :param mock_optionen: weitere Parameter für MockWfs (latenz, latenz_je_objekt, fehlerquote, ...)
+        """
+        self.anzahl = anzahl
+        self.wiederholungen = wiederholungen
+        self.__mock_optionen = mock_optionen
+        self.__mock_optionen['anzahl'] = anzahl
+        self.__prozess = None
+        self.__verbindung = None
+
+    def starten(self):
+        """
+        Startet den MockWfs-Prozess
+        :return: URL des MockWfs
+        :rtype: str
+        """
+        verbindung, kind = multiprocessing.Pipe()
+        self.__prozess = multiprocessing.Process(target=_prozess_starten, args=(self.__mock_optionen, kind))
+        self.__prozess.daemon = True
+        self.__prozess.start()
+        self.__verbindung = verbindung
+        return verbindung.recv()
+
+    def beenden(self):
+        """
+        Beendet den MockWfs-Prozess
+        """
+        if self.__prozess is not None:
+            self.__verbindung.send(True)
+            self.__prozess.join(10)
+            self.__prozess = None
+
+    def export_messen(self, url, optionen):
+        """
+        Liest alle Objekte aus dem WFS
+        :param url: URL des MockWfs
+        :type url: str
+        :param optionen: Parameter für PublicWfsData
+        :type optionen: dict
+        :return: Anzahl der Zeilen
+        :rtype: int
+        """
+        wfs = PublicWfsData(url, "benchmark", "benchmark", MockWfs.feature_type, **optionen)
+        anzahl = 0
+        while wfs.read_line() is not None:
+            anzahl += 1
+        return anzahl
+
+    def import_messen(self, url, optionen):
+        """
+        Schreibt anzahl synthetische Objekte in den WFS
+        :param url: URL des MockWfs
+        :type url: str
+        :param optionen: Parameter für PublicWfsData.write
+        :type optionen: dict
+        :return: Anzahl der importierten Zeilen
+        :rtype: int
+        """
+        optionen = dict(optionen)
+        if optionen.get('blockgroesse') is None:
+            optionen['blockgroesse'] = AdaptiveBlockgroesse()
+        wfs = PublicWfsData(url, "benchmark", "benchmark", MockWfs.feature_type)
+        ergebnis = wfs.write(_SynthetischeQuelle(self.anzahl), abgelehnt=[], **optionen)
+        return len(ergebnis.fids)
+
+    def __messen(self, funktion, url, optionen):
+        """
+        Führt eine Messung aus
+        :return: Zeilen, Sekunden, höchster Speicherbedarf in Bytes
+        :rtype: tuple
+        """
+        tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            zeilen = funktion(url, optionen)
+            dauer = time.perf_counter() - start
+            spitze = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return zeilen, dauer, spitze
+
+    def ausfuehren(self, szenarien=None):
+        """
+        Führt alle (oder die angegebenen) Szenarien aus und gibt eine Tabelle aus
+        :param szenarien: Namen der Szenarien (default: alle)
+        :type szenarien: list
+        :return: je Szenario {'name', 'zeilen', 'sekunden', 'zeilen_je_sekunde', 'speicher_mb'}
+        :rtype: list
+        """
+        url = self.starten()
+        ergebnisse = []
+        try:
+            # Metadaten und Klartexte einmal laden, damit sie nicht in die erste Messung eingehen
+            PublicWfsData(url, "benchmark", "benchmark", MockWfs.feature_type, klartexte_anhaengen=True).get_columns()
+
+            for name, optionen, funktion in [e + (self.export_messen,) for e in self.exporte] + \
+                                            [i + (self.import_messen,) for i in self.importe]:
+                if szenarien is not None and name not in szenarien:
+                    continue
+                messungen = [self.__messen(funktion, url, optionen) for _ in range(self.wiederholungen)]
+                sekunden = statistics.median(m[1] for m in messungen)
+                ergebnis = {'name': name,
+                            'zeilen': messungen[0][0],
+                            'sekunden': sekunden,
+                            'zeilen_je_sekunde': messungen[0][0] / sekunden if sekunden > 0 else 0,
+                            'speicher_mb': max(m[2] for m in messungen) / 1024.0 / 1024.0}
+                ergebnisse.append(ergebnis)
+                print("%-20s %8d Zeilen %8.2f s %10.0f Zeilen/s %8.1f MB" % (
+                    name, ergebnis['zeilen'], ergebnis['sekunden'], ergebnis['zeilen_je_sekunde'],
+                    ergebnis['speicher_mb']))
+        finally:
+            self.beenden()
+        return ergebnisse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Durchsatzmessung von PublicWfsData gegen einen lokalen MockWfs")
+    parser.add_argument("--anzahl", type=int, default=10000, help="Objekte je Lauf")
+    parser.add_argument("--wiederholungen", type=int, default=3, help="Läufe je Szenario (Median)")
+    parser.add_argument("--latenz", type=float, default=0.0, help="Wartezeit je Anfrage in Sekunden")
+    parser.add_argument("--latenz-je-objekt", type=float, default=0.0, help="Wartezeit je Objekt in Sekunden")
+    parser.add_argument("--fehlerquote", type=float, default=0.0, help="Anteil fehlerhafter Antworten")
+    parser.add_argument("--komprimieren", action="store_true", help="Anfragen und Antworten gzip-komprimieren")
+    parser.add_argument("szenarien", nargs="*", help="nur diese Szenarien ausführen")
+    args = parser.parse_args()
+    statistik = Uebertragungsstatistik()
+    WfsData.set_statistik(statistik)
+    WfsData.set_http_config(komprimieren=args.komprimieren)
+    Benchmark(args.anzahl, args.wiederholungen, latenz=args.latenz, latenz_je_objekt=args.latenz_je_objekt,
+              fehlerquote=args.fehlerquote, komprimieren=args.komprimieren).ausfuehren(args.szenarien or None)
+    statistik.ausgeben()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,683 @@
+# -*- coding: utf-8 -*-
+"""Lokaler Ersatz des PublicWFS der TTSIB (novasib-XML) für Tests und Benchmarks"""
+import gzip
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+_WFS = "{http://www.opengis.net/wfs}"
+_OGC = "{http://www.opengis.net/ogc}"
+_GML = "{http://www.opengis.net/gml}"
+_XLINK = "{http://www.w3.org/1999/xlink}"
+
+_KOPF = '<?xml version="1.0" encoding="UTF-8"?>'
+_NAMESPACES = ' xmlns:wfs="http://www.opengis.net/wfs" xmlns="http://xml.novasib.de"' \
+              ' xmlns:gml="http://www.opengis.net/gml" xmlns:ogc="http://www.opengis.net/ogc"' \
+              ' xmlns:xlink="http://www.w3.org/1999/xlink"'
+
+
+def _name(element):
+    """
+    Tag eines XML-Elementes ohne Namespace
+    """
+    return element.tag.split('}', 1).pop()
+
+
+def _zahl(wert):
+    """
+    Wandelt für Vergleiche in eine Zahl um, falls möglich
+    """
+    try:
+        return float(wert)
+    except (TypeError, ValueError):
+        return wert
+
+
+class MockWfs (object):
+    """
+    Lokaler HTTP-Server, der GetCapabilities, DescribeFeatureType, GetFeature (mit ogc:Filter,
+    maxFeatures und startIndex) und Transaction (Insert, Update, Delete) wie der PublicWFS beantwortet.
+    Der FeatureType Oteinzelbaum wird mit anzahl synthetischen Objekten gefüllt, die erst beim
+    Abruf erzeugt werden. Antwortzeiten und Fehler können eingestreut werden.
+
+    Beispiel:
+        mock = MockWfs(anzahl=10000, latenz=0.05)
+        url = mock.start()
+        PublicWfsData(url, "nutzer", "passwort", "Oteinzelbaum").show()
+        mock.stop()
+    """
+    feature_type = "Oteinzelbaum"
+    klartext = "Itbaumgattung"
+    gattungen = [("EIB", "Eibe"), ("BUC", "Buche"), ("EI", "Eiche"), ("LI", "Linde"), ("AH", "Ahorn")]
+    # Attribut -> XSD-Typ, Klartexte und Geometrie werden gesondert beschrieben
+    attribute = [("objektId", "string"), ("nr", "integer"), ("name", "string"), ("stammdu", "float"),
+                 ("pflanzdatum", "date"), ("stand", "dateTime"), ("gattung", None), ("geometrie", None)]
+
+    def __init__(self, anzahl=1000, latenz=0.0, latenz_je_objekt=0.0, fehlerquote=0.0, fehlercode=503,
+                 seed=1, host="127.0.0.1", port=0, komprimieren=False, teilweise=False):
+        """
+        :param anzahl: Anzahl der synthetischen Objekte (default=1000)
+        :type anzahl: int
+        :param latenz: Wartezeit vor jeder Antwort in Sekunden (default=0)
+        :type latenz: float
+        :param latenz_je_objekt: zusätzliche Wartezeit je gelesenem oder geschriebenem Objekt
+        :type latenz_je_objekt: float
+        :param fehlerquote: Anteil der Anfragen, die mit fehlercode beantwortet werden (default=0)
+        :type fehlerquote: float
+        :param fehlercode: HTTP-Status der eingestreuten Fehler (default=503)
+        :type fehlercode: int
+        :param seed: Startwert für die eingestreuten Fehler, damit Läufe wiederholbar sind
+        :type seed: int
+        :param host: Adresse des Servers (default=127.0.0.1)
+        :type host: str
+        :param port: Port des Servers (default: freier Port)
+        :type port: int
+        :param komprimieren: Legt fest, ob Antworten gzip-komprimiert werden, wenn der Client es anbietet
+        :type komprimieren: bool
+        :param teilweise: Legt fest, ob fehlerhafte Transaktionen bis zur fehlerhaften Aktion ausgeführt
+                und mit PARTIAL beantwortet werden, statt sie komplett zurückzurollen (default=False)
+        :type teilweise: bool
+        """
+        self.anzahl = anzahl
+        self.latenz = latenz
+        self.latenz_je_objekt = latenz_je_objekt
+        self.fehlerquote = fehlerquote
+        self.fehlercode = fehlercode
+        self.komprimieren = komprimieren
+        self.teilweise = teilweise
+        self.anfragen = {}
+        self.__zufall = random.Random(seed)
+        self.__adresse = (host, port)
+        self.__server = None
+        self.__lock = threading.Lock()
+        # geänderte (dict) und gelöschte (None) Objekte, eingefügte in Reihenfolge
+        self.__geaendert = {}
+        self.__neu = []
+        self.__naechste_id = anzahl
+
+    def start(self):
+        """
+        Startet den Server in einem eigenen Thread
+        :return: URL des Servers
+        :rtype: str
+        """
+        self.__server = _Server(self.__adresse, _Anfrage)
+        self.__server.mock = self
+        thread = threading.Thread(target=self.__server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self.url()
+
+    def stop(self):
+        """
+        Beendet den Server
+        """
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+    def url(self):
+        """
+        URL des laufenden Servers
+        :rtype: str
+        """
+        host, port = self.__server.server_address[:2]
+        return "http://" + host + ":" + str(port) + "/"
+
+    # Daten
+
+    def objekt(self, i):
+        """
+        Erzeugt das synthetische Objekt i, immer mit denselben Werten
+        :param i: Index des Objektes
+        :type i: int
+        :return: Attribute als Text, geometrie als (x, y)
+        :rtype: dict
+        """
+        return {'fid': "ID" + str(i),
+                'objektId': "ID" + str(i),
+                'nr': str(i + 1),
+                'name': "Baum " + str(i + 1),
+                'stammdu': "%.2f" % (0.1 + (i * 37 % 120) / 100.0),
+                'pflanzdatum': (datetime(1950, 1, 1) + timedelta(days=i * 13 % 25000)).strftime("%Y-%m-%d"),
+                'stand': (datetime(2018, 1, 1) + timedelta(minutes=i)).isoformat(),
+                'gattung': self.gattungen[i % len(self.gattungen)][0],
+                'geometrie': (563000.0 + i * 7919 % 5000, 5933000.0 + i * 104729 % 5000)}
+
+    def objekte(self):
+        """
+        Alle aktuellen Objekte in stabiler Reihenfolge
+        :rtype: generator
+        """
+        with self.__lock:
+            geaendert = dict(self.__geaendert)
+            neu = list(self.__neu)
+        for i in range(self.anzahl):
+            fid = "ID" + str(i)
+            if fid in geaendert:
+                if geaendert[fid] is not None:
+                    yield geaendert[fid]
+                continue
+            yield self.objekt(i)
+        for fid in neu:
+            if geaendert.get(fid) is not None:
+                yield geaendert[fid]
+
+    def loeschen(self, *fids):
+        """
+        Löscht Objekte direkt auf dem Server, z.B. um Änderungen durch andere Nutzer nachzustellen
+        :param fids: fids der Objekte
+        :type fids: str
+        """
+        with self.__lock:
+            for fid in fids:
+                self.__geaendert[fid] = None
+
+    def __objekt_nach_fid(self, fid):
+        """
+        Sucht ein Objekt über seine fid
+        :rtype: dict
+        """
+        if fid in self.__geaendert:
+            return self.__geaendert[fid]
+        if fid.startswith("ID") and fid[2:].isdigit() and int(fid[2:]) < self.anzahl:
+            return self.objekt(int(fid[2:]))
+        return None
+
+    # Anfragen
+
+    def beantworten(self, anfrage):
+        """
+        Beantwortet eine WFS-Anfrage
+        :param anfrage: XML der Anfrage
+        :type anfrage: bytes
+        :return: HTTP-Status und Antwort (bytes oder Generator über bytes)
+        :rtype: tuple
+        """
+        try:
+            root = ElementTree.fromstring(anfrage)
+        except ElementTree.ParseError as e:
+            return 400, self.__ausnahme("Anfrage nicht lesbar: " + str(e))
+        art = _name(root)
+        with self.__lock:
+            self.anfragen[art] = self.anfragen.get(art, 0) + 1
+            fehler = self.fehlerquote > 0 and self.__zufall.random() < self.fehlerquote
+        if self.latenz > 0:
+            time.sleep(self.latenz)
+        if fehler:
+            return self.fehlercode, self.__ausnahme("eingestreuter Fehler")
+
+        if art == "GetCapabilities":
+            return 200, self.__capabilities()
+        if art == "DescribeFeatureType":
+            typ = root.find(_WFS + "TypeName")
+            return 200, self.__describe_feature_type(typ.text.strip() if typ is not None else "")
+        if art == "GetFeature":
+            return 200, self.__get_feature(root)
+        if art == "Transaction":
+            return 200, self.__transaction(root)
+        return 400, self.__ausnahme("Unbekannte Anfrage: " + art)
+
+    @staticmethod
+    def __ausnahme(meldung):
+        return (_KOPF + '<ServiceExceptionReport version="1.2.0"><ServiceException>' + escape(meldung) +
+                '</ServiceException></ServiceExceptionReport>').encode("utf-8")
+
+    def __capabilities(self):
+        r = _KOPF + '<wfs:WFS_Capabilities version="1.0.0"' + _NAMESPACES + '><wfs:FeatureTypeList>'
+        for name, titel in [(self.feature_type, "Einzelbaum"), (self.klartext, "Baumgattung")]:
+            r += '<wfs:FeatureType><wfs:Name>' + name + '</wfs:Name><wfs:Title>' + titel + \
+                 '</wfs:Title><wfs:SRS>EPSG:25832</wfs:SRS></wfs:FeatureType>'
+        r += '</wfs:FeatureTypeList></wfs:WFS_Capabilities>'
+        return r.encode("utf-8")
+
+    def __describe_feature_type(self, feature_type):
+        elemente = ""
+        if feature_type == self.feature_type:
+            for att, typ in self.attribute:
+                if att == "gattung":
+                    elemente += '<xsd:element name="gattung"><xsd:annotation><xsd:documentation>Gattung' \
+                                '</xsd:documentation><xsd:appinfo><n:typeName>' + self.klartext + \
+                                '</n:typeName></xsd:appinfo></xsd:annotation></xsd:element>'
+                elif att == "geometrie":
+                    elemente += '<xsd:element name="geometrie" type="gml:GeometryPropertyType"/>'
+                elif att == "objektId":
+                    elemente += '<xsd:element name="objektId" type="xsd:string"><xsd:annotation>' \
+                                '<xsd:documentation>Objekt-ID</xsd:documentation><xsd:appinfo>' \
+                                '<n:readOnly>true</n:readOnly></xsd:appinfo></xsd:annotation></xsd:element>'
+                else:
+                    elemente += '<xsd:element name="' + att + '" type="xsd:' + typ + '"/>'
+        elif feature_type == self.klartext:
+            elemente = '<xsd:element name="langtext" type="xsd:string"/>'
+        else:
+            return self.__ausnahme("Unbekannter FeatureType: " + feature_type)
+        return (_KOPF + '<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:n="http://xml.novasib.de"'
+                ' xmlns:gml="http://www.opengis.net/gml"><xsd:complexType name="' + feature_type + 'Type">'
+                '<xsd:complexContent><xsd:extension base="gml:AbstractFeatureType"><xsd:sequence>' + elemente +
+                '</xsd:sequence></xsd:extension></xsd:complexContent></xsd:complexType></xsd:schema>'
+                ).encode("utf-8")
+
+    def __get_feature(self, root):
+        """
+        Erzeugt die FeatureCollection schrittweise, damit auch große Antworten wenig Speicher brauchen
+        """
+        query = root.find(_WFS + "Query")
+        if query is None:
+            return self.__ausnahme("wfs:Query fehlt")
+        feature_type = query.get("typeName", "").strip("'\"")
+        max_features = int(root.get("maxFeatures")) if root.get("maxFeatures") else None
+        start_index = int(root.get("startIndex", 0))
+        filter_xml = query.find(_OGC + "Filter")
+        eigenschaften = [p.text.strip() for p in query.findall(_OGC + "PropertyName")]
+        sortierung = query.find(_OGC + "SortBy/" + _OGC + "SortProperty")
+
+        if feature_type == self.klartext:
+            objekte = ({'fid': "G" + str(i), 'luk': luk, 'langtext': text}
+                       for i, (luk, text) in enumerate(self.gattungen))
+            ausgabe = self.__klartext_xml
+        elif feature_type == self.feature_type:
+            objekte = self.objekte()
+            ausgabe = self.__objekt_xml
+        else:
+            return self.__ausnahme("Unbekannter FeatureType: " + feature_type)
+        if sortierung is not None:
+            att = sortierung.findtext(_OGC + "PropertyName", "").strip()
+            if feature_type == self.feature_type and att not in dict(self.attribute):
+                return self.__ausnahme("Unbekanntes Attribut für SortBy: " + att)
+            absteigend = sortierung.findtext(_OGC + "SortOrder", "ASC").strip() == "DESC"
+            objekte = sorted(objekte, key=lambda o: _zahl(o.get(att) or ""), reverse=absteigend)
+
+        def erzeugen():
+            yield (_KOPF + '<wfs:FeatureCollection' + _NAMESPACES + '>').encode("utf-8")
+            teile = []
+            gefunden = 0
+            ausgegeben = 0
+            for o in objekte:
+                if filter_xml is not None and not _Filter.pruefen(filter_xml, o):
+                    continue
+                gefunden += 1
+                if gefunden <= start_index:
+                    continue
+                if max_features is not None and ausgegeben >= max_features:
+                    break
+                ausgegeben += 1
+                teile.append(ausgabe(o, eigenschaften))
+                if len(teile) >= 200:
+                    if self.latenz_je_objekt > 0:
+                        time.sleep(self.latenz_je_objekt * len(teile))
+                    yield "".join(teile).encode("utf-8")
+                    teile = []
+            if self.latenz_je_objekt > 0:
+                time.sleep(self.latenz_je_objekt * len(teile))
+            teile.append('</wfs:FeatureCollection>')
+            yield "".join(teile).encode("utf-8")
+
+        return erzeugen()
+
+    def __objekt_xml(self, o, eigenschaften):
+        r = '<Objekt><' + self.feature_type + ' fid="' + escape(o['fid']) + '">'
+        for att, typ in self.attribute:
+            if att not in o or o[att] is None or (eigenschaften and att not in eigenschaften):
+                continue
+            if att == "gattung":
+                r += '<gattung xlink:href="#G' + str(self.__gattung_index(o[att])) + '" typeName="' + \
+                     self.klartext + '" luk="' + escape(o[att], {'"': "&quot;"}) + '"/>'
+            elif att == "geometrie":
+                r += '<geometrie><gml:Point srsName="EPSG:25832"><gml:coordinates>' + \
+                     str(o[att][0]) + ',' + str(o[att][1]) + '</gml:coordinates></gml:Point></geometrie>'
+            else:
+                r += '<' + att + '>' + escape(o[att]) + '</' + att + '>'
+        return r + '</' + self.feature_type + '></Objekt>'
+
+    def __klartext_xml(self, o, eigenschaften):
+        return '<Objekt><' + self.klartext + ' fid="' + o['fid'] + '" luk="' + escape(o['luk'], {'"': "&quot;"}) + \
+               '"><langtext>' + escape(o['langtext']) + '</langtext></' + self.klartext + '></Objekt>'
+
+    def __gattung_index(self, luk):
+        for i, (abk, text) in enumerate(self.gattungen):
+            if abk == luk:
+                return i
+        return -1
+
+    def __transaction(self, root):
+        """
+        Führt Insert, Update und Delete gemeinsam aus; schlägt eine Aktion fehl, bleibt alles unverändert
+        bzw. (teilweise) bleiben die Aktionen davor gespeichert. Der Locator ist der handle der Aktion
+        """
+        with self.__lock:
+            zustand = {'geaendert': dict(self.__geaendert), 'neu': list(self.__neu),
+                       'naechste_id': self.__naechste_id, 'fids': [], 'anzahl': 0}
+        gesichert = None
+        for aktion in root:
+            if self.teilweise:
+                gesichert = {'geaendert': dict(zustand['geaendert']), 'neu': list(zustand['neu']),
+                             'naechste_id': zustand['naechste_id'], 'fids': list(zustand['fids']),
+                             'anzahl': zustand['anzahl']}
+            try:
+                self.__aktion(aktion, zustand)
+            except ValueError as e:
+                locator, meldung = e.args
+                locator = aktion.get("handle") or locator
+                if gesichert is None or gesichert['anzahl'] == 0:
+                    return self.__transaktion_antwort("FAILED", [], meldung, locator)
+                # ohne Rollback: alles vor der fehlerhaften Aktion bleibt gespeichert
+                self.__speichern(gesichert)
+                return self.__transaktion_antwort("PARTIAL", gesichert['fids'], meldung, locator)
+
+        self.__speichern(zustand)
+        return self.__transaktion_antwort("SUCCESS", zustand['fids'])
+
+    def __speichern(self, zustand):
+        if self.latenz_je_objekt > 0:
+            time.sleep(self.latenz_je_objekt * zustand['anzahl'])
+        with self.__lock:
+            self.__geaendert = zustand['geaendert']
+            self.__neu = zustand['neu']
+            self.__naechste_id = zustand['naechste_id']
+
+    def __aktion(self, aktion, zustand):
+        """
+        Führt eine Aktion einer Transaktion auf dem Zwischenstand aus
+        """
+        art = _name(aktion)
+        geaendert = zustand['geaendert']
+        if art == "Insert":
+            for feature in aktion:
+                objekt = self.__feature_lesen(feature)
+                objekt['fid'] = objekt['objektId'] = "ID" + str(zustand['naechste_id'])
+                zustand['naechste_id'] += 1
+                geaendert[objekt['fid']] = objekt
+                zustand['neu'].append(objekt['fid'])
+                zustand['fids'].append(objekt['fid'])
+                zustand['anzahl'] += 1
+            return
+        if art not in ["Update", "Delete"]:
+            raise ValueError(art, "Unbekannte Aktion " + art)
+        filter_xml = aktion.find(_OGC + "Filter")
+        if filter_xml is None:
+            raise ValueError(art, art + " ohne ogc:Filter")
+        for objekt in self.__treffer(filter_xml, geaendert, zustand['neu']):
+            if art == "Delete":
+                geaendert[objekt['fid']] = None
+            else:
+                objekt = dict(objekt)
+                for eigenschaft in aktion.findall(_WFS + "Property"):
+                    name = eigenschaft.find(_WFS + "Name").text.strip()
+                    wert = eigenschaft.find(_WFS + "Value")
+                    objekt[name] = self.__wert_lesen(name, wert) if wert is not None else None
+                self.__objekt_pruefen(objekt, art)
+                geaendert[objekt['fid']] = objekt
+            zustand['anzahl'] += 1
+
+    def __treffer(self, filter_xml, geaendert, neu):
+        """
+        Objekte, auf die ein Filter einer Transaktion zutrifft (bei fids ohne alle Objekte zu erzeugen)
+        """
+        fids = [f.get("fid") for f in filter_xml.findall(_OGC + "FeatureId")]
+        if len(fids) > 0:
+            kandidaten = []
+            for fid in fids:
+                objekt = geaendert[fid] if fid in geaendert else self.__objekt_nach_fid(fid)
+                if objekt is not None:
+                    kandidaten.append(objekt)
+            return kandidaten
+        treffer = []
+        for i in range(self.anzahl):
+            fid = "ID" + str(i)
+            objekt = geaendert[fid] if fid in geaendert else self.objekt(i)
+            if objekt is not None and _Filter.pruefen(filter_xml, objekt):
+                treffer.append(objekt)
+        for fid in neu:
+            if geaendert.get(fid) is not None and _Filter.pruefen(filter_xml, geaendert[fid]):
+                treffer.append(geaendert[fid])
+        return treffer
+
+    def __feature_lesen(self, feature):
+        if _name(feature) != self.feature_type:
+            raise ValueError(feature.get("handle") or _name(feature),
+                             "Unbekannter FeatureType: " + _name(feature))
+        objekt = {}
+        for element in feature:
+            att = _name(element)
+            if att == "objektId":
+                raise ValueError(att, "Attribut objektId ist nur lesbar")
+            objekt[att] = self.__wert_lesen(att, element)
+        self.__objekt_pruefen(objekt, _name(feature))
+        return objekt
+
+    def __wert_lesen(self, att, element):
+        if att == "gattung":
+            if element.get("luk") is not None:
+                return element.get("luk")
+            href = element.get(_XLINK + "href")
+            if href is not None and href.startswith("#G") and href[2:].isdigit() and \
+                    int(href[2:]) < len(self.gattungen):
+                return self.gattungen[int(href[2:])][0]
+            return (element.text or "").strip()
+        if att == "geometrie":
+            koordinaten = element.find(".//" + _GML + "coordinates")
+            if koordinaten is None:
+                return None
+            x, y = koordinaten.text.strip().split()[0].split(",")[:2]
+            return float(x), float(y)
+        return element.text
+
+    def __objekt_pruefen(self, objekt, locator):
+        """
+        Prüft die Werte wie der PublicWFS, fehlerhafte Objekte führen zum Abbruch der Transaktion
+        """
+        typen = dict(self.attribute)
+        for att, wert in objekt.items():
+            if att == "fid":
+                continue
+            if att not in typen:
+                raise ValueError(locator, "Unbekanntes Attribut: " + att)
+            if wert is None:
+                continue
+            try:
+                if att == "gattung":
+                    if self.__gattung_index(wert) < 0:
+                        raise ValueError(wert)
+                elif typen[att] == "integer":
+                    int(wert)
+                elif typen[att] == "float":
+                    float(wert)
+                elif typen[att] == "date":
+                    datetime.strptime(wert, "%Y-%m-%d")
+                elif typen[att] == "dateTime":
+                    datetime.strptime(wert[:19], "%Y-%m-%dT%H:%M:%S")
+            except ValueError:
+                raise ValueError(locator, "Ungültiger Wert für " + att + ": " + str(wert))
+
+    @staticmethod
+    def __transaktion_antwort(status, fids, meldung=None, locator=None):
+        r = _KOPF + '<wfs:WFS_TransactionResponse version="1.0.0"' + _NAMESPACES + '>'
+        if len(fids) > 0:
+            r += '<wfs:InsertResult>' + "".join('<ogc:FeatureId fid="' + fid + '"/>' for fid in fids) + \
+                 '</wfs:InsertResult>'
+        r += '<wfs:TransactionResult><wfs:Status><wfs:' + status + '/></wfs:Status>'
+        if locator is not None:
+            r += '<wfs:Locator>' + escape(locator) + '</wfs:Locator>'
+        if meldung is not None:
+            r += '<wfs:Message>' + escape(meldung) + '</wfs:Message>'
+        r += '</wfs:TransactionResult></wfs:WFS_TransactionResponse>'
+        return r.encode("utf-8")
+
+
+class _Filter (object):
+    """
+    Wertet einen ogc:Filter (Filter Encoding 1.0) für ein Objekt des MockWfs aus
+    """
+    _vergleiche = {'PropertyIsEqualTo': lambda a, b: a == b,
+                   'PropertyIsNotEqualTo': lambda a, b: a != b,
+                   'PropertyIsLessThan': lambda a, b: a < b,
+                   'PropertyIsLessThanOrEqualTo': lambda a, b: a <= b,
+                   'PropertyIsGreaterThan': lambda a, b: a > b,
+                   'PropertyIsGreaterThanOrEqualTo': lambda a, b: a >= b}
+
+    @staticmethod
+    def pruefen(element, objekt):
+        """
+        :param element: ogc:Filter oder ein Teil davon
+        :type element: xml.etree.ElementTree.Element
+        :param objekt: Objekt des MockWfs
+        :type objekt: dict
+        :rtype: bool
+        """
+        art = _name(element)
+        if art == "Filter":
+            fids = element.findall(_OGC + "FeatureId")
+            if len(fids) > 0:
+                return objekt.get('fid') in [f.get("fid") for f in fids]
+            return all(_Filter.pruefen(e, objekt) for e in element)
+        if art == "And":
+            return all(_Filter.pruefen(e, objekt) for e in element)
+        if art == "Or":
+            return any(_Filter.pruefen(e, objekt) for e in element)
+        if art == "Not":
+            return not _Filter.pruefen(element[0], objekt)
+        if art == "FeatureId":
+            return objekt.get('fid') == element.get("fid")
+
+        wert = _Filter.__wert(element.find(_OGC + "PropertyName"), objekt)
+        if art in _Filter._vergleiche:
+            literal = element.find(_OGC + "Literal").text or ""
+            if wert is None:
+                return False
+            a, b = _zahl(wert), _zahl(literal)
+            if type(a) != type(b):
+                a, b = str(wert), literal
+            return _Filter._vergleiche[art](a, b)
+        if art == "PropertyIsNull":
+            return wert is None
+        if art == "PropertyIsBetween":
+            if wert is None:
+                return False
+            unten = element.find(_OGC + "LowerBoundary/" + _OGC + "Literal").text
+            oben = element.find(_OGC + "UpperBoundary/" + _OGC + "Literal").text
+            a, u, o = _zahl(wert), _zahl(unten), _zahl(oben)
+            if not (type(a) == type(u) == type(o)):
+                a, u, o = str(wert), unten, oben
+            return u <= a <= o
+        if art == "PropertyIsLike":
+            if wert is None:
+                return False
+            muster = ""
+            zeichen = element.find(_OGC + "Literal").text or ""
+            i = 0
+            while i < len(zeichen):
+                z = zeichen[i]
+                if z == element.get("escapeChar", "\\") and i + 1 < len(zeichen):
+                    i += 1
+                    muster += re.escape(zeichen[i])
+                elif z == element.get("wildCard", "*"):
+                    muster += ".*"
+                elif z == element.get("singleChar", "?"):
+                    muster += "."
+                else:
+                    muster += re.escape(z)
+                i += 1
+            return re.match(muster + "$", str(wert)) is not None
+        if art in ["BBOX", "Intersects"]:
+            if wert is None:
+                return False
+            x1, y1, x2, y2 = _Filter.__umring(element)
+            return x1 <= wert[0] <= x2 and y1 <= wert[1] <= y2
+        raise ValueError("Filter", "Filter nicht unterstützt: " + art)
+
+    @staticmethod
+    def __wert(property_name, objekt):
+        if property_name is None:
+            return None
+        # gattung/@luk für Klartexte
+        name = property_name.text.strip().split("/")[0]
+        return objekt.get(name)
+
+    @staticmethod
+    def __umring(element):
+        """
+        Umring der Koordinaten einer Box oder GML-Geometrie
+        """
+        koordinaten = []
+        for k in element.iter(_GML + "coordinates"):
+            for paar in k.text.strip().split():
+                x, y = paar.split(",")[:2]
+                koordinaten.append((float(x), float(y)))
+        for k in element.iter(_GML + "posList"):
+            werte = [float(w) for w in k.text.split()]
+            koordinaten += list(zip(werte[0::2], werte[1::2]))
+        if len(koordinaten) == 0:
+            raise ValueError("Filter", "Geometrie ohne Koordinaten")
+        return (min(k[0] for k in koordinaten), min(k[1] for k in koordinaten),
+                max(k[0] for k in koordinaten), max(k[1] for k in koordinaten))
+
+
+class _Server (ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    mock = None
+
+
+class _Anfrage (BaseHTTPRequestHandler):
+    """
+    HTTP-Behandlung des MockWfs, große Antworten werden in Teilen (chunked) gesendet
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        anfrage = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('Content-Encoding', '').lower() == 'gzip':
+            anfrage = gzip.decompress(anfrage)
+        status, antwort = self.server.mock.beantworten(anfrage)
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/xml; charset=UTF-8')
+        if self.server.mock.komprimieren and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            self.send_header('Content-Encoding', 'gzip')
+            if isinstance(antwort, bytes):
+                antwort = gzip.compress(antwort)
+            else:
+                antwort = self.__komprimiert(antwort)
+        if isinstance(antwort, bytes):
+            self.send_header('Content-Length', str(len(antwort)))
+            self.end_headers()
+            self.wfile.write(antwort)
+            return
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for teil in antwort:
+            self.wfile.write(("%x\r\n" % len(teil)).encode("ascii") + teil + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    @staticmethod
+    def __komprimiert(teile):
+        packer = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for teil in teile:
+            gepackt = packer.compress(teil)
+            if gepackt:
+                yield gepackt
+        yield packer.flush()
+
+
+def _prozess_starten(optionen, verbindung):
+    """
+    Startet einen MockWfs in einem eigenen Prozess (z.B. für Speichermessungen im Benchmark)
+    und sendet die URL über die Verbindung zurück
+    :param optionen: Parameter für MockWfs
+    :type optionen: dict
+    :param verbindung: Ende einer multiprocessing.Pipe
+    """
+    mock = MockWfs(**optionen)
+    verbindung.send(mock.start())
+    # bis zum Beenden des Prozesses weiterlaufen
+    verbindung.recv()
+    mock.stop()
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from sibtools import WfsData
+from sibtools.mockwfs import MockWfs
+
+
+@pytest.fixture(autouse=True)
+def http_config():
+    # ohne Wartezeiten zwischen den Versuchen, Sessions je Test neu aufbauen
+    WfsData.set_http_config(backoff=0)
+    yield
+    WfsData.set_http_config()
+
+
+@pytest.fixture
+def mock():
+    mock = MockWfs(anzahl=50)
+    mock.start()
+    yield mock
+    mock.stop()
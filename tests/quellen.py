@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from sibtools import DataSource
+
+
+class ListenQuelle (DataSource):
+    """
+    Datenquelle aus einer Liste von Dictionarys
+    """
+
+    def __init__(self, zeilen, spalten):
+        self.zeilen = zeilen
+        self.spalten = spalten
+        self.__zeile = 0
+
+    def _read_line(self):
+        if self.__zeile >= len(self.zeilen):
+            return None
+        self.__zeile += 1
+        return dict(self.zeilen[self.__zeile - 1])
+
+    def reset_line(self):
+        self.__zeile = 0
+
+    def _get_columns(self):
+        return dict(self.spalten)
+
+
+SPALTEN = {'nr': int, 'name': str, 'stammdu': float, 'gattung': str}
+
+
+def baeume(anzahl, start=1):
+    return [{'nr': i, 'name': "Neuer Baum " + str(i), 'stammdu': 0.5, 'gattung': "EIB"}
+            for i in range(start, start + anzahl)]
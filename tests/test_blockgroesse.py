@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from sibtools import AdaptiveBlockgroesse, PublicWfsData
+from sibtools.mockwfs import MockWfs
+
+from quellen import ListenQuelle, SPALTEN, baeume
+
+
+def test_start_innerhalb_der_grenzen():
+    assert AdaptiveBlockgroesse(start=5, minimum=10, maximum=100).groesse() == 10
+    assert AdaptiveBlockgroesse(start=500, minimum=10, maximum=100).groesse() == 100
+
+
+def test_schnelle_bloecke_vergroessern_bis_maximum():
+    blockgroesse = AdaptiveBlockgroesse(start=10, minimum=5, maximum=50, ziel_sekunden=1.0)
+    groessen = []
+    for _ in range(10):
+        blockgroesse.melden(blockgroesse.groesse(), 0.1, True)
+        groessen.append(blockgroesse.groesse())
+    assert groessen[:4] == [15, 22, 33, 49]
+    assert groessen[4:] == [50] * 6
+
+
+def test_langsame_bloecke_verkleinern_bis_minimum():
+    blockgroesse = AdaptiveBlockgroesse(start=100, minimum=10, maximum=200, ziel_sekunden=1.0)
+    groessen = []
+    for erfolgreich in [True, False, True, False, True]:
+        blockgroesse.melden(blockgroesse.groesse(), 2.0, erfolgreich)
+        groessen.append(blockgroesse.groesse())
+    assert groessen == [50, 25, 12, 10, 10]
+
+
+def test_unveraendert():
+    blockgroesse = AdaptiveBlockgroesse(start=100, minimum=10, maximum=200, ziel_sekunden=1.0)
+    # abgelehnt, zwischen halber und ganzer Zieldauer, oder Teilblock aus der Bisektion
+    blockgroesse.melden(100, 0.1, False)
+    blockgroesse.melden(100, 0.7, True)
+    blockgroesse.melden(10, 0.1, True)
+    assert blockgroesse.groesse() == 100
+
+
+def test_write_passt_sich_dem_server_an(mock):
+    mock.latenz_je_objekt = 0.002
+    blockgroesse = AdaptiveBlockgroesse(start=10, minimum=5, maximum=400, ziel_sekunden=0.5)
+    groessen = []
+    melden = blockgroesse.melden
+
+    def mitschreiben(anzahl, sekunden, erfolgreich):
+        groessen.append(anzahl)
+        melden(anzahl, sekunden, erfolgreich)
+
+    blockgroesse.melden = mitschreiben
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    ergebnis = wfs.write(ListenQuelle(baeume(600), SPALTEN), blockgroesse=blockgroesse, abgelehnt=[])
+    assert ergebnis.erfolgreich
+    assert sum(groessen) == 600
+    # wächst zunächst, bleibt aber unter der Größe, bei der eine Transaktion die Zieldauer überschreitet
+    assert groessen[:3] == [10, 15, 22]
+    assert max(groessen) < 400
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta, timezone
+
+from sibtools import CsvData
+
+from quellen import ListenQuelle
+
+
+def alle(quelle):
+    zeilen = []
+    while True:
+        zeile = quelle.read_line()
+        if zeile is None:
+            return zeilen
+        zeilen.append(zeile)
+
+
+def schwierige_zeilen(anzahl):
+    zeilen = []
+    for i in range(anzahl):
+        text = 'Zeile "' + str(i) + '";\nmit Umbruch' if i % 3 == 0 else "einfach " + str(i)
+        zeilen.append({'nr': i, 'text': text, 'wert': i / 4.0})
+    return zeilen
+
+
+def test_index_und_direkter_zugriff(tmp_path):
+    datei = str(tmp_path / "daten.csv")
+    CsvData(datei).write(ListenQuelle(schwierige_zeilen(100), {'nr': int, 'text': str, 'wert': float}))
+    csv_daten = CsvData(datei)
+    zeilen = alle(csv_daten)
+    assert len(zeilen) == 100
+
+    assert csv_daten.index_erstellen(speichern=True) == 100
+    for nr in [0, 1, 3, 50, 99]:
+        assert csv_daten.get_line(nr) == zeilen[nr]
+    assert csv_daten.get_line(100) is None
+    csv_daten.reset_line(10)
+    assert csv_daten.read_line() == zeilen[10]
+    assert csv_daten.skip_lines(5) == 5
+    assert csv_daten.read_line() == zeilen[16]
+
+    # gespeicherter Index wird wiederverwendet
+    assert CsvData(datei).index_erstellen() == 100
+
+
+def test_bereiche(tmp_path):
+    datei = str(tmp_path / "daten.csv")
+    CsvData(datei).write(ListenQuelle(schwierige_zeilen(100), {'nr': int, 'text': str, 'wert': float}))
+    zeilen = alle(CsvData(datei))
+    gelesen = []
+    for erste, start, ende in CsvData(datei).bereiche(4):
+        teil = alle(CsvData(datei, bereich=(start, ende)))
+        assert teil[0] == zeilen[erste]
+        gelesen.extend(teil)
+    assert gelesen == zeilen
+
+
+def test_quoting_round_trip(tmp_path):
+    datei = str(tmp_path / "daten.csv")
+    zeilen = [{'nr': 1, 'text': 'mit ; Semikolon', 'wert': 1.5},
+              {'nr': 2, 'text': 'über\nzwei Zeilen', 'wert': None},
+              {'nr': 3, 'text': 'doppelte "Anführungszeichen" ""', 'wert': -0.25},
+              {'nr': 4, 'text': None, 'wert': 2.0}]
+    assert CsvData(datei).write(ListenQuelle(zeilen, {'nr': int, 'text': str, 'wert': float}))
+
+    gelesen = alle(CsvData(datei))
+    assert gelesen == [{'nr': "1", 'text': 'mit ; Semikolon', 'wert': "1,5"},
+                       {'nr': "2", 'text': 'über\nzwei Zeilen'},
+                       {'nr': "3", 'text': 'doppelte "Anführungszeichen" ""', 'wert': "-0,25"},
+                       {'nr': "4", 'wert': "2,0"}]
+
+    # Schreiben aus einer CSV-Datei ergibt dieselbe Datei
+    kopie = str(tmp_path / "kopie.csv")
+    CsvData(kopie).write(CsvData(datei))
+    assert alle(CsvData(kopie)) == gelesen
+
+
+def test_reset_line(tmp_path):
+    datei = str(tmp_path / "daten.csv")
+    CsvData(datei).write(ListenQuelle(schwierige_zeilen(10), {'nr': int, 'text': str, 'wert': float}))
+    csv_daten = CsvData(datei)
+    zeilen = alle(csv_daten)
+    csv_daten.reset_line()
+    assert alle(csv_daten) == zeilen
+
+
+def test_typen_erkennen(tmp_path):
+    datei = tmp_path / "typen.csv"
+    datei.write_text('"vnk";"nr";"laenge";"datum";"text";"plz";"leer"\n' +
+                     "".join('123405678;%d;%d,5;2018-01-%02d;"abc";0%d;\n' % (i, i, i, 2000 + i)
+                             for i in range(1, 21)))
+    csv_daten = CsvData(str(datei), typen_erkennen=True)
+    spalten = csv_daten.get_columns()
+    assert spalten['nr'] == int
+    assert spalten['laenge'] == float
+    assert spalten['datum'].__name__ == "datetime"
+    assert spalten['text'] == str
+    # führende Nullen bleiben Text
+    assert spalten['plz'] == str
+    zeile = csv_daten.read_line()
+    assert zeile['nr'] == 1 and zeile['laenge'] == 1.5 and zeile['plz'] == "02001"
+    assert zeile['datum'].year == 2018
+    assert 'leer' not in zeile
+
+    assert CsvData(str(datei)).get_columns()['nr'] == str
+
+
+def test_typen_erkennen_round_trip(tmp_path):
+    zeilen = [{'vnk': "4711", 'nr': i, 'stand': datetime(2020, 1, 2, 3, 4, 5, i * 1000)} for i in range(10)]
+    datei = str(tmp_path / "rund.csv")
+    CsvData(datei).write(ListenQuelle(zeilen, {'vnk': str, 'nr': int, 'stand': datetime}))
+    csv_daten = CsvData(datei, typen_erkennen=True)
+    spalten = csv_daten.get_columns()
+    # Text in Anführungszeichen bleibt Text, str(datetime) wird als Zeitstempel erkannt
+    assert spalten == {'vnk': str, 'nr': int, 'stand': datetime}
+    assert alle(csv_daten) == zeilen
+
+
+def test_typen_erkennen_zeitstempel(tmp_path):
+    datei = tmp_path / "zeit.csv"
+    datei.write_text('"a";"b";"c"\n2020-01-02 03:04:05;2020-01-02T03:04:05.5Z;"2020-01-02T03:04:05+01:00"\n')
+    csv_daten = CsvData(str(datei), typen_erkennen=True)
+    assert set(csv_daten.get_columns().values()) == {datetime}
+    zeile = csv_daten.read_line()
+    assert zeile['a'] == datetime(2020, 1, 2, 3, 4, 5)
+    assert zeile['b'] == datetime(2020, 1, 2, 3, 4, 5, 500000, tzinfo=timezone.utc)
+    assert zeile['c'].utcoffset() == timedelta(hours=1)
+
+
+def test_komprimiert(tmp_path):
+    quelle = ListenQuelle(schwierige_zeilen(50), {'nr': int, 'text': str, 'wert': float})
+    klar = str(tmp_path / "daten.csv")
+    CsvData(klar).write(quelle)
+    zeilen = alle(CsvData(klar))
+    for endung in [".gz", ".bz2", ".xz"]:
+        datei = str(tmp_path / ("daten.csv" + endung))
+        quelle.reset_line()
+        CsvData(datei, kompressionsstufe=1).write(quelle)
+        with open(datei, "rb") as f:
+            assert f.read(1) != b'"'
+        csv_daten = CsvData(datei)
+        assert alle(csv_daten) == zeilen
+        csv_daten.reset_line()
+        assert csv_daten.read_line() == zeilen[0]
+        try:
+            csv_daten.index_erstellen()
+            assert False, "Index für komprimierte Dateien"
+        except Exception as e:
+            assert "komprimiert" in str(e)
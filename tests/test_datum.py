@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from sibtools import PublicWfsData, _parse_datum
+from sibtools.mockwfs import MockWfs
+
+from test_seiten import lesen
+
+
+@pytest.mark.parametrize("text, erwartet", [
+    ("2018-12-20", datetime(2018, 12, 20)),
+    ("2018-12-20T12:30:05", datetime(2018, 12, 20, 12, 30, 5)),
+    ("2018-12-20 12:30:05", datetime(2018, 12, 20, 12, 30, 5)),
+    ("2018-12-20T12:30:05.5", datetime(2018, 12, 20, 12, 30, 5, 500000)),
+    ("2018-12-20 12:30:05.123456789", datetime(2018, 12, 20, 12, 30, 5, 123456)),
+    ("2018-12-20T12:30:05Z", datetime(2018, 12, 20, 12, 30, 5, tzinfo=timezone.utc)),
+    ("2018-12-20T12:30:05.25+01:00", datetime(2018, 12, 20, 12, 30, 5, 250000, timezone(timedelta(hours=1)))),
+    ("2018-12-20T12:30:05-0230", datetime(2018, 12, 20, 12, 30, 5, tzinfo=timezone(-timedelta(hours=2, minutes=30)))),
+    # andere Formate über strptime
+    ("2018-1-5", datetime(2018, 1, 5)),
+    ("2018-1-5T1:2:3", datetime(2018, 1, 5, 1, 2, 3)),
+])
+def test_parse_datum(text, erwartet):
+    wert = _parse_datum(text)
+    assert wert == erwartet
+    assert wert.tzinfo == erwartet.tzinfo
+
+
+@pytest.mark.parametrize("text", ["2018-02-30", "2018-12-20T24:00:00", "20.12.2018", "2018-12-20T12:30",
+                                  "2018-12-20T12:30:05+1", "heute"])
+def test_parse_datum_ungueltig(text):
+    with pytest.raises(ValueError):
+        _parse_datum(text)
+
+
+def test_wie_strptime():
+    wert = datetime(1950, 1, 1)
+    while wert.year < 2030:
+        assert _parse_datum(wert.strftime("%Y-%m-%d")) == datetime.strptime(wert.strftime("%Y-%m-%d"), "%Y-%m-%d")
+        text = wert.strftime("%Y-%m-%dT%H:%M:%S")
+        assert _parse_datum(text) == datetime.strptime(text, "%Y-%m-%dT%H:%M:%S")
+        wert += timedelta(days=37, seconds=4567)
+
+
+def test_konverter_im_export(mock):
+    zeilen = lesen(PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type))
+    for zeile, objekt in zip(zeilen, mock.objekte()):
+        assert zeile['nr'] == int(objekt['nr'])
+        assert zeile['stammdu'] == float(objekt['stammdu'])
+        assert zeile['pflanzdatum'] == datetime.strptime(objekt['pflanzdatum'], "%Y-%m-%d")
+        assert zeile['stand'] == datetime.strptime(objekt['stand'], "%Y-%m-%dT%H:%M:%S")
+        assert zeile['name'] == objekt['name']
+        assert zeile['gattung'] == objekt['gattung']
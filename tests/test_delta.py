@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import json
+
+from sibtools import PublicWfsData, DeltaZustand
+from sibtools.mockwfs import MockWfs
+
+
+def exportieren(mock, zustand):
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    wfs.set_delta_export(zustand)
+    zeilen = []
+    while True:
+        zeile = wfs.read_line()
+        if zeile is None:
+            return wfs, zeilen
+        zeilen.append(zeile)
+
+
+def test_delta_fids_getrennt_vom_stand(mock, tmp_path):
+    datei = str(tmp_path / "delta.json")
+    zustand = DeltaZustand(datei)
+
+    wfs, zeilen = exportieren(mock, zustand)
+    assert len(zeilen) == mock.anzahl
+    wfs.delta_abschliessen()
+
+    with open(datei, encoding="utf-8") as f:
+        eintrag = list(json.load(f).values())[0]
+    assert 'fids' not in eintrag
+    assert eintrag['anzahl'] == mock.anzahl
+    assert len(list(zustand.get_fids(mock.url(), MockWfs.feature_type))) == mock.anzahl
+
+    mock.loeschen("ID3", "ID7")
+    wfs, zeilen = exportieren(mock, zustand)
+    # nur Objekte ab dem letzten Stand
+    assert len(zeilen) < mock.anzahl
+    assert sorted(wfs.get_geloeschte()) == ["ID3", "ID7"]
+
+
+def test_delta_alte_ablage(tmp_path):
+    datei = tmp_path / "delta.json"
+    datei.write_text(json.dumps({"u|F|": {'stand': "2018-01-01", 'fids': ["a", "b"]}}))
+    assert list(DeltaZustand(str(datei)).get_fids("u", "F")) == ["a", "b"]
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from sibtools import PublicWfsData, WfsFilter
+from sibtools.mockwfs import MockWfs
+
+from test_seiten import lesen
+
+
+def test_parse_wird_wiederverwendet():
+    text = 'UND(GLEICH(gattung, "EIB"),KLEINER(stammdu, "0.5"))'
+    assert WfsFilter.parse(text) is WfsFilter.parse(text)
+
+
+def test_cache_ist_begrenzt():
+    erster = WfsFilter.parse('GLEICH(nr, "-1")')
+    for i in range(1000):
+        WfsFilter.parse('GLEICH(nr, "' + str(i) + '")')
+    assert WfsFilter.parse('GLEICH(nr, "-1")') is not erster
+
+
+SCHEMA = {'nr': {'type': "xsd:integer"}, 'gattung': {'klartext': "Itbaumgattung"},
+          'geometrie': {'type': "gml:GeometryPropertyType"}}
+DREIECK = '<gml:Polygon><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>' \
+          '563000,5933000 565000,5933000 565000,5935000 563000,5933000' \
+          '</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon>'
+
+
+def test_bbox():
+    assert WfsFilter.parse('BBOX(geometrie, "563000,5933000,566000,5936000")').to_xml(SCHEMA) == \
+        '<ogc:BBOX><ogc:PropertyName>geometrie</ogc:PropertyName><gml:Box><gml:coordinates>' \
+        '563000,5933000 566000,5936000</gml:coordinates></gml:Box></ogc:BBOX>'
+    # ohne Feld die Geometrie des FeatureTypes, Koordinatensystem als drittes Argument
+    assert WfsFilter.parse('BBOX("563000;5933000;566000;5936000", "EPSG:25832")').to_xml(SCHEMA) == \
+        '<ogc:BBOX><ogc:PropertyName>geometrie</ogc:PropertyName><gml:Box srsName="EPSG:25832">' \
+        '<gml:coordinates>563000,5933000 566000,5936000</gml:coordinates></gml:Box></ogc:BBOX>'
+
+
+def test_schneidet():
+    erwartet = '<ogc:Intersects><ogc:PropertyName>geometrie</ogc:PropertyName>' + DREIECK + '</ogc:Intersects>'
+    assert WfsFilter.parse('SCHNEIDET(geometrie, "' + DREIECK + '")').to_xml(SCHEMA) == erwartet
+    assert WfsFilter.parse("INTERSECTS('" + DREIECK + "')").to_xml(SCHEMA) == erwartet
+
+
+def test_ungleich_und_zwischen():
+    assert WfsFilter.parse('UNGLEICH(gattung, "EIB")').to_xml(SCHEMA) == \
+        '<ogc:PropertyIsNotEqualTo><ogc:PropertyName>gattung/@luk</ogc:PropertyName>' \
+        '<ogc:Literal>EIB</ogc:Literal></ogc:PropertyIsNotEqualTo>'
+    assert WfsFilter.parse('ZWISCHEN(nr, "10", "20")').to_xml(SCHEMA) == \
+        '<ogc:PropertyIsBetween><ogc:PropertyName>nr</ogc:PropertyName>' \
+        '<ogc:LowerBoundary><ogc:Literal>10</ogc:Literal></ogc:LowerBoundary>' \
+        '<ogc:UpperBoundary><ogc:Literal>20</ogc:Literal></ogc:UpperBoundary></ogc:PropertyIsBetween>'
+
+
+def test_verknuepfen():
+    ausdruck = WfsFilter.parse('GLEICH(nr, "1")') | ~WfsFilter.parse('KLEINER(nr, "5")')
+    assert ausdruck.to_xml() == \
+        '<ogc:Or><ogc:PropertyIsEqualTo><ogc:PropertyName>nr</ogc:PropertyName><ogc:Literal>1</ogc:Literal>' \
+        '</ogc:PropertyIsEqualTo><ogc:Not><ogc:PropertyIsLessThan><ogc:PropertyName>nr</ogc:PropertyName>' \
+        '<ogc:Literal>5</ogc:Literal></ogc:PropertyIsLessThan></ogc:Not></ogc:Or>'
+    assert ausdruck.felder() == ['nr', 'nr']
+
+
+@pytest.mark.parametrize("text, meldung", [
+    ('BBOX(geometrie, "1,2,3")', "x1,y1,x2,y2"),
+    ('BBOX(geometrie, "a,b,c,d")', "x1,y1,x2,y2"),
+    ('SCHNEIDET(geometrie, "563000,5933000")', "GML"),
+    ('BBOX("1,2,3,4")', None),
+    ('GLEICH(gibtEsNicht, "1")', "nicht vorhanden"),
+])
+def test_ungueltig(text, meldung):
+    schema = SCHEMA if meldung is not None else {'nr': {'type': "xsd:integer"}}
+    with pytest.raises(Exception, match=meldung or "Geometrie-Feld"):
+        WfsFilter.parse(text).to_xml(schema)
+
+
+@pytest.mark.parametrize("text, pruefen", [
+    ('BBOX(geometrie, "563000,5933000,565000,5935000")',
+     lambda o: 563000 <= o['geometrie'][0] <= 565000 and 5933000 <= o['geometrie'][1] <= 5935000),
+    ('SCHNEIDET("' + DREIECK + '")',
+     lambda o: 563000 <= o['geometrie'][0] <= 565000 and 5933000 <= o['geometrie'][1] <= 5935000),
+    ('UNGLEICH(gattung, "EIB")', lambda o: o['gattung'] != "EIB"),
+    ('ZWISCHEN(nr, "10", "20")', lambda o: 10 <= int(o['nr']) <= 20),
+    ('UND(ZWISCHEN(nr, "10", "40"), NICHT(GLEICH(gattung, "BUC")))',
+     lambda o: 10 <= int(o['nr']) <= 40 and o['gattung'] != "BUC"),
+])
+def test_filter_im_mock(mock, text, pruefen):
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, fid_ausgeben=True)
+    wfs.set_filter(text)
+    fids = [z['fid'] for z in lesen(wfs)]
+    erwartet = [o['fid'] for o in mock.objekte() if pruefen(o)]
+    assert 0 < len(erwartet) < mock.anzahl
+    assert sorted(fids) == sorted(erwartet)
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from sibtools import PublicWfsData
+from sibtools.mockwfs import MockWfs
+
+
+def test_lesen_wird_wiederholt(mock):
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    wfs.get_columns()
+    mock.fehlerquote = 1.0
+    anfragen = mock.anfragen.get('GetFeature', 0)
+    try:
+        wfs.read_line()
+    except Exception:
+        pass
+    assert mock.anfragen['GetFeature'] - anfragen == 4
+
+
+def test_transaktion_wird_nicht_wiederholt(mock):
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    wfs.get_columns()
+    mock.fehlerquote = 1.0
+    assert not wfs._write_step([{'nr': 1, 'name': "Test"}])
+    assert mock.anfragen['Transaction'] == 1
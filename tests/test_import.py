@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import random
+import time
+
+from sibtools import ImportJournal, PublicWfsData
+from sibtools.mockwfs import MockWfs
+
+from quellen import ListenQuelle, SPALTEN, baeume
+from test_seiten import lesen
+
+
+def test_abgelehnte_zeilen_in_liste(mock):
+    zeilen = baeume(10)
+    zeilen[4]['gattung'] = "XXX"
+    abgelehnt = []
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    ergebnis = wfs.write(ListenQuelle(zeilen, SPALTEN), blockgroesse=4, abgelehnt=abgelehnt)
+    assert len(ergebnis.fids) == 9
+    assert ergebnis.fehlgeschlagen() == [4]
+    assert len(abgelehnt) == 1
+    assert abgelehnt[0][0]['nr'] == 5
+    assert "XXX" in abgelehnt[0][1]
+
+
+def test_vorpruefung_ignoriert_nicht_gesendete_felder(mock):
+    export = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, fid_ausgeben=True)
+    zeilen = []
+    for i in range(5):
+        zeile = export.read_line()
+        zeile['bemerkung'] = "nur in der CSV"
+        zeilen.append(zeile)
+    spalten = dict(export.get_columns())
+    spalten['bemerkung'] = str
+    assert 'fid' in spalten and 'objektId' in spalten
+
+    abgelehnt = []
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    ergebnis = wfs.write(ListenQuelle(zeilen, spalten), vorpruefung=True, abgelehnt=abgelehnt)
+    assert abgelehnt == []
+    assert len(ergebnis.fids) == 5
+
+
+def test_vorpruefung_lehnt_falsche_werte_ab(mock):
+    zeilen = baeume(3)
+    zeilen[1]['nr'] = "abc"
+    abgelehnt = []
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    ergebnis = wfs.write(ListenQuelle(zeilen, SPALTEN), vorpruefung=True, abgelehnt=abgelehnt)
+    assert ergebnis.fehlgeschlagen() == [1]
+    assert "nr" in abgelehnt[0][1]
+
+
+def test_teilweise_ausgefuehrte_transaktion():
+    mock = MockWfs(anzahl=20, teilweise=True)
+    mock.start()
+    try:
+        zeilen = baeume(10)
+        zeilen[4]['nr'] = "abc"
+        abgelehnt = []
+        wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+        ergebnis = wfs.write(ListenQuelle(zeilen, SPALTEN), blockgroesse=10, abgelehnt=abgelehnt)
+        assert ergebnis.fehlgeschlagen() == [4]
+        assert sorted(ergebnis.fids) == [0, 1, 2, 3, 5, 6, 7, 8, 9]
+        assert ergebnis.unklar == {}
+        # keine Zeile doppelt eingefügt
+        namen = [o['name'] for o in mock.objekte() if o['name'].startswith("Neuer Baum")]
+        assert sorted(namen) == sorted(z['name'] for i, z in enumerate(zeilen) if i != 4)
+        assert len(set(ergebnis.fids.values())) == 9
+    finally:
+        mock.stop()
+
+
+def test_teilweise_ohne_zuordnung_ist_unklar(mock, monkeypatch):
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    antwort = (b'<?xml version="1.0"?><wfs:WFS_TransactionResponse xmlns:wfs="http://www.opengis.net/wfs">'
+               b'<wfs:TransactionResult><wfs:Status><wfs:PARTIAL/></wfs:Status>'
+               b'<wfs:Message>Fehler</wfs:Message></wfs:TransactionResult></wfs:WFS_TransactionResponse>')
+    wfs.get_columns()
+    monkeypatch.setattr(wfs, "_soap_request", lambda soap, schreibend=False: antwort)
+    abgelehnt = []
+    ergebnis = wfs.write(ListenQuelle(baeume(3), SPALTEN), abgelehnt=abgelehnt)
+    assert sorted(ergebnis.unklar) == [0, 1, 2]
+    assert ergebnis.fehlgeschlagen() == []
+    assert abgelehnt == []
+    assert not ergebnis
+
+
+def test_parallel_wie_nacheinander(tmp_path, monkeypatch):
+    zeilen = baeume(200)
+    zeilen[57]['gattung'] = "XXX"
+    ergebnisse = {}
+    for parallel in [1, 4]:
+        mock = MockWfs(anzahl=0)
+        beantworten = mock.beantworten
+        zufall = random.Random(parallel)
+
+        def verzoegert(anfrage, beantworten=beantworten, zufall=zufall):
+            # unterschiedliche Antwortzeiten, damit parallele Transaktionen durcheinander fertig werden
+            if b"Transaction" in anfrage[:300]:
+                time.sleep(zufall.random() * 0.03)
+            return beantworten(anfrage)
+
+        monkeypatch.setattr(mock, "beantworten", verzoegert)
+        mock.start()
+        try:
+            journal = str(tmp_path / ("import" + str(parallel) + ".journal"))
+            wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+            ergebnis = wfs.write(ListenQuelle(zeilen, SPALTEN), blockgroesse=10, abgelehnt=[], parallel=parallel,
+                                 journal=journal)
+            # jede Zeile genau einmal importiert
+            assert sorted(int(o['nr']) for o in mock.objekte()) == [i for i in range(1, 201) if i != 58]
+            journal = ImportJournal(journal)
+            fortgesetzt = journal.oeffnen(mock.url(), MockWfs.feature_type)
+            ergebnisse[parallel] = (ergebnis, fortgesetzt, journal.position(fortgesetzt)[0])
+            journal.schliessen()
+        finally:
+            mock.stop()
+
+    for ergebnis, fortgesetzt, position in ergebnisse.values():
+        assert list(ergebnis.fids) == [i for i in range(200) if i != 57]
+        assert ergebnis.fehlgeschlagen() == [57]
+        assert sorted(fortgesetzt.fids) == list(ergebnis.fids)
+        # ein fortgesetzter Import beginnt bei der abgelehnten Zeile
+        assert position == 57
+
+
+def test_sonderzeichen(mock):
+    sonder = 'A&B<"C>\''
+    mock.gattungen = MockWfs.gattungen + [(sonder, "Sonder & \"Zeichen\"")]
+    zeilen = baeume(3)
+    zeilen[0]['name'] = 'Müller & Söhne <"Eiche"> \'alt\''
+    zeilen[0]['gattung'] = sonder
+    zeilen[1]['stammdu'] = None
+    zeilen[1]['gattung'] = None
+    zeilen[2]['name'] = ""
+    zeilen[2]['gattung'] = ""
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    ergebnis = wfs.write(ListenQuelle(zeilen, SPALTEN), abgelehnt=[])
+    assert ergebnis.erfolgreich
+
+    # neue Objekte liefert der MockWfs am Ende
+    gelesen = {z['nr']: z for z in lesen(PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type))[-3:]}
+    assert gelesen[1]['name'] == zeilen[0]['name']
+    assert gelesen[1]['gattung'] == sonder
+    assert 'stammdu' not in gelesen[2] and 'gattung' not in gelesen[2]
+    assert 'name' not in gelesen[3] and 'gattung' not in gelesen[3]
+    assert gelesen[3]['stammdu'] == 0.5
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from sibtools import PublicWfsData
+from sibtools.mockwfs import MockWfs
+
+from quellen import ListenQuelle, SPALTEN, baeume
+
+
+def neue_baeume(mock):
+    return [o['nr'] for o in mock.objekte() if o['name'].startswith("Neuer Baum")]
+
+
+def test_fortsetzen_wiederholt_abgelehnte(mock, tmp_path):
+    journal = str(tmp_path / "import.journal")
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    quelle = ListenQuelle(baeume(10), SPALTEN)
+
+    # vorübergehender Fehler: Zeile 3 wird abgelehnt
+    quelle.zeilen[3]['nr'] = "abc"
+    ergebnis = wfs.write(quelle, blockgroesse=5, abgelehnt=[], journal=journal)
+    assert ergebnis.fehlgeschlagen() == [3]
+    assert len(neue_baeume(mock)) == 9
+
+    quelle.zeilen[3]['nr'] = 4
+    ergebnis = wfs.write(quelle, blockgroesse=5, abgelehnt=[], journal=journal)
+    assert ergebnis.fehlgeschlagen() == []
+    assert sorted(ergebnis.fids) == list(range(10))
+    # keine bestätigte Zeile doppelt
+    assert sorted(int(nr) for nr in neue_baeume(mock)) == list(range(1, 11))
+
+
+def test_fortsetzen_ohne_abgelehnte(mock, tmp_path):
+    journal = str(tmp_path / "import.journal")
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    quelle = ListenQuelle(baeume(6), SPALTEN)
+    quelle.zeilen[2]['nr'] = "abc"
+    wfs.write(quelle, blockgroesse=3, abgelehnt=[], journal=journal)
+
+    quelle.zeilen[2]['nr'] = 3
+    ergebnis = wfs.write(quelle, blockgroesse=3, abgelehnt=[], journal=journal, abgelehnte_ueberspringen=True)
+    assert ergebnis.fehlgeschlagen() == [2]
+    assert len(neue_baeume(mock)) == 5
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import threading
+from xml.etree import ElementTree
+
+from sibtools import PublicWfsData
+from sibtools.mockwfs import MockWfs
+
+from test_seiten import lesen
+
+
+def anfragen_mitschreiben(mock, monkeypatch):
+    """
+    Liste der Anfragen an den MockWfs als (Anfrageart, FeatureType)
+    """
+    anfragen = []
+    beantworten = mock.beantworten
+
+    def mitschreiben(anfrage):
+        root = ElementTree.fromstring(anfrage)
+        typ = root.findtext("{http://www.opengis.net/wfs}TypeName") or \
+            root.find("{http://www.opengis.net/wfs}Query").get("typeName").strip("'\"")
+        anfragen.append((root.tag.split('}', 1).pop(), typ.strip()))
+        return beantworten(anfrage)
+
+    monkeypatch.setattr(mock, "beantworten", mitschreiben)
+    return anfragen
+
+
+def test_klartexte_einmal_geladen(mock, monkeypatch):
+    anfragen = anfragen_mitschreiben(mock, monkeypatch)
+    ergebnisse = []
+
+    def export():
+        wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, klartexte_anhaengen=True,
+                            kurzfassen=False)
+        ergebnisse.append(lesen(wfs))
+
+    threads = [threading.Thread(target=export) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert anfragen.count(("DescribeFeatureType", MockWfs.klartext)) == 1
+    assert anfragen.count(("GetFeature", MockWfs.klartext)) == 1
+    assert anfragen.count(("GetFeature", MockWfs.feature_type)) == 4
+
+    langtexte = dict(MockWfs.gattungen)
+    assert len(ergebnisse) == 4
+    for zeilen in ergebnisse:
+        assert zeilen == ergebnisse[0]
+        assert len(zeilen) == mock.anzahl
+        for zeile, objekt in zip(zeilen, mock.objekte()):
+            assert zeile['gattung'] == zeile['gattung.luk'] == objekt['gattung']
+            assert zeile['gattung.langtext'] == langtexte[objekt['gattung']]
+            assert zeile['gattung.typeName'] == MockWfs.klartext
+
+
+def test_kurzfassen_laedt_keine_klartexte(mock, monkeypatch):
+    anfragen = anfragen_mitschreiben(mock, monkeypatch)
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, klartexte_anhaengen=True)
+    assert 'gattung.langtext' in wfs.get_columns()
+    assert len(lesen(wfs)) == mock.anzahl
+    assert ("DescribeFeatureType", MockWfs.klartext) in anfragen
+    assert ("GetFeature", MockWfs.klartext) not in anfragen
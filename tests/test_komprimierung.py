@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from sibtools import PublicWfsData, Uebertragungsstatistik, WfsData
+from sibtools.mockwfs import MockWfs
+
+from quellen import ListenQuelle, SPALTEN, baeume
+from test_seiten import lesen
+
+
+@pytest.fixture
+def statistik():
+    statistik = Uebertragungsstatistik()
+    WfsData.set_statistik(statistik)
+    yield statistik
+    WfsData.set_statistik(None)
+
+
+def test_unkomprimiert_gleich_gezaehlt(mock, statistik):
+    lesen(PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type))
+    werte = statistik.get()['GetFeature']
+    assert werte['anfragen'] >= 1
+    assert werte['empfangen'] == werte['empfangen_roh'] > 0
+    assert werte['gesendet'] == werte['gesendet_roh'] > 0
+
+
+def test_komprimiert_export_und_import(mock, statistik):
+    klar = lesen(PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type))
+    gestreamt = lesen(PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, streamen=True))
+    statistik.zuruecksetzen()
+
+    mock.komprimieren = True
+    WfsData.set_http_config(backoff=0, komprimieren=True)
+    assert lesen(PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)) == klar
+    assert lesen(PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, streamen=True)) == gestreamt
+    werte = statistik.get()['GetFeature']
+    assert 0 < werte['empfangen'] < werte['empfangen_roh']
+    assert 0 < werte['gesendet'] < werte['gesendet_roh']
+
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    ergebnis = wfs.write(ListenQuelle(baeume(100), SPALTEN), blockgroesse=50, abgelehnt=[])
+    assert len(ergebnis.fids) == 100 and ergebnis.erfolgreich
+    neu = [o for o in mock.objekte() if o['name'].startswith("Neuer Baum")]
+    assert sorted(int(o['nr']) for o in neu) == list(range(1, 101))
+    werte = statistik.get()['Transaction']
+    assert werte['anfragen'] == 2
+    assert 0 < werte['gesendet'] < werte['gesendet_roh']
+    assert 0 < werte['empfangen'] < werte['empfangen_roh']
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from sibtools import CsvData, MehrfachExport, WfsFilter
+from sibtools.mockwfs import MockWfs
+
+from test_csv import alle
+
+
+def test_mehrfach_export(mock, tmp_path):
+    def ziel(ft):
+        return CsvData(str(tmp_path / (ft + ".csv")))
+
+    export = MehrfachExport(mock.url(), "nutzer", "passwort", max_parallel=2)
+    export.add(MockWfs.feature_type, ziel)
+    export.add(MockWfs.klartext, ziel)
+    export.add("Gibtsnicht", ziel)
+    export.add(MockWfs.feature_type, lambda ft: CsvData(str(tmp_path / "gefiltert.csv")),
+               wfs_filter=WfsFilter.parse('KLEINERGLEICH(nr, "10")'))
+    bericht = export.run()
+
+    # Bericht in der Reihenfolge der Aufträge, der fehlerhafte Export bricht die anderen nicht ab
+    assert [b['feature_type'] for b in bericht] == [MockWfs.feature_type, MockWfs.klartext, "Gibtsnicht",
+                                                    MockWfs.feature_type]
+    assert [b['zeilen'] for b in bericht] == [mock.anzahl, len(MockWfs.gattungen), 0, 10]
+    assert [b['fehler'] is None for b in bericht] == [True, True, False, True]
+    assert "Gibtsnicht" in bericht[2]['fehler']
+    assert all(b['sekunden'] >= 0 for b in bericht)
+
+    zeilen = alle(CsvData(str(tmp_path / (MockWfs.feature_type + ".csv"))))
+    assert sorted(z['nr'] for z in zeilen) == sorted(o['nr'] for o in mock.objekte())
+    assert len(alle(CsvData(str(tmp_path / (MockWfs.klartext + ".csv"))))) == len(MockWfs.gattungen)
+    assert len(alle(CsvData(str(tmp_path / "gefiltert.csv")))) == 10
+    assert not (tmp_path / "Gibtsnicht.csv").exists()
+
+
+def test_mehrfach_export_begrenzt_gleichzeitige_exporte(mock, tmp_path, monkeypatch):
+    beantworten = mock.beantworten
+    laufend = [0, 0]
+    lock = threading.Lock()
+
+    def zaehlen(anfrage):
+        with lock:
+            laufend[0] += 1
+            laufend[1] = max(laufend)
+        try:
+            return beantworten(anfrage)
+        finally:
+            with lock:
+                laufend[0] -= 1
+
+    monkeypatch.setattr(mock, "beantworten", zaehlen)
+    mock.latenz = 0.05
+    export = MehrfachExport(mock.url(), "nutzer", "passwort", max_parallel=2)
+    for i in range(4):
+        export.add(MockWfs.feature_type, lambda ft, i=i: CsvData(str(tmp_path / (str(i) + ".csv"))))
+    bericht = export.run()
+    assert [b['zeilen'] for b in bericht] == [mock.anzahl] * 4
+    assert laufend[1] == 2
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+from sibtools import MetadatenCache
+
+
+def test_aufraeumen_nur_eigene_dateien(tmp_path):
+    fremd = tmp_path / "notizen.txt"
+    fremd.write_text("nicht löschen")
+    alt = time.time() - 7200
+    os.utime(str(fremd), (alt, alt))
+
+    cache = MetadatenCache(str(tmp_path), ttl=3600)
+    cache.set("http://wfs", "DescribeFeatureType", "Alt", {'a': 1})
+    eintrag = [d for d in os.listdir(str(tmp_path)) if d.endswith(".json")][0]
+    os.utime(str(tmp_path / eintrag), (alt, alt))
+
+    cache.set("http://wfs", "DescribeFeatureType", "Neu", {'b': 2})
+    assert fremd.exists()
+    assert not (tmp_path / eintrag).exists()
+    assert cache.get("http://wfs", "DescribeFeatureType", "Neu") == {'b': 2}
+    assert cache.get("http://wfs", "DescribeFeatureType", "Alt") is None
+
+    cache.leeren()
+    assert os.listdir(str(tmp_path)) == ["notizen.txt"]
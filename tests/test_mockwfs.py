@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from sibtools import PublicWfsData
+from sibtools.benchmark import Benchmark
+from sibtools.mockwfs import MockWfs
+
+from quellen import ListenQuelle, SPALTEN, baeume
+
+
+def alle(wfs):
+    zeilen = []
+    while True:
+        zeile = wfs.read_line()
+        if zeile is None:
+            return zeilen
+        zeilen.append(zeile)
+
+
+def test_lesen_und_schreiben(mock):
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, fid_ausgeben=True)
+    vorher = alle(wfs)
+    assert len(vorher) == mock.anzahl
+    assert vorher[0]['fid'] == "ID0"
+    assert vorher[0]['gattung'] == MockWfs.gattungen[0][0]
+
+    ergebnis = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type).write(
+        ListenQuelle(baeume(3), SPALTEN), abgelehnt=[])
+    assert ergebnis
+
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, fid_ausgeben=True)
+    nachher = alle(wfs)
+    assert len(nachher) == mock.anzahl + 3
+    neu = {z['fid']: z for z in nachher[mock.anzahl:]}
+    assert sorted(neu) == sorted(ergebnis.fids.values())
+    assert [(z['nr'], z['name'], z['gattung']) for z in nachher[mock.anzahl:]] == \
+           [(z['nr'], z['name'], z['gattung']) for z in baeume(3)]
+
+
+def test_filter(mock):
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    wfs.set_filter('GLEICH(gattung, "EIB")')
+    zeilen = alle(wfs)
+    assert len(zeilen) == mock.anzahl // len(MockWfs.gattungen)
+    assert set(z['gattung'] for z in zeilen) == {"EIB"}
+
+
+def test_benchmark():
+    ergebnisse = Benchmark(anzahl=200, wiederholungen=1).ausfuehren(["export", "import"])
+    assert [(e['name'], e['zeilen']) for e in ergebnisse] == [("export", 200), ("import", 200)]
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from sibtools import PublicWfsData
+from sibtools.mockwfs import MockWfs
+
+
+def lesen(wfs):
+    zeilen = []
+    while True:
+        zeile = wfs.read_line()
+        if zeile is None:
+            return zeilen
+        zeilen.append(zeile)
+
+
+def test_seiten_sortiert(mock):
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, seitengroesse=7,
+                        seiten_parallel=4, fid_ausgeben=True)
+    fids = [z['fid'] for z in lesen(wfs)]
+    assert len(fids) == mock.anzahl
+    assert fids == sorted(fids)
+    assert set(fids) == set(o['fid'] for o in mock.objekte())
+
+
+def test_seiten_ohne_sortierattribut(mock, capsys):
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, seitengroesse=7,
+                        sortierung="gibtEsNicht")
+    assert len(lesen(wfs)) == mock.anzahl
+    assert "in einer Anfrage geladen" in capsys.readouterr().out
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timezone
+
+import pytest
+
+from sibtools import PublicWfsData, SpaltenSpeicher
+from sibtools.mockwfs import MockWfs
+
+from test_seiten import lesen
+
+
+@pytest.mark.parametrize("optionen", [{}, {'klartexte_anhaengen': True}, {'kurzfassen': False}])
+def test_kompakt_wie_liste(mock, optionen):
+    liste = lesen(PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, **optionen))
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, kompakt=True, **optionen)
+    assert lesen(wfs) == liste
+    assert isinstance(wfs.daten, SpaltenSpeicher)
+    wfs.reset_line()
+    assert lesen(wfs) == liste
+
+
+def test_none_und_fehlende_werte():
+    speicher = SpaltenSpeicher({'nr': int, 'stand': datetime, 'laenge': float, 'gattung': str, 'name': str},
+                               codiert=['gattung'])
+    speicher.append({'nr': 1, 'stand': datetime(2018, 1, 1), 'laenge': 1.5, 'gattung': "EIB", 'name': "a"})
+    speicher.append({'nr': None, 'stand': None, 'laenge': None, 'gattung': None, 'name': None})
+    speicher.append({})
+    speicher.append({'nr': 4, 'gattung': "EIB"})
+    assert len(speicher) == 4
+    # None in Zahlen- und Datumsspalten wird als fehlendes Attribut abgelegt, sonst bleibt es erhalten
+    assert speicher[1] == {'gattung': None, 'name': None}
+    assert speicher[2] == {}
+    assert speicher[3] == {'nr': 4, 'gattung': "EIB"}
+    assert speicher[-1] == speicher[3]
+    with pytest.raises(IndexError):
+        speicher[4]
+
+
+def test_zeitstempel():
+    werte = [datetime(1970, 1, 1), datetime(1969, 12, 31, 23, 59, 59, 999999), datetime(1, 1, 1),
+             datetime(9999, 12, 31, 23, 59, 59, 999999), datetime(2018, 12, 20, 12, 30, 0, 123456)]
+    speicher = SpaltenSpeicher({'stand': datetime})
+    for wert in werte:
+        speicher.append({'stand': wert})
+    assert [z['stand'] for z in speicher] == werte
+
+
+def test_unpassende_werte_wechseln_die_spalte():
+    speicher = SpaltenSpeicher({'nr': int, 'stand': datetime})
+    speicher.append({'nr': 1, 'stand': datetime(2018, 1, 1)})
+    speicher.append({'nr': "A1", 'stand': datetime(2018, 1, 1, tzinfo=timezone.utc)})
+    speicher.append({'nr': 2 ** 70})
+    assert list(speicher) == [{'nr': 1, 'stand': datetime(2018, 1, 1)},
+                              {'nr': "A1", 'stand': datetime(2018, 1, 1, tzinfo=timezone.utc)},
+                              {'nr': 2 ** 70}]
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from sibtools import PublicWfsData
+from sibtools.mockwfs import MockWfs
+
+from test_seiten import lesen
+
+
+class AbbrechenderStrom (object):
+    """
+    Liefert nur die ersten grenze Bytes der Antwort, danach bricht die Verbindung ab
+    """
+
+    def __init__(self, raw, grenze):
+        self.raw = raw
+        self.rest = grenze
+
+    def read(self, groesse=-1):
+        if self.rest <= 0:
+            raise IOError("Verbindung abgebrochen")
+        daten = self.raw.read(self.rest if groesse < 0 else min(groesse, self.rest))
+        self.rest -= len(daten)
+        return daten
+
+    def close(self):
+        self.raw.close()
+
+
+def test_streamen_wie_gepuffert(mock):
+    gepuffert = lesen(PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type))
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, streamen=True)
+    assert lesen(wfs) == gepuffert
+    assert wfs.read_line() is None
+    wfs.reset_line()
+    assert lesen(wfs) == gepuffert
+
+
+def test_streamen_abbruch_beginnt_nicht_von_vorn(mock, monkeypatch):
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type, streamen=True)
+    anfrage = wfs._soap_request_stream
+    versuche = []
+
+    def soap_request_stream(soap):
+        response = anfrage(soap)
+        if "GetFeature" in soap and len(versuche) == 0:
+            versuche.append(soap)
+            response.raw = AbbrechenderStrom(response.raw, 4000)
+        return response
+
+    monkeypatch.setattr(wfs, "_soap_request_stream", soap_request_stream)
+    gelesen = []
+    with pytest.raises(IOError):
+        while True:
+            gelesen.append(wfs.read_line())
+    assert 0 < len(gelesen) < mock.anzahl
+
+    # kein stiller Neubeginn, der die Zeilen doppelt ausgeben würde
+    with pytest.raises(Exception, match="reset_line"):
+        wfs.read_line()
+
+    wfs.reset_line()
+    zeilen = lesen(wfs)
+    assert len(zeilen) == mock.anzahl
+    assert zeilen[:len(gelesen)] == gelesen
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from sibtools import PublicWfsData
+from sibtools.mockwfs import MockWfs
+
+from quellen import ListenQuelle
+
+
+def bestand(mock):
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    zeilen = []
+    while True:
+        zeile = wfs.read_line()
+        if zeile is None:
+            return zeilen, wfs.get_columns()
+        zeilen.append(zeile)
+
+
+def test_sync_loescht_leere_werte(mock):
+    zeilen, spalten = bestand(mock)
+    # leere Zellen fehlen in der Zeile (wie bei CsvData)
+    del zeilen[5]['stammdu']
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    ergebnis = wfs.sync(ListenQuelle(zeilen, spalten), ['nr'], abgelehnt=[])
+    assert ergebnis.geaendert == 1
+    assert [o.get('stammdu') for o in mock.objekte()][5] is None
+
+    ergebnis = wfs.sync(ListenQuelle(zeilen, spalten), ['nr'], abgelehnt=[])
+    assert ergebnis.geaendert == 0
+    assert ergebnis.unveraendert == mock.anzahl
+
+
+def test_sync_abgelehnte_loeschungen_getrennt(mock, monkeypatch):
+    zeilen, spalten = bestand(mock)
+    # ID7 soll gelöscht werden, der Server lehnt das ab; eine neue Zeile ist ungültig
+    del zeilen[7]
+    zeilen.append({'nr': 1000, 'name': "Neu", 'gattung': "XXX"})
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    senden = wfs._soap_request
+    fehler = (b'<?xml version="1.0"?><wfs:WFS_TransactionResponse xmlns:wfs="http://www.opengis.net/wfs">'
+              b'<wfs:TransactionResult><wfs:Status><wfs:FAILED/></wfs:Status>'
+              b'<wfs:Message>gesperrt</wfs:Message></wfs:TransactionResult></wfs:WFS_TransactionResponse>')
+
+    def soap_request(soap, schreibend=False):
+        if b'<wfs:Delete' in soap and b'fid="ID7"' in soap:
+            return fehler
+        return senden(soap, schreibend)
+
+    monkeypatch.setattr(wfs, "_soap_request", soap_request)
+    abgelehnt = []
+    ergebnis = wfs.sync(ListenQuelle(zeilen, spalten), ['nr'], abgelehnt=abgelehnt)
+    assert ergebnis.fehlgeschlagen() == [len(zeilen) - 1]
+    assert list(ergebnis.fehler_loeschen) == ["ID7"]
+    assert ergebnis.geloescht == 0
+    assert all(isinstance(nr, int) for nr in ergebnis.fids)
+    assert len(abgelehnt) == 2
+    assert not ergebnis
+    assert "2 abgelehnt" in str(ergebnis)
+
+
+def test_sync_gml_ohne_namensraum(mock):
+    zeilen, spalten = bestand(mock)
+    # GML aus der Quelle nur mit gml-Präfix, wie es in die Transaktion übernommen wird
+    for zeile, objekt in zip(zeilen, mock.objekte()):
+        zeile['geometrie'] = '<gml:Point srsName="EPSG:25832"><gml:coordinates>%s,%s</gml:coordinates>' \
+                             '</gml:Point>' % objekt['geometrie']
+    wfs = PublicWfsData(mock.url(), "nutzer", "passwort", MockWfs.feature_type)
+    assert 'geometrie' in spalten
+    for _ in range(2):
+        ergebnis = wfs.sync(ListenQuelle(zeilen, spalten), ['nr'], abgelehnt=[])
+        assert ergebnis.geaendert == 0
+        assert ergebnis.unveraendert == mock.anzahl